@@ -0,0 +1,34 @@
+from typing import NoReturn
+
+from benchmarks.harness import benchmark
+from ziopy.services.console import Console, MockConsole
+from ziopy.zio import ZIO, Environment, ZIOMonad, monadic, unsafe_run
+
+LINES = 1000
+
+
+@monadic
+def _echo(n: int, do: ZIOMonad[Console, NoReturn]) -> ZIO[Console, NoReturn, int]:
+    con = do << Environment()
+    total = 0
+    for _ in range(n):
+        line = do << con.input("> ").either()
+        text = line.fold(lambda _: "", lambda s: s)
+        do << con.print(text)
+        total += len(text)
+    return ZIO.succeed(total)
+
+
+@benchmark()
+def mock_console_echo() -> None:
+    mock_console = MockConsole([f"line {i}" for i in range(LINES)])
+    unsafe_run(_echo(LINES).provide(mock_console))
+
+
+@benchmark()
+def mock_console_print() -> None:
+    mock_console = MockConsole()
+    print_line = mock_console.print
+    for i in range(LINES):
+        unsafe_run(print_line("x"))
+    assert mock_console.effect_count == LINES
@@ -0,0 +1,37 @@
+from benchmarks.harness import benchmark
+from ziopy.either import Either
+
+ITERATIONS = 1000
+
+RIGHT = Either.right(1)
+LEFT = Either.left("error")
+
+
+@benchmark()
+def either_map_flat_map_right() -> None:
+    for _ in range(ITERATIONS):
+        RIGHT.map(lambda x: x + 1).flat_map(lambda y: Either.right(y * 2)).fold(str, str)
+
+
+@benchmark()
+def either_map_flat_map_left() -> None:
+    for _ in range(ITERATIONS):
+        LEFT.map(lambda x: x + 1).flat_map(lambda y: Either.right(y * 2)).fold(str, str)
+
+
+@benchmark()
+def either_require() -> None:
+    for _ in range(ITERATIONS):
+        RIGHT.require(lambda x: x > 0, lambda x: f"{x} is not positive")
+
+
+RECORDS = [str(i) for i in range(ITERATIONS)]
+
+
+def _parse(s: str) -> Either[str, int]:
+    return Either.right(int(s)) if s.isdigit() else Either.left(s)
+
+
+@benchmark()
+def either_traverse() -> None:
+    Either.traverse(RECORDS, _parse)
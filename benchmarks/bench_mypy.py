@@ -0,0 +1,143 @@
+"""
+Measures how long mypy (with the ziopy plugin) takes to check a generated
+project full of `@monadic` functions: a cold run, a warm run against the
+incremental cache, and a run after editing a single module. With `--daemon`,
+the same incremental edit is also checked through dmypy.
+
+Usage (from the repository root; requires mypy):
+
+    python -m benchmarks.bench_mypy --modules 200 --functions 20
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple
+
+_PLUGIN = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ziopy", "mypy_plugin.py"
+)
+
+_HEADER = '''\
+from typing import NoReturn
+
+from ziopy.services.console import HasConsole
+from ziopy.zio import ZIO, ZIOMonad, monadic
+'''
+
+_FUNCTION = '''
+
+@monadic
+def step_{index}(
+    x: int,
+    do: ZIOMonad[HasConsole, NoReturn]
+) -> ZIO[HasConsole, NoReturn, int]:
+    y = do << ZIO.succeed(x + {index})
+    z = do << {previous}
+    return ZIO.succeed(y + z)
+'''
+
+
+def _write_module(path: str, module: int, functions: int, revision: int = 0) -> None:
+    with open(path, "w") as f:
+        f.write(_HEADER)
+        if module > 0:
+            f.write(f"from generated.module_{module - 1} import step_0 as upstream\n")
+        for index in range(functions):
+            if index > 0:
+                previous = f"step_{index - 1}(x)"
+            elif module > 0:
+                previous = "upstream(x)"
+            else:
+                previous = f"ZIO.succeed({revision})"
+            f.write(_FUNCTION.format(index=index, previous=previous))
+
+
+def _edit_module(path: str, module: int, functions: int, revision: int) -> None:
+    """
+    Rewrites a module with another revision (only the first module uses it,
+    in a function body, so the edit does not change any module's interface).
+    mypy skips files whose size and (whole-second) modification time are
+    unchanged, so the modification time is advanced.
+    """
+    mtime = os.stat(path).st_mtime
+    _write_module(path, module, functions, revision)
+    os.utime(path, (mtime + revision, mtime + revision))
+
+
+def _generate(root: str, modules: int, functions: int) -> List[str]:
+    package = os.path.join(root, "generated")
+    os.makedirs(package)
+    open(os.path.join(package, "__init__.py"), "w").close()
+    with open(os.path.join(root, "mypy.ini"), "w") as f:
+        f.write(f"[mypy]\nplugins = {_PLUGIN}\nincremental = True\n")
+    paths = []
+    for module in range(modules):
+        path = os.path.join(package, f"module_{module}.py")
+        _write_module(path, module, functions)
+        paths.append(path)
+    return paths
+
+
+def _timed(label: str, run: Callable[[], Tuple[str, str, int]]) -> float:
+    start = perf_counter()
+    stdout, stderr, status = run()
+    elapsed = perf_counter() - start
+    if status not in (0, None):
+        sys.stderr.write(stdout + stderr)
+        raise SystemExit(f"mypy failed during the {label} run")
+    print(f"{label:<24} {elapsed:>8.2f}s")
+    return elapsed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modules", type=int, default=100, help="generated modules")
+    parser.add_argument("--functions", type=int, default=20,
+                        help="@monadic functions per module")
+    parser.add_argument("--daemon", action="store_true", help="also benchmark dmypy")
+    parser.add_argument("--keep", action="store_true", help="keep the generated project")
+    args = parser.parse_args(argv)
+
+    try:
+        from mypy import api
+    except ImportError:
+        print("mypy is not installed (pip install mypy).", file=sys.stderr)
+        return 2
+
+    root = tempfile.mkdtemp(prefix="ziopy-mypy-bench-")
+    cwd = os.getcwd()
+    # Generated modules import ziopy from this checkout.
+    os.environ["MYPYPATH"] = os.path.dirname(os.path.dirname(_PLUGIN))
+    try:
+        paths = _generate(root, args.modules, args.functions)
+        os.chdir(root)
+        mypy_args = ["--config-file", "mypy.ini", "generated"]
+        print(f"{args.modules} modules x {args.functions} @monadic functions")
+
+        _timed("cold", lambda: api.run(mypy_args))
+        _timed("warm (cache hit)", lambda: api.run(mypy_args))
+        _edit_module(paths[0], 0, args.functions, revision=1)
+        _timed("one module edited", lambda: api.run(mypy_args))
+
+        if args.daemon:
+            dmypy_args = ["run", "--"] + mypy_args
+            try:
+                _timed("dmypy start", lambda: api.run_dmypy(dmypy_args))
+                _edit_module(paths[0], 0, args.functions, revision=2)
+                _timed("dmypy one module edited", lambda: api.run_dmypy(dmypy_args))
+            finally:
+                api.run_dmypy(["stop"])
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print(f"Generated project kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
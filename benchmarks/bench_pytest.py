@@ -0,0 +1,21 @@
+"""
+Exposes the registered benchmarks to pytest-benchmark:
+
+    pytest benchmarks/bench_pytest.py --benchmark-autosave
+    pytest benchmarks/bench_pytest.py --benchmark-compare --benchmark-compare-fail=min:10%
+"""
+from typing import Any
+
+import pytest
+
+import benchmarks.bench_console  # noqa: F401
+import benchmarks.bench_either  # noqa: F401
+import benchmarks.bench_zio  # noqa: F401
+from benchmarks.harness import Benchmark, registered_benchmarks
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("bench", registered_benchmarks(), ids=lambda b: b.name)
+def test_benchmark(benchmark: Any, bench: Benchmark) -> None:
+    benchmark(bench.func)
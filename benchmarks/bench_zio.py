@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import NoReturn
+
+from benchmarks.harness import benchmark
+from ziopy.zio import ZIO, ZIOMonad, monadic, unsafe_run
+
+# Chains are kept well below the recursion limit: the closure-based
+# interpreter uses a few Python frames per nested step.
+CHAIN_DEPTH = 200
+LOOP_ITERATIONS = 1000
+
+
+def _build_flat_map_chain(depth: int) -> ZIO[object, NoReturn, int]:
+    program: ZIO[object, NoReturn, int] = ZIO.succeed(0)
+    for _ in range(depth):
+        program = program.flat_map(lambda x: ZIO.succeed(x + 1))
+    return program
+
+
+def _build_map_chain(depth: int) -> ZIO[object, NoReturn, int]:
+    program: ZIO[object, NoReturn, int] = ZIO.succeed(0)
+    for _ in range(depth):
+        program = program.map(lambda x: x + 1)
+    return program
+
+
+FLAT_MAP_CHAIN = _build_flat_map_chain(CHAIN_DEPTH)
+MAP_CHAIN = _build_map_chain(CHAIN_DEPTH)
+
+
+@benchmark()
+def zio_flat_map_chain() -> None:
+    unsafe_run(FLAT_MAP_CHAIN)
+
+
+@benchmark()
+def zio_map_chain() -> None:
+    unsafe_run(MAP_CHAIN)
+
+
+@benchmark()
+def zio_build_flat_map_chain() -> None:
+    _build_flat_map_chain(CHAIN_DEPTH)
+
+
+@monadic
+def _monadic_loop(n: int, do: ZIOMonad[object, NoReturn]) -> ZIO[object, NoReturn, int]:
+    # The same loop body as examples/zio_console_example.py.
+    x = do << ZIO.succeed(0)
+    while x < n:
+        x = do << (
+            ZIO.succeed(x)
+            .map(lambda p: p + 1)
+            .flat_map(lambda q: ZIO.succeed(q - 1))
+            .flat_map(lambda r: ZIO.succeed(r + 1))
+        )
+    return ZIO.succeed(x)
+
+
+MONADIC_LOOP = _monadic_loop(LOOP_ITERATIONS)
+
+
+@benchmark()
+def zio_monadic_loop() -> None:
+    unsafe_run(MONADIC_LOOP)
+
+
+@dataclass(frozen=True)
+class Bippy(Exception):
+    pass
+
+
+def _kaboom() -> int:
+    raise Bippy()
+
+
+CATCH = ZIO.effect_catch(_kaboom, Bippy).either()
+
+
+@benchmark()
+def zio_catch() -> None:
+    for _ in range(100):
+        unsafe_run(CATCH)
+
+
+@dataclass(frozen=True)
+class Circle:
+    radius: float
+
+
+@dataclass(frozen=True)
+class Square:
+    side: float
+
+
+def _at_type_dispatch(shape: object) -> ZIO[object, NoReturn, float]:
+    return (
+        ZIO.succeed(shape)
+        .match_types()
+        .at_type(Circle, ZIO.access(lambda c: 3.14159 * c.radius ** 2))
+        .at_type(Square, ZIO.access(lambda s: s.side ** 2))
+    )
+
+
+AT_TYPE_PROGRAMS = [_at_type_dispatch(Circle(1.0)), _at_type_dispatch(Square(2.0))]
+
+
+@benchmark()
+def zio_at_type_dispatch() -> None:
+    for _ in range(50):
+        for program in AT_TYPE_PROGRAMS:
+            unsafe_run(program)
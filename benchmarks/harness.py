@@ -0,0 +1,136 @@
+"""
+A minimal benchmark harness that measures both time and peak memory, and
+compares results against a stored JSON baseline.
+
+Benchmarks are registered with the `@benchmark` decorator. Each benchmark is a
+zero-argument callable; any expensive setup should happen outside of it (for
+example, by building the ZIO program once at module level).
+"""
+import json
+import statistics
+import tracemalloc
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, TypeVar
+
+F = TypeVar('F', bound=Callable[[], object])
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    func: Callable[[], object]
+
+
+@dataclass(frozen=True)
+class Result:
+    name: str
+    loops: int
+    best_seconds: float
+    median_seconds: float
+    peak_bytes: int
+
+
+@dataclass(frozen=True)
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+
+_REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: Optional[str] = None) -> Callable[[F], F]:
+    def _register(func: F) -> F:
+        bench_name = name or func.__name__
+        if bench_name in _REGISTRY:
+            raise ValueError(f"Duplicate benchmark name: {bench_name}")
+        _REGISTRY[bench_name] = Benchmark(bench_name, func)
+        return func
+    return _register
+
+
+def registered_benchmarks() -> List[Benchmark]:
+    return list(_REGISTRY.values())
+
+
+def _time_loops(func: Callable[[], object], loops: int) -> float:
+    start = perf_counter()
+    for _ in range(loops):
+        func()
+    return perf_counter() - start
+
+
+def measure(bench: Benchmark, repeat: int = 5, min_time: float = 0.05) -> Result:
+    """
+    Calibrates a loop count so that one sample takes at least `min_time`
+    seconds, then takes `repeat` samples. Times are reported per call. Peak
+    memory is measured separately with tracemalloc, on a single call, so that
+    tracing overhead does not distort the timings.
+    """
+    func = bench.func
+    func()  # Warm up.
+
+    loops = 1
+    while _time_loops(func, loops) < min_time:
+        loops *= 2
+
+    samples = [_time_loops(func, loops) / loops for _ in range(repeat)]
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=bench.name,
+        loops=loops,
+        best_seconds=min(samples),
+        median_seconds=statistics.median(samples),
+        peak_bytes=peak
+    )
+
+
+def save_results(results: List[Result], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump({r.name: asdict(r) for r in results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> Dict[str, Result]:
+    with open(path) as f:
+        return {name: Result(**fields) for name, fields in json.load(f).items()}
+
+
+def compare(
+    results: List[Result],
+    baseline: Dict[str, Result],
+    tolerance: float
+) -> List[Regression]:
+    """
+    Returns every benchmark whose best time or peak memory exceeds its
+    baseline by more than `tolerance` (a fraction; 0.1 means 10%). Benchmarks
+    missing from the baseline are ignored.
+    """
+    regressions: List[Regression] = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        if result.best_seconds > previous.best_seconds * (1 + tolerance):
+            regressions.append(
+                Regression(result.name, "time", previous.best_seconds, result.best_seconds)
+            )
+        if result.peak_bytes > previous.peak_bytes * (1 + tolerance):
+            regressions.append(
+                Regression(result.name, "memory", previous.peak_bytes, result.peak_bytes)
+            )
+    return regressions
@@ -0,0 +1,96 @@
+"""
+Runs the ziopy benchmark suite.
+
+Usage (from the repository root):
+
+    # Record a baseline, e.g. on the last release.
+    python -m benchmarks.run --save .benchmarks/baseline.json
+
+    # Compare the working tree against it; exits non-zero on regressions.
+    python -m benchmarks.run --compare .benchmarks/baseline.json --tolerance 0.15
+
+    # Or hand the same benchmarks to pyperf, if it is installed.
+    python -m benchmarks.run --pyperf -o current.json
+    python -m pyperf compare_to baseline.json current.json
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+import benchmarks.bench_console  # noqa: F401
+import benchmarks.bench_either  # noqa: F401
+import benchmarks.bench_zio  # noqa: F401
+from benchmarks.harness import (Benchmark, compare, load_results, measure,
+                                registered_benchmarks, save_results)
+
+
+def _selected(pattern: Optional[str]) -> List[Benchmark]:
+    return [b for b in registered_benchmarks() if pattern is None or pattern in b.name]
+
+
+def _run_pyperf(benches: List[Benchmark], pyperf_args: List[str]) -> int:
+    try:
+        import pyperf
+    except ImportError:
+        print("pyperf is not installed (pip install pyperf).", file=sys.stderr)
+        return 2
+
+    runner = pyperf.Runner()
+    runner.parse_args(pyperf_args)
+    for bench in benches:
+        runner.bench_func(bench.name, bench.func)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", "--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="minimum duration of one sample, in seconds")
+    parser.add_argument("--save", metavar="PATH", help="write results to a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed slowdown/memory growth as a fraction (default: 0.1)")
+    parser.add_argument("--pyperf", action="store_true",
+                        help="run the benchmarks with pyperf; remaining args go to pyperf")
+    args, remaining = parser.parse_known_args(argv)
+
+    benches = _selected(args.filter)
+    if args.pyperf:
+        return _run_pyperf(benches, remaining)
+    if remaining:
+        parser.error(f"unrecognized arguments: {' '.join(remaining)}")
+
+    results = []
+    print(f"{'benchmark':<32} {'best':>12} {'median':>12} {'peak mem':>12}")
+    for bench in benches:
+        result = measure(bench, repeat=args.repeat, min_time=args.min_time)
+        results.append(result)
+        print(
+            f"{result.name:<32} {result.best_seconds * 1e6:>10.1f}us "
+            f"{result.median_seconds * 1e6:>10.1f}us {result.peak_bytes / 1024:>10.1f}KB"
+        )
+
+    if args.save:
+        directory = os.path.dirname(args.save)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        save_results(results, args.save)
+
+    if args.compare:
+        regressions = compare(results, load_results(args.compare), args.tolerance)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression.name} ({regression.metric}): "
+                f"{regression.ratio:.2f}x baseline",
+                file=sys.stderr
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
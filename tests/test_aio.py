@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, NoReturn, Tuple
+
+import pytest
+
+from ziopy import aio
+from ziopy.aio import (AsyncZIO, ZIOMonadAsync, background_loop, from_coroutine, monadic_async,
+                       on_background_loop, unsafe_run_async)
+from ziopy.either import Left, Right
+from ziopy.instrumentation import MetricsCollector
+from ziopy.zio import ZIO, FiberInterruptedError, ZIOMonad, monadic, unsafe_run
+
+
+@dataclass(frozen=True)
+class Bippy(Exception):
+    pass
+
+
+@monadic_async
+async def _add(x: int, do: ZIOMonadAsync[int, NoReturn]) -> ZIO[int, NoReturn, int]:
+    await asyncio.sleep(0)
+    r = await (do << ZIO.access(lambda r: r))
+    return ZIO.succeed(x + r)
+
+
+@monadic_async
+async def _fail_after(
+    log: List[str],
+    do: ZIOMonadAsync[object, str]
+) -> ZIO[object, str, None]:
+    log.append("before")
+    await (do << ZIO.fail("oops"))
+    log.append("unreachable")
+    return ZIO.succeed(None)
+
+
+def test_monadic_async_with_unsafe_run() -> None:
+    assert unsafe_run(_add(1).provide(41)) == 42
+
+
+def test_monadic_async_with_unsafe_run_async() -> None:
+    assert asyncio.run(unsafe_run_async(_add(1).provide(41))) == 42
+
+
+def test_monadic_async_failure() -> None:
+    log: List[str] = []
+    assert unsafe_run(_fail_after(log).either()) == Left("oops")
+    assert asyncio.run(unsafe_run_async(_fail_after(log).either())) == Left("oops")
+    assert log == ["before", "before"]
+    with pytest.raises(Bippy):
+        asyncio.run(unsafe_run_async(ZIO.fail(Bippy())))
+
+
+def test_monadic_async_defect() -> None:
+    @monadic_async
+    async def _program(do: ZIOMonadAsync[object, NoReturn]) -> ZIO[object, NoReturn, None]:
+        raise Bippy()
+
+    with pytest.raises(Bippy):
+        unsafe_run(_program())
+    with pytest.raises(Bippy):
+        asyncio.run(unsafe_run_async(_program()))
+
+
+def test_nested_async_programs() -> None:
+    @monadic_async
+    async def _outer(do: ZIOMonadAsync[int, NoReturn]) -> ZIO[int, NoReturn, int]:
+        a = await (do << _add(1))
+        b = await (do << _add(2).map(lambda x: x * 10))
+        return ZIO.succeed(a + b)
+
+    assert unsafe_run(_outer().provide(1)) == 32
+    assert asyncio.run(unsafe_run_async(_outer().provide(1))) == 32
+
+
+def test_combinators_keep_programs_asynchronous() -> None:
+    program = _add(1)
+    for composed in [
+        program.map(str), program.flat_map(ZIO.succeed), program << ZIO.succeed(1),
+        program.catch(Bippy), program.either(), program.map_error(str),
+        aio.access_m(lambda _: program)
+    ]:
+        assert isinstance(composed, AsyncZIO)
+    assert isinstance(program.provide(1), AsyncZIO)
+    assert unsafe_run(aio.access_m(lambda r: _add(r)).map(str).provide(1)) == "2"
+    assert asyncio.run(unsafe_run_async(program.either().provide(1))) == Right(2)
+
+
+def _run_in_thread(run: threading.Thread) -> None:
+    run.start()
+    run.join(10)
+    assert not run.is_alive(), "deadlocked"
+
+
+def test_mapped_async_steps_with_unsafe_run() -> None:
+    @monadic_async
+    async def _program(do: ZIOMonadAsync[int, NoReturn]) -> ZIO[int, NoReturn, int]:
+        # Awaitables bound to the background loop, like the streams of the
+        # services, deadlock if a step blocks that loop's thread.
+        bound = from_coroutine(lambda: on_background_loop(lambda: asyncio.sleep(0.01)))
+        a = await (do << (bound << _add(1)).map(lambda x: x * 10))
+        # A plain ZIO that runs an asynchronous program synchronously blocks,
+        # so it has to be marked as such.
+        b = await (do << (ZIO.succeed(None) << bound << _add(2)).blocking())
+        return ZIO.succeed(a + b)
+
+    results: List[int] = []
+    _run_in_thread(threading.Thread(
+        target=lambda: results.append(unsafe_run(_program().provide(1))), daemon=True
+    ))
+    assert results == [23]
+
+
+def test_steps_do_not_block_the_event_loop() -> None:
+    @monadic_async
+    async def _program(do: ZIOMonadAsync[object, NoReturn]) -> ZIO[object, NoReturn, None]:
+        await (do << from_coroutine(lambda: asyncio.sleep(0.3)).map(lambda _: None))
+        await (do << ZIO.effect_total(lambda: time.sleep(0.3)).blocking())
+        await (do << ZIO.sleep(0.3))
+        return ZIO.succeed(None)
+
+    async def _main() -> float:
+        done = False
+        longest = 0.0
+
+        async def _tick() -> None:
+            nonlocal longest
+            last = time.monotonic()
+            while not done:
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                longest, last = max(longest, now - last), now
+
+        ticker = asyncio.ensure_future(_tick())
+        await asyncio.sleep(0.05)
+        await unsafe_run_async(_program())
+        done = True
+        await ticker
+        return longest
+
+    assert asyncio.run(_main()) < 0.2
+
+
+def test_async_inside_sync_monadic() -> None:
+    @monadic
+    def _program(do: ZIOMonad[int, NoReturn]) -> ZIO[int, NoReturn, int]:
+        return ZIO.succeed(do << _add(1))
+
+    assert unsafe_run(_program().provide(1)) == 2
+
+
+def test_only_blocking_steps_run_off_the_loop() -> None:
+    @monadic_async
+    async def _threads(
+        do: ZIOMonadAsync[object, NoReturn]
+    ) -> ZIO[object, NoReturn, Tuple[int, int, int]]:
+        inline = await (do << ZIO.effect_total(threading.get_ident).map(int))
+        blocking = await (do << ZIO.effect_total(threading.get_ident).blocking())
+        return ZIO.succeed((threading.get_ident(), inline, blocking))
+
+    async def _main() -> Tuple[int, Tuple[int, int, int]]:
+        loop_thread = threading.get_ident()
+        return loop_thread, await unsafe_run_async(_threads())
+
+    loop_thread, (body, inline, blocking) = asyncio.run(_main())
+    assert body == inline == loop_thread
+    assert blocking != loop_thread
+
+
+def test_unsafe_run_async_hooks() -> None:
+    collector = MetricsCollector()
+    program = ZIO.effect_total(lambda: 1, label="step")
+    assert asyncio.run(unsafe_run_async(program, hooks=collector)) == 1
+    assert collector.histogram("step").count == 1
+
+
+def test_async_zio_from_coroutine_function() -> None:
+    async def _run(r: int) -> Right[int]:
+        await asyncio.sleep(0)
+        return Right(r * 2)
+
+    assert unsafe_run(AsyncZIO(_run).provide(21)) == 42
+
+
+def test_background_loop_is_shared() -> None:
+    assert background_loop() is background_loop()
+    assert background_loop().is_running()
+
+
+def test_interrupting_a_fiber_cancels_the_coroutine() -> None:
+    started = threading.Event()
+    cancelled = threading.Event()
+
+    async def _run(_: object) -> Right[None]:
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return Right(None)  # pragma: nocover
+
+    fiber = unsafe_run(AsyncZIO(_run).fork())
+    assert started.wait(5)
+    unsafe_run(fiber.interrupt())
+    assert fiber.interrupted
+    assert cancelled.wait(5)
+    with pytest.raises(FiberInterruptedError):
+        unsafe_run(fiber.join())
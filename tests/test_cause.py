@@ -0,0 +1,118 @@
+import threading
+from dataclasses import dataclass
+from typing import NoReturn
+
+import pytest
+
+from ziopy.cause import Both, Die, Fail, Interrupt, Then, attached_cause
+from ziopy.either import Left
+from ziopy.zio import ZIO, unsafe_run
+
+
+@dataclass(frozen=True)
+class Bippy(Exception):
+    pass
+
+
+def _kaboom() -> NoReturn:
+    raise Bippy()
+
+
+def test_cause_accessors() -> None:
+    defect = Bippy()
+    cause = Then(Fail("a"), Both(Die(defect), Then(Interrupt(3), Fail("b"))))
+    assert cause.failures() == ["a", "b"]
+    assert cause.defects() == [defect]
+    assert cause.interruptions() == [3]
+    assert Fail("a").is_failure
+    assert not cause.is_failure
+    assert Fail("a").then(Die(defect)) == Then(Fail("a"), Die(defect))
+    assert Fail("a").both(Fail("b")) == Both(Fail("a"), Fail("b"))
+
+
+def test_pretty() -> None:
+    cause = Both(Fail("a"), Then(Interrupt(3), Die(ValueError("bad"))))
+    assert cause.pretty() == "\n".join([
+        "Both",
+        "├─ Fail: 'a'",
+        "└─ Then",
+        "   ├─ Interrupt: fiber #3",
+        "   └─ Die: ValueError: bad",
+    ])
+
+
+def test_pretty_formats_tracebacks_lazily() -> None:
+    try:
+        _kaboom()
+    except Bippy as e:
+        cause = Die(e)
+    assert "_kaboom" in cause.pretty()
+    assert "_kaboom" not in cause.pretty(tracebacks=False)
+
+
+def test_sandbox() -> None:
+    assert unsafe_run(ZIO.succeed(1).sandbox()) == 1
+    assert unsafe_run(ZIO.fail("a").sandbox().either()) == Left(Fail("a"))
+    result = unsafe_run(ZIO.effect_total(_kaboom).sandbox().either())
+    assert isinstance(result, Left)
+    assert isinstance(result.value, Die)
+    assert isinstance(result.value.exception, Bippy)
+
+
+def test_sandbox_interrupted_fiber() -> None:
+    started = threading.Event()
+    program = (ZIO.effect_total(started.set) << ZIO.sleep(60)).fork().flat_map(
+        lambda fiber: ZIO.effect_total(started.wait) << fiber.interrupt() << fiber.join()
+    )
+    result = unsafe_run(program.sandbox().either())
+    assert isinstance(result, Left)
+    assert isinstance(result.value, Interrupt)
+
+
+def test_unsandbox() -> None:
+    assert unsafe_run(ZIO.fail("a").sandbox().unsandbox().either()) == Left("a")
+    assert unsafe_run(ZIO.succeed(1).sandbox().unsandbox()) == 1
+    with pytest.raises(Bippy):
+        unsafe_run(ZIO.effect_total(_kaboom).sandbox().unsandbox())
+
+
+def test_unsandbox_keeps_the_whole_cause() -> None:
+    cause = Then(Die(Bippy()), Fail("a"))
+    result = ZIO.fail(cause).unsandbox()._run(None)
+    assert result == Left("a")
+    assert attached_cause(result) == cause
+
+
+def test_failing_finalizer_after_failure() -> None:
+    program = ZIO.fail("a").ensuring(ZIO.effect_total(_kaboom)).sandbox()
+    result = unsafe_run(program.either())
+    assert isinstance(result, Left)
+    assert isinstance(result.value, Then)
+    assert result.value.left == Fail("a")
+    assert isinstance(result.value.right, Die)
+
+
+def test_failing_finalizer_after_success() -> None:
+    program = ZIO.succeed(1).ensuring(ZIO.effect_total(_kaboom)).sandbox()
+    result = unsafe_run(program.either())
+    assert isinstance(result, Left)
+    assert isinstance(result.value, Die)
+
+
+def test_parallel_failures_are_all_reported() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+    program = ZIO.map_par_n(
+        (ZIO.effect_total(barrier.wait) << ZIO.fail("a")).uninterruptible(),
+        (ZIO.effect_total(barrier.wait) << ZIO.effect_total(_kaboom)).uninterruptible(),
+        lambda a, b: None
+    )
+    result = unsafe_run(program.sandbox().either())
+    assert isinstance(result, Left)
+    assert isinstance(result.value, Both)
+    assert result.value.failures() == ["a"]
+    assert [type(e) for e in result.value.defects()] == [Bippy]
+
+
+def test_interrupted_siblings_are_not_reported() -> None:
+    program = ZIO.map_par_n(ZIO.sleep(60), ZIO.fail("a"), lambda a, b: None)
+    assert unsafe_run(program.sandbox().either()) == Left(Fail("a"))
@@ -0,0 +1,173 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from ziopy import serializable
+from ziopy.cluster import (Cluster, ClusterError, WorkerLostError, format_address,
+                           parse_address)
+from ziopy.either import Left, Right
+from ziopy.zio import ZIO, unsafe_run
+
+_STARTUP_TIMEOUT = 30
+
+
+@serializable.function
+def _pid(delay: float = 0.0) -> int:
+    time.sleep(delay)
+    return os.getpid()
+
+
+@serializable.function
+def _divide(a: int, b: int) -> float:
+    return a / b
+
+
+@serializable.function
+def _crash() -> None:
+    os._exit(1)
+
+
+@serializable.function
+def _crash_once(marker: str) -> str:
+    if not os.path.exists(marker):
+        Path(marker).touch()
+        os._exit(1)
+    return "done"
+
+
+@serializable.function
+def _touch(marker: str) -> None:
+    Path(marker).touch()
+
+
+@serializable.function
+def _freeze() -> None:
+    os.kill(os.getpid(), signal.SIGSTOP)
+
+
+def _start(cluster: Cluster, workers: int) -> Cluster:
+    cluster.start_workers(workers)
+    assert cluster.wait_for_workers(workers, timeout=_STARTUP_TIMEOUT)
+    return cluster
+
+
+@pytest.fixture
+def cluster() -> Iterator[Cluster]:
+    with Cluster(heartbeat_interval=0.1, heartbeat_timeout=1.0) as cluster:
+        yield _start(cluster, 2)
+
+
+def test_addresses() -> None:
+    assert format_address(("127.0.0.1", 7000)) == "127.0.0.1:7000"
+    assert parse_address("127.0.0.1:7000") == ("127.0.0.1", 7000)
+    assert parse_address("/tmp/cluster.sock") == "/tmp/cluster.sock"
+
+
+def test_remote(cluster: Cluster) -> None:
+    assert unsafe_run(cluster.remote(serializable.effect(_pid))) != os.getpid()
+    assert unsafe_run(cluster.remote(serializable.effect(_divide, 1, 4))) == 0.25
+
+    result = unsafe_run(cluster.remote(serializable.effect(_divide, 1, 0)).either())
+    assert isinstance(result, Left) and isinstance(result.value, ZeroDivisionError)
+    assert unsafe_run(cluster.remote(serializable.fail("boom")).either()) == Left("boom")
+
+
+def test_remote_programs_run_in_parallel(cluster: Cluster) -> None:
+    remote_pid = cluster.remote(serializable.effect(_pid, 0.5))
+    start = time.monotonic()
+    pids = unsafe_run(ZIO.zip_par(remote_pid, remote_pid))
+    assert time.monotonic() - start < 1.0
+    assert len(set(pids)) == 2
+
+
+def test_remote_rejects_plain_zio(cluster: Cluster) -> None:
+    with pytest.raises(TypeError):
+        cluster.remote(ZIO.succeed(1))  # type: ignore
+
+
+def test_lost_worker_fails_the_program(cluster: Cluster) -> None:
+    result = unsafe_run(cluster.remote(serializable.effect_total(_crash)).either())
+    assert isinstance(result, Left) and isinstance(result.value, WorkerLostError)
+    assert cluster.workers == 1
+    assert unsafe_run(cluster.remote(serializable.succeed(1))) == 1
+
+
+def test_idempotent_programs_are_resubmitted(cluster: Cluster, tmp_path: Path) -> None:
+    program = serializable.effect_total(_crash_once, str(tmp_path / "marker"))
+    assert unsafe_run(cluster.remote(program, idempotent=True).either()) == Right("done")
+    assert cluster.resubmissions == 1
+    assert cluster.workers == 1
+
+
+def test_missed_heartbeats(cluster: Cluster) -> None:
+    start = time.monotonic()
+    result = unsafe_run(cluster.remote(serializable.effect_total(_freeze)).either())
+    assert isinstance(result, Left) and isinstance(result.value, WorkerLostError)
+    assert "heartbeats" in str(result.value)
+    assert 1.0 <= time.monotonic() - start < 5.0
+    assert cluster.workers == 1
+
+
+def test_unix_socket(tmp_path: Path) -> None:
+    with Cluster(address=str(tmp_path / "cluster.sock")) as cluster:
+        _start(cluster, 1)
+        assert unsafe_run(cluster.remote(serializable.effect(_divide, 3, 2))) == 1.5
+
+
+def test_closed_cluster() -> None:
+    cluster = Cluster()
+    program = cluster.remote(serializable.succeed(1))
+    cluster.close()
+    result = unsafe_run(program.either())
+    assert isinstance(result, Left) and isinstance(result.value, ClusterError)
+
+
+def test_pending_programs_fail_when_the_cluster_closes() -> None:
+    cluster = Cluster()
+    future = cluster.submit(serializable.dumps(serializable.succeed(1)))
+    cluster.close()
+    with pytest.raises(ClusterError):
+        future.result(timeout=5)
+
+
+def test_interrupted_programs_are_withdrawn_before_they_start(tmp_path: Path) -> None:
+    marker = str(tmp_path / "ran")
+    with Cluster() as cluster:
+        program = cluster.remote(serializable.effect(_touch, marker))
+        unsafe_run(program.fork().flat_map(
+            lambda fiber: ZIO.sleep(0.2).flat_map(lambda _: fiber.interrupt())
+        ))
+        _start(cluster, 1)
+        assert unsafe_run(cluster.remote(serializable.effect(_pid))) != os.getpid()
+    assert not os.path.exists(marker)
+
+
+def test_silent_peers_do_not_block_workers() -> None:
+    with Cluster(heartbeat_interval=0.1, heartbeat_timeout=1.0) as cluster:
+        address = cluster.address
+        assert not isinstance(address, str)
+        with socket.create_connection(address) as silent:
+            _start(cluster, 1)
+            assert unsafe_run(cluster.remote(serializable.effect(_pid))) != os.getpid()
+            # The cluster gives up on the silent peer after heartbeat_timeout.
+            silent.settimeout(_STARTUP_TIMEOUT)
+            while silent.recv(1024):
+                pass
+
+
+def test_workers_need_the_authkey() -> None:
+    with Cluster() as cluster:
+        env = dict(os.environ, ZIOPY_CLUSTER_AUTHKEY=b"wrong".hex())
+        worker = subprocess.run(
+            [sys.executable, "-m", "ziopy.cluster", format_address(cluster.address)],
+            env=env, capture_output=True, timeout=_STARTUP_TIMEOUT
+        )
+        assert worker.returncode != 0
+        assert cluster.workers == 0
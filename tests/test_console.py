@@ -1,4 +1,10 @@
-from typing import List, Union
+import asyncio
+import gc
+import io
+import os
+import tempfile
+import threading
+from typing import IO, Iterator, List, NoReturn, Tuple, Union
 from typing_extensions import Literal
 
 import pytest
@@ -8,8 +14,12 @@ import ziopy.services.console as console
 import ziopy.services.mock_effects.console as console_effect
 import ziopy.services.mock_effects.system as system_effect
 from ziopy.environments import ConsoleEnvironment, ConsoleSystemEnvironment
+from ziopy.aio import AsyncZIO, ZIOMonadAsync, monadic_async, unsafe_run_async
+from ziopy.either import Left, Right
 from ziopy.zio import ZIO, unsafe_run
-from ziopy.services.console import LiveConsole, MockConsole
+from ziopy.services.console import (
+    AsyncLiveConsole, BufferedLiveConsole, FlushPolicy, LiveConsole, MockConsole
+)
 from ziopy.services.system import MockSystem
 
 
@@ -69,6 +79,123 @@ def test_live_console_input_with_keyboard_interrupt() -> None:
     mock_input.assert_called_with("Prompt")
 
 
+def test_live_console_print_lines() -> None:
+    with patch('builtins.print', return_value=None) as mock_print:
+        program = console.print_lines(iter(["Hello", "World"]))
+        unsafe_run(program.provide(ConsoleEnvironment(LiveConsole())))
+    mock_print.assert_called_once_with("Hello\nWorld")
+
+
+def test_live_console_print_lines_empty() -> None:
+    with patch('builtins.print', return_value=None) as mock_print:
+        unsafe_run(console.print_lines([]).provide(ConsoleEnvironment(LiveConsole())))
+    mock_print.assert_not_called()
+
+
+def test_live_console_print_lines_blank() -> None:
+    with patch('builtins.print', return_value=None) as mock_print:
+        unsafe_run(console.print_lines([""]).provide(ConsoleEnvironment(LiveConsole())))
+    mock_print.assert_called_once_with("")
+
+
+def test_buffered_live_console_size_policy() -> None:
+    stream = io.StringIO()
+    buffered = BufferedLiveConsole(stream, FlushPolicy.SIZE, buffer_size=12)
+    env = ConsoleEnvironment(buffered)
+
+    unsafe_run(console.print("Hello").provide(env))
+    assert stream.getvalue() == ""
+
+    unsafe_run(console.print("World").provide(env))
+    assert stream.getvalue() == "Hello\nWorld\n"
+
+    unsafe_run(console.print_lines(["a", "b"]).provide(env))
+    assert stream.getvalue() == "Hello\nWorld\n"
+
+    unsafe_run(console.flush().provide(env))
+    assert stream.getvalue() == "Hello\nWorld\na\nb\n"
+
+
+def test_buffered_live_console_line_policy() -> None:
+    stream = io.StringIO()
+    buffered = BufferedLiveConsole(stream, FlushPolicy.LINE)
+    unsafe_run(console.print("Hello").provide(ConsoleEnvironment(buffered)))
+    assert stream.getvalue() == "Hello\n"
+
+
+def test_buffered_live_console_auto_policy() -> None:
+    class _Terminal(io.StringIO):
+        def isatty(self) -> bool:
+            return True
+
+    assert BufferedLiveConsole(io.StringIO()).flush_policy is FlushPolicy.SIZE
+    assert BufferedLiveConsole(_Terminal()).flush_policy is FlushPolicy.LINE
+
+
+def test_buffered_live_console_defaults_to_stdout() -> None:
+    buffered = BufferedLiveConsole(flush_policy=FlushPolicy.SIZE)
+    with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+        unsafe_run(buffered.print("Hello") << buffered.flush())
+    assert mock_stdout.getvalue() == "Hello\n"
+
+
+def test_buffered_live_console_flushes_before_input() -> None:
+    stream = io.StringIO()
+    buffered = BufferedLiveConsole(stream, FlushPolicy.SIZE)
+    env = ConsoleEnvironment(buffered)
+
+    def _input(prompt: str) -> str:
+        assert stream.getvalue() == "Question follows\n"
+        return "Answer"
+
+    with patch('builtins.input', side_effect=_input):
+        program = console.print("Question follows") << console.input("Prompt")
+        assert unsafe_run(program.provide(env)) == "Answer"
+
+
+def test_buffered_live_console_flushes_before_exit() -> None:
+    stream = io.StringIO()
+    buffered = BufferedLiveConsole(stream, FlushPolicy.SIZE)
+    program = console.get_input_from_console(
+        prompt="Prompt",
+        parse_value=ZIO.from_callable(str).map(int).catch(ValueError).either().to_callable(),
+        default_value=None
+    )
+    with patch('builtins.input', side_effect=EOFError):
+        with pytest.raises(SystemExit):
+            unsafe_run(
+                program.provide(ConsoleSystemEnvironment(console=buffered, system=MockSystem()))
+            )
+    assert stream.getvalue() == "\n"
+
+
+def test_buffered_live_console_flushes_when_collected() -> None:
+    stream = io.StringIO()
+
+    def _print() -> None:
+        buffered = BufferedLiveConsole(stream, FlushPolicy.SIZE)
+        unsafe_run(buffered.print("Hello"))
+        assert stream.getvalue() == ""
+
+    _print()
+    gc.collect()
+    assert stream.getvalue() == "Hello\n"
+
+
+def test_buffered_live_console_invalid_buffer_size() -> None:
+    with pytest.raises(ValueError):
+        BufferedLiveConsole(buffer_size=0)
+
+
+def test_mock_console_print_lines() -> None:
+    mock_console = MockConsole()
+    unsafe_run(console.print_lines(["Hello", "World"]).provide(ConsoleEnvironment(mock_console)))
+    assert mock_console.effects == [
+        console_effect.Print("Hello"),
+        console_effect.Print("World")
+    ]
+
+
 def test_mock_console_print() -> None:
     mock_console = MockConsole()
     output = unsafe_run(
@@ -82,6 +209,54 @@ def test_mock_console_print() -> None:
     ]
 
 
+def test_mock_console_input_queue() -> None:
+    mock_console = MockConsole(iter(["a", "b", "c"]))
+    env = ConsoleEnvironment(mock_console)
+    assert unsafe_run(console.input().provide(env)) == "a"
+    assert mock_console.user_input == ["b", "c"]
+    assert unsafe_run((console.input() << console.input()).provide(env)) == "c"
+    assert mock_console.user_input == []
+    with pytest.raises(IndexError):
+        unsafe_run(console.input().provide(env))
+
+
+def test_mock_console_many_inputs() -> None:
+    n = 200_000
+    mock_console = MockConsole(str(i) for i in range(n))
+    for _ in range(n):
+        mock_console.input("> ")
+    assert mock_console.user_input == []
+    assert mock_console.effect_count == n
+    assert mock_console.effects[-1] == console_effect.Input("> ", str(n - 1))
+
+
+def test_mock_console_effects_are_cached_until_next_effect() -> None:
+    mock_console = MockConsole()
+    mock_console.print("Hello")
+    effects = mock_console.effects
+    assert mock_console.effects is effects
+
+    mock_console.print("World")
+    assert mock_console.effects == [console_effect.Print("Hello"), console_effect.Print("World")]
+
+
+def test_mock_console_max_effects() -> None:
+    mock_console = MockConsole(["a", "b"], max_effects=2)
+    mock_console.print("Hello")
+    mock_console.input("first")
+    mock_console.print("World")
+    mock_console.input("second")
+
+    assert mock_console.effect_count == 2
+    assert mock_console.effects == [
+        console_effect.Print("World"),
+        console_effect.Input("second", "b")
+    ]
+
+    with pytest.raises(ValueError):
+        MockConsole(max_effects=-1)
+
+
 def test_get_input_from_console_1() -> None:
     program = console.get_input_from_console(
         prompt="How much wood would a woodchuck chuck?",
@@ -245,3 +420,116 @@ def test_ask(
     assert output == expected_output
     assert mock_console.user_input == []
     assert mock_system.effects == []
+
+
+StdinPipe = Tuple[AsyncLiveConsole, IO[bytes]]
+
+
+@pytest.fixture
+def stdin_pipe() -> Iterator[StdinPipe]:
+    read_fd, write_fd = os.pipe()
+    reader, writer = os.fdopen(read_fd, "rb"), os.fdopen(write_fd, "wb")
+    async_console = AsyncLiveConsole(reader)
+    yield async_console, writer
+    async_console.close()
+    reader.close()
+    writer.close()
+
+
+def test_async_live_console_input(stdin_pipe: StdinPipe) -> None:
+    async_console, writer = stdin_pipe
+    writer.write(b"hello\nw\xc3\xb6rld\r\nlast")
+    writer.close()
+    with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+        assert unsafe_run(async_console.input("> ")) == "hello"
+    assert stdout.getvalue() == "> "
+    assert unsafe_run(async_console.input()) == "w\u00f6rld"
+    assert unsafe_run(async_console.input()) == "last"
+    result = unsafe_run(async_console.input().either())
+    assert isinstance(result, Left)
+    assert isinstance(result.value, EOFError)
+
+
+def _write_line(writer: IO[bytes], line: bytes) -> None:
+    writer.write(line)
+    writer.flush()
+
+
+def test_async_live_console_input_in_monadic_async(stdin_pipe: StdinPipe) -> None:
+    async_console, writer = stdin_pipe
+
+    @monadic_async
+    async def _program(
+        do: ZIOMonadAsync[object, Union[EOFError, KeyboardInterrupt]]
+    ) -> ZIO[object, Union[EOFError, KeyboardInterrupt], List[str]]:
+        ticks = 0
+
+        async def _heartbeat() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        heartbeat = asyncio.ensure_future(_heartbeat())
+        threading.Timer(0.05, _write_line, (writer, b"a\n")).start()
+        line = await (do << async_console.input())
+        heartbeat.cancel()
+        return ZIO.succeed([line, ticks > 1])
+
+    line, heartbeat_ran = unsafe_run(_program())
+    assert line == "a"
+    assert heartbeat_ran
+
+    _write_line(writer, b"b\n")
+    assert asyncio.run(unsafe_run_async(async_console.input())) == "b"
+
+
+def test_async_live_console_input_is_interruptible(stdin_pipe: StdinPipe) -> None:
+    async_console, writer = stdin_pipe
+    fiber = unsafe_run(async_console.input().fork())
+    unsafe_run(fiber.interrupt())
+    assert fiber.interrupted
+
+    _write_line(writer, b"still readable\n")
+    assert unsafe_run(async_console.input()) == "still readable"
+
+
+def test_async_live_console_regular_file() -> None:
+    with tempfile.TemporaryFile() as f:
+        f.write(b"from a file\n")
+        f.seek(0)
+        async_console = AsyncLiveConsole(f)
+        assert unsafe_run(async_console.input()) == "from a file"
+        assert isinstance(unsafe_run(async_console.input().either()).value, EOFError)
+
+
+def test_async_live_console_get_input_from_console(stdin_pipe: StdinPipe) -> None:
+    async_console, writer = stdin_pipe
+    writer.write(b"nope\n42\n")
+    writer.close()
+    program = async_console.get_input_from_console(
+        prompt="n: ",
+        parse_value=lambda s: Right(int(s)) if s.isdigit() else Left(s),
+        default_value=None
+    )
+    with patch('sys.stdout', new_callable=io.StringIO):
+        assert unsafe_run(program.provide(MockSystem())) == 42
+
+
+def test_async_live_console_ask_in_monadic_async(stdin_pipe: StdinPipe) -> None:
+    async_console, writer = stdin_pipe
+    writer.write(b"maybe\ny\n")
+    writer.close()
+
+    @monadic_async
+    async def _ask(
+        do: ZIOMonadAsync[ConsoleSystemEnvironment, NoReturn]
+    ) -> ZIO[ConsoleSystemEnvironment, NoReturn, bool]:
+        return console.ask("Continue?", default="n")
+
+    env = ConsoleSystemEnvironment(console=async_console, system=MockSystem())
+    program = _ask().provide(env)
+    assert isinstance(async_console.ask("Continue?", default="n"), AsyncZIO)
+    with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+        assert asyncio.run(unsafe_run_async(program)) is True
+    assert stdout.getvalue() == "Continue? [y/N]: " * 2
@@ -1,4 +1,4 @@
-from typing import Callable, NoReturn, Type, TypeVar, Union
+from typing import Callable, Iterator, NoReturn, Type, TypeVar, Union
 
 import pytest
 
@@ -372,3 +372,41 @@ def test_to_union() -> None:
     # mypy should properly unify Union[NoReturn, X] for all types X.
     assert Either.left(42).to_union() + 1 == 43
     assert len(Either.right("hello").to_union()) == len("hello")
+
+
+def _parse_int(s: str) -> Either[str, int]:
+    return Either.right(int(s)) if s.isdigit() else Either.left(f"not a number: {s}")
+
+
+def test_either_traverse_success() -> None:
+    assert Either.traverse(["1", "2", "3"], _parse_int) == Right([1, 2, 3])
+    assert Either.traverse([], _parse_int) == Right([])
+
+
+def test_either_traverse_stops_at_first_failure() -> None:
+    consumed = []
+
+    def _inputs() -> Iterator[str]:
+        for s in ["1", "x", "y", "4"]:
+            consumed.append(s)
+            yield s
+
+    assert Either.traverse(_inputs(), _parse_int) == Left("not a number: x")
+    assert consumed == ["1", "x"]
+
+
+def test_either_traverse_large_generator() -> None:
+    result = Either.traverse((str(i) for i in range(100_000)), _parse_int)
+    assert result.map(len) == Right(100_000)
+
+
+def test_either_sequence() -> None:
+    assert Either.sequence([Right(1), Right(2)]) == Right([1, 2])
+    assert Either.sequence(iter([Right(1), Left("a"), Left("b")])) == Left("a")
+    assert Either.sequence([]) == Right([])
+
+
+def test_either_partition() -> None:
+    values = (Right(i) if i % 3 else Left(i) for i in range(7))
+    assert Either.partition(values) == ([0, 3, 6], [1, 2, 4, 5])
+    assert Either.partition([]) == ([], [])
@@ -0,0 +1,320 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, NoReturn
+
+import pytest
+
+from ziopy.either import Either, Left, Right
+from ziopy.instrumentation import MetricsCollector
+from ziopy.zio import (
+    ZIO, Fiber, FiberInterruptedError, ZIOMonad, monadic, unsafe_run
+)
+
+
+@dataclass(frozen=True)
+class Bippy(Exception):
+    pass
+
+
+def _kaboom() -> NoReturn:
+    raise Bippy()
+
+
+def _record(log: List[str], entry: str) -> ZIO[object, NoReturn, None]:
+    return ZIO.effect_total(lambda: log.append(entry))
+
+
+def _signal(event: threading.Event) -> ZIO[object, NoReturn, None]:
+    return ZIO.effect_total(event.set)
+
+
+def _wait_for_interrupt_request(fiber: Fiber) -> None:
+    while not fiber._interrupt_requested:
+        time.sleep(0.001)
+
+
+def test_fork_join_success() -> None:
+    program = ZIO.succeed(21).map(lambda x: x * 2).fork().flat_map(lambda f: f.join())
+    assert unsafe_run(program) == 42
+
+
+def test_fork_join_failure() -> None:
+    program = ZIO.fail("oops").fork().flat_map(lambda f: f.join())
+    assert unsafe_run(program.either()) == Left("oops")
+
+
+def test_fork_join_defect() -> None:
+    program = ZIO.effect_total(lambda: 1 // 0).fork().flat_map(lambda f: f.join())
+    with pytest.raises(ZeroDivisionError):
+        unsafe_run(program)
+
+
+def test_fork_does_not_block() -> None:
+    started = threading.Event()
+    release = threading.Event()
+    fiber = unsafe_run((_signal(started) << ZIO.effect_total(release.wait)).fork())
+    assert started.wait(5)
+    assert not fiber.done
+    release.set()
+    assert unsafe_run(fiber.join()) is True
+    assert fiber.done
+    assert not fiber.interrupted
+
+
+def test_interrupt_runs_finalizers_once_in_lifo_order() -> None:
+    log: List[str] = []
+    started = threading.Event()
+    program = (
+        (_signal(started) << ZIO.sleep(60))
+        .ensuring(_record(log, "inner"))
+        .ensuring(_record(log, "outer"))
+    )
+
+    fiber = unsafe_run(program.fork())
+    assert started.wait(5)
+    unsafe_run(fiber.interrupt())
+
+    assert log == ["inner", "outer"]
+    assert fiber.interrupted
+    with pytest.raises(FiberInterruptedError):
+        unsafe_run(fiber.join())
+
+    unsafe_run(fiber.interrupt())
+    assert log == ["inner", "outer"]
+
+
+def test_ensuring_runs_on_success_failure_and_defect() -> None:
+    log: List[str] = []
+    assert unsafe_run(ZIO.succeed(1).ensuring(_record(log, "a"))) == 1
+    assert unsafe_run(ZIO.fail("oops").ensuring(_record(log, "b")).either()) == Left("oops")
+    with pytest.raises(Bippy):
+        unsafe_run(ZIO.effect_total(_kaboom).ensuring(_record(log, "c")))
+    assert log == ["a", "b", "c"]
+
+
+def test_on_interrupt() -> None:
+    log: List[str] = []
+    assert unsafe_run(ZIO.succeed(1).on_interrupt(_record(log, "interrupted"))) == 1
+    assert log == []
+
+    started = threading.Event()
+    program = (_signal(started) << ZIO.sleep(60)).on_interrupt(_record(log, "interrupted"))
+    fiber = unsafe_run(program.fork())
+    assert started.wait(5)
+    unsafe_run(fiber.interrupt())
+    assert log == ["interrupted"]
+
+
+def test_uninterruptible_region_completes() -> None:
+    log: List[str] = []
+    started = threading.Event()
+    release = threading.Event()
+    region = (
+        _signal(started)
+        << ZIO.effect_total(release.wait)
+        << ZIO.sleep(0.01)
+        << _record(log, "region done")
+    ).uninterruptible()
+    program = region << _record(log, "after region")
+
+    fiber = unsafe_run(program.fork())
+    assert started.wait(5)
+    interrupter = threading.Thread(target=lambda: unsafe_run(fiber.interrupt()))
+    interrupter.start()
+    _wait_for_interrupt_request(fiber)
+    release.set()
+    interrupter.join(5)
+
+    assert log == ["region done"]
+    assert fiber.interrupted
+
+
+def test_interruptible_inside_uninterruptible() -> None:
+    log: List[str] = []
+    started = threading.Event()
+    program = (
+        (_signal(started) << ZIO.sleep(60)).interruptible()
+        << _record(log, "unreachable")
+    ).uninterruptible().ensuring(_record(log, "finalized"))
+
+    fiber = unsafe_run(program.fork())
+    assert started.wait(5)
+    unsafe_run(fiber.interrupt())
+    assert log == ["finalized"]
+
+
+def test_regions_outside_fibers() -> None:
+    assert unsafe_run(ZIO.succeed(1).uninterruptible().interruptible()) == 1
+
+
+def test_join_is_interruptible() -> None:
+    log: List[str] = []
+    release = threading.Event()
+
+    @monadic
+    def _parent(do: ZIOMonad[object, NoReturn]) -> ZIO[object, NoReturn, bool]:
+        blocker = do << ZIO.effect_total(release.wait).fork()
+        child = do << (blocker.join() << _record(log, "child ran")).fork()
+        do << child.interrupt()
+        release.set()
+        do << blocker.join()
+        return ZIO.succeed(child.interrupted)
+
+    assert unsafe_run(_parent()) is True
+    assert log == []
+
+
+def test_monadic_steps_are_checkpoints() -> None:
+    log: List[str] = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @monadic
+    def _loop(do: ZIOMonad[object, NoReturn]) -> ZIO[object, NoReturn, None]:
+        do << _signal(started)
+        do << ZIO.effect_total(release.wait)
+        do << _record(log, "unreachable")
+        return ZIO.succeed(None)
+
+    fiber = unsafe_run(_loop().fork())
+    assert started.wait(5)
+    interrupter = threading.Thread(target=lambda: unsafe_run(fiber.interrupt()))
+    interrupter.start()
+    _wait_for_interrupt_request(fiber)
+    release.set()
+    interrupter.join(5)
+    assert log == []
+    assert fiber.interrupted
+
+
+def test_sleep_outside_fiber() -> None:
+    assert unsafe_run(ZIO.sleep(0.001)) is None
+
+
+def test_sleep_inside_fiber() -> None:
+    assert unsafe_run(ZIO.sleep(0.001).fork().flat_map(lambda f: f.join())) is None
+
+
+def test_fibers_inherit_runtime_hooks() -> None:
+    collector = MetricsCollector()
+    program = ZIO.effect_total(lambda: 1, label="child").fork().flat_map(lambda f: f.join())
+    assert unsafe_run(program, hooks=collector) == 1
+    assert collector.histogram("child").count == 1
+
+
+def test_fiber_parent() -> None:
+    outer = unsafe_run(ZIO.succeed(None).fork().fork())
+    inner = unsafe_run(outer.join())
+    assert outer.parent is None
+    assert inner.parent is outer
+    assert repr(outer) == f"Fiber(id={outer.id})"
+
+
+def test_zip_par() -> None:
+    assert unsafe_run(ZIO.succeed(1).zip_par(ZIO.succeed("a"))) == (1, "a")
+    assert unsafe_run(ZIO.succeed(1).zip_par(ZIO.fail("oops")).either()) == Left("oops")
+
+
+def test_zip_par_runs_concurrently() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+    program = ZIO.effect_total(barrier.wait).zip_with_par(
+        ZIO.effect_total(barrier.wait), lambda a, b: {a, b}
+    )
+    assert unsafe_run(program) == {0, 1}
+
+
+def test_map_par_n() -> None:
+    program = ZIO.map_par_n(
+        ZIO.succeed(1), ZIO.succeed(2), ZIO.succeed(3), lambda a, b, c: a + b + c
+    )
+    assert unsafe_run(program) == 6
+
+
+def test_map_par_n_failure_interrupts_siblings() -> None:
+    log: List[str] = []
+    started = threading.Event()
+    slow = (_signal(started) << ZIO.sleep(60) << _record(log, "unreachable")).ensuring(
+        _record(log, "finalized")
+    )
+    failing = ZIO.effect_total(started.wait) << ZIO.fail("oops")
+    program = ZIO.map_par_n(slow, failing, ZIO.succeed(3), lambda a, b, c: None)
+
+    assert unsafe_run(program.either()) == Left("oops")
+    assert log == ["finalized"]
+
+
+def test_map_par_n_defect() -> None:
+    program = ZIO.map_par_n(
+        ZIO.sleep(60), ZIO.effect_total(_kaboom), lambda a, b: None
+    )
+    with pytest.raises(Bippy):
+        unsafe_run(program)
+
+
+def test_interrupting_zip_par_interrupts_children() -> None:
+    log: List[str] = []
+    started = threading.Barrier(3, timeout=5)
+
+    def _child(name: str) -> ZIO[object, NoReturn, None]:
+        return (ZIO.effect_total(started.wait) << ZIO.sleep(60)).ensuring(_record(log, name))
+
+    fiber = unsafe_run(_child("a").zip_par(_child("b")).fork())
+    started.wait()
+    unsafe_run(fiber.interrupt())
+    assert fiber.interrupted
+    assert sorted(log) == ["a", "b"]
+
+
+def test_effect_async_callback_from_another_thread() -> None:
+    def _register(callback: Callable[[Either[str, int]], None]) -> None:
+        threading.Timer(0.01, lambda: callback(Right(42))).start()
+
+    assert unsafe_run(ZIO.effect_async(_register)) == 42
+    assert unsafe_run(ZIO.effect_async(_register).fork().flat_map(lambda f: f.join())) == 42
+
+
+def test_effect_async_synchronous_callback_and_failure() -> None:
+    def _register(callback: Callable[[Either[str, int]], None]) -> None:
+        callback(Left("oops"))
+        callback(Right(1))
+
+    assert unsafe_run(ZIO.effect_async(_register).either()) == Left("oops")
+
+
+def test_effect_async_register_raises() -> None:
+    with pytest.raises(Bippy):
+        unsafe_run(ZIO.effect_async(lambda callback: _kaboom()))
+
+
+def test_effect_async_interrupt_runs_canceler() -> None:
+    log: List[str] = []
+    registered = threading.Event()
+    callbacks: List[Callable[[Either[NoReturn, int]], None]] = []
+
+    def _register(
+        callback: Callable[[Either[NoReturn, int]], None]
+    ) -> ZIO[object, NoReturn, None]:
+        callbacks.append(callback)
+        registered.set()
+        return _record(log, "cancelled")
+
+    fiber = unsafe_run(ZIO.effect_async_interrupt(_register).fork())
+    assert registered.wait(5)
+    unsafe_run(fiber.interrupt())
+    assert fiber.interrupted
+    assert log == ["cancelled"]
+    callbacks[0](Right(1))  # Late callbacks are ignored.
+
+
+def test_effect_async_interrupt_completed_without_cancel() -> None:
+    log: List[str] = []
+
+    def _register(
+        callback: Callable[[Either[NoReturn, int]], None]
+    ) -> ZIO[object, NoReturn, None]:
+        callback(Right(1))
+        return _record(log, "cancelled")
+
+    assert unsafe_run(ZIO.effect_async_interrupt(_register)) == 1
+    assert log == []
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+import ziopy.services.fs as fs
+import ziopy.services.mock_effects.fs as fs_effect
+from ziopy.aio import ZIOMonadAsync, monadic_async, unsafe_run_async
+from ziopy.either import Left
+from ziopy.environments import FileSystemEnvironment
+from ziopy.services.fs import FileStat, LiveFileSystem, MockFileSystem
+from ziopy.zenvironment import ZEnvironment
+from ziopy.zio import ZIO, unsafe_run
+
+
+@pytest.fixture
+def live() -> Iterator[FileSystemEnvironment]:
+    file_system = LiveFileSystem(max_workers=4)
+    yield FileSystemEnvironment(file_system)
+    file_system.close()
+
+
+def test_live_read_and_write(tmp_path: Path, live: FileSystemEnvironment) -> None:
+    path = tmp_path / "a.bin"
+    unsafe_run(fs.write_bytes(path, b"abc").provide(live))
+    assert unsafe_run(fs.read_bytes(str(path)).provide(live)) == b"abc"
+
+    info = unsafe_run(fs.stat(path).provide(live))
+    assert (info.size, info.is_dir) == (3, False)
+    assert unsafe_run(fs.stat(tmp_path).provide(live)).is_dir
+
+
+def test_live_errors_are_failures(tmp_path: Path, live: FileSystemEnvironment) -> None:
+    result = unsafe_run(fs.read_bytes(tmp_path / "missing").either().provide(live))
+    assert isinstance(result, Left) and isinstance(result.value, FileNotFoundError)
+    result = unsafe_run(fs.walk(tmp_path / "missing").either().provide(live))
+    assert isinstance(result, Left) and isinstance(result.value, FileNotFoundError)
+
+
+def test_live_bulk_operations(tmp_path: Path, live: FileSystemEnvironment) -> None:
+    files = {tmp_path / "d" / f"{i:04}.txt": str(i).encode() for i in range(500)}
+    (tmp_path / "d").mkdir()
+    unsafe_run(fs.write_many(files).provide(live))
+
+    paths = unsafe_run(fs.walk(tmp_path).provide(live))
+    assert paths == [str(path) for path in sorted(files)]
+    assert unsafe_run(fs.read_many(paths).provide(live)) == list(files.values())
+
+
+def test_live_read_many_fails_with_first_error(
+    tmp_path: Path,
+    live: FileSystemEnvironment
+) -> None:
+    (tmp_path / "ok").write_bytes(b"ok")
+    paths = [tmp_path / "ok", tmp_path / "missing", tmp_path / "ok"]
+    result = unsafe_run(fs.read_many(paths).either().provide(live))
+    assert isinstance(result, Left)
+    assert result.value.filename == str(tmp_path / "missing")
+    assert unsafe_run(fs.read_many([]).provide(live)) == []
+
+
+def test_live_parallelism_is_bounded(tmp_path: Path) -> None:
+    active: List[int] = [0, 0]
+    lock = threading.Lock()
+
+    def _slow_call() -> None:
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        threading.Event().wait(0.01)
+        with lock:
+            active[0] -= 1
+
+    file_system = LiveFileSystem(max_workers=2)
+    unsafe_run(file_system._in_pool([_slow_call] * 40, len))
+    file_system.close()
+    assert active[1] <= 2
+
+
+def test_live_reads_are_awaited_in_monadic_async(
+    tmp_path: Path,
+    live: FileSystemEnvironment
+) -> None:
+    (tmp_path / "x").write_bytes(b"x")
+
+    @monadic_async
+    async def _read(
+        do: ZIOMonadAsync[FileSystemEnvironment, OSError]
+    ) -> ZIO[FileSystemEnvironment, OSError, List[bytes]]:
+        return fs.read_many([tmp_path / "x"] * 3)
+
+    assert asyncio.run(unsafe_run_async(_read().provide(live))) == [b"x"] * 3
+
+
+def test_mock_file_system() -> None:
+    mock = MockFileSystem({"/data/a": b"a"})
+    env = FileSystemEnvironment(mock)
+
+    unsafe_run(fs.write_many({"/data/sub/b": b"bb"}).provide(env))
+    assert unsafe_run(fs.walk("/data").provide(env)) == ["/data/a", "/data/sub/b"]
+    assert unsafe_run(fs.read_many(["/data/a", "/data/sub/b"]).provide(env)) == [b"a", b"bb"]
+    assert unsafe_run(fs.stat("/data/sub/b").provide(env)) == FileStat(2, 2.0, False)
+    assert unsafe_run(fs.stat("/data/sub").provide(env)).is_dir
+
+    missing = unsafe_run(fs.read_bytes("/nope").either().provide(env))
+    assert isinstance(missing, Left) and isinstance(missing.value, FileNotFoundError)
+
+    assert mock.effects == [
+        fs_effect.WriteBytes("/data/sub/b", b"bb"),
+        fs_effect.Walk("/data"),
+        fs_effect.ReadBytes("/data/a"),
+        fs_effect.ReadBytes("/data/sub/b"),
+        fs_effect.Stat("/data/sub/b"),
+        fs_effect.Stat("/data/sub"),
+        fs_effect.ReadBytes("/nope"),
+    ]
+    assert mock.files == {"/data/a": b"a", "/data/sub/b": b"bb"}
+
+
+def test_accessors_with_z_environment() -> None:
+    env = ZEnvironment.of(MockFileSystem({"/data/a": b"a"}))
+    assert unsafe_run(fs.read_bytes("/data/a").provide(env)) == b"a"
+    assert unsafe_run(fs.read_many(["/data/a"]).provide(env)) == [b"a"]
+
+
+def test_mock_file_system_reads_its_writes() -> None:
+    mock = MockFileSystem({"/data/a": b"1"})
+    read = mock.read_bytes("/data/b")
+    stale = mock.read_bytes("/data/a")
+    program = mock.write_bytes("/data/b", b"b") << mock.write_bytes("/data/a", b"2") << read
+    assert unsafe_run(program) == b"b"
+    assert unsafe_run(stale) == b"2"
+    assert unsafe_run(mock.stat("/data/b")).size == 1
+    assert mock.effects[:3] == [
+        fs_effect.WriteBytes("/data/b", b"b"),
+        fs_effect.WriteBytes("/data/a", b"2"),
+        fs_effect.ReadBytes("/data/b"),
+    ]
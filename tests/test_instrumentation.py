@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import pytest
+
+from ziopy.instrumentation import LatencyHistogram, MetricsCollector, RuntimeHooks
+from ziopy.zio import ZIO, unsafe_run
+
+
+@dataclass(frozen=True)
+class Bippy(Exception):
+    pass
+
+
+class RecordingHooks(RuntimeHooks):
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, object]] = []
+
+    def on_effect_start(self, label: str) -> None:
+        self.events.append(("start", label))
+
+    def on_effect_end(self, label: str, elapsed_ns: int) -> None:
+        assert elapsed_ns >= 0
+        self.events.append(("end", label))
+
+    def on_failure(self, label: str, error: object) -> None:
+        self.events.append(("failure", label))
+
+    def on_catch(self, exception: BaseException) -> None:
+        self.events.append(("catch", exception))
+
+
+def test_no_hooks_are_called_without_installation() -> None:
+    hooks = RecordingHooks()
+    assert unsafe_run(ZIO.effect_total(lambda: 42, label="answer")) == 42
+    assert hooks.events == []
+
+
+def test_effect_hooks() -> None:
+    hooks = RecordingHooks()
+    program = ZIO.effect_total(lambda: 1, label="one").flat_map(
+        lambda x: ZIO.effect_total(lambda: x + 1, label="two")
+    )
+    assert unsafe_run(program, hooks=hooks) == 2
+    assert hooks.events == [
+        ("start", "one"), ("end", "one"), ("start", "two"), ("end", "two")
+    ]
+
+
+def test_effect_default_label() -> None:
+    def fetch_user() -> str:
+        return "bob"
+
+    hooks = RecordingHooks()
+    unsafe_run(ZIO.effect(fetch_user), hooks=hooks)
+    assert hooks.events[0] == ("start", fetch_user.__qualname__)
+
+
+def test_effect_failure_and_catch_hooks() -> None:
+    def _kaboom() -> int:
+        raise Bippy()
+
+    hooks = RecordingHooks()
+    program = ZIO.effect_catch(_kaboom, Bippy, label="kaboom").either()
+    unsafe_run(program, hooks=hooks)
+    assert hooks.events == [
+        ("start", "kaboom"), ("failure", "kaboom"), ("end", "kaboom"), ("catch", Bippy())
+    ]
+
+
+def test_labeled_hooks() -> None:
+    hooks = RecordingHooks()
+    program = ZIO.succeed(1).labeled("ok") << ZIO.fail("oops").labeled("bad")
+    with pytest.raises(Exception):
+        unsafe_run(program, hooks=hooks)
+    assert hooks.events == [
+        ("start", "ok"), ("end", "ok"),
+        ("start", "bad"), ("end", "bad"), ("failure", "bad"),
+        ("failure", "unsafe_run")
+    ]
+
+
+def test_labeled_without_hooks() -> None:
+    assert unsafe_run(ZIO.succeed(1).labeled("ok")) == 1
+
+
+def test_metrics_collector() -> None:
+    collector = MetricsCollector()
+    program = (
+        ZIO.effect_total(lambda: 1, label="step") << ZIO.effect_total(lambda: 2, label="step")
+    ).labeled("outer")
+    failing = ZIO.fail("oops").labeled("bad").either()
+
+    assert unsafe_run(program, hooks=collector) == 2
+    unsafe_run(failing, hooks=collector)
+    unsafe_run(ZIO.effect(lambda: 1 // 0).either(), hooks=collector)
+
+    assert collector.steps == 5
+    assert collector.catches == 1
+    assert collector.histogram("step").count == 2
+    assert collector.histogram("outer").count == 1
+    assert collector.failures("bad") == 1
+    assert collector.failures("outer") == 0
+    assert "step" in collector.labels
+    with pytest.raises(KeyError):
+        collector.histogram("nonexistent")
+
+
+def test_latency_histogram_empty() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.count == 0
+    assert histogram.mean is None
+    assert histogram.min is None
+    assert histogram.max is None
+    assert histogram.percentile(50) is None
+    assert list(histogram.buckets()) == []
+
+
+def test_latency_histogram_small_values_are_exact() -> None:
+    histogram = LatencyHistogram(precision_bits=4)
+    for value in range(16):
+        histogram.record(value)
+    assert list(histogram.buckets()) == [(value, 1) for value in range(16)]
+    assert histogram.percentile(50) == 7
+    assert histogram.percentile(100) == 15
+    assert histogram.percentile(0) == 0
+
+
+def test_latency_histogram_relative_error() -> None:
+    histogram = LatencyHistogram(precision_bits=5)
+    for value in [1000, 2000, 3000, 1_000_000]:
+        histogram.record(value)
+
+    assert histogram.count == 4
+    assert histogram.total == 1_006_000
+    assert histogram.mean == 251_500
+    assert histogram.min == 1000
+    assert histogram.max == 1_000_000
+    for p, expected in [(25, 1000), (50, 2000), (75, 3000), (100, 1_000_000)]:
+        actual = histogram.percentile(p)
+        assert actual is not None
+        assert abs(actual - expected) / expected <= 1 / 16
+
+    lower_bounds = [bound for bound, _ in histogram.buckets()]
+    assert lower_bounds == sorted(lower_bounds)
+
+
+def test_latency_histogram_invalid_arguments() -> None:
+    with pytest.raises(ValueError):
+        LatencyHistogram(precision_bits=0)
+    with pytest.raises(ValueError):
+        LatencyHistogram().record(-1)
+    with pytest.raises(ValueError):
+        LatencyHistogram().percentile(101)
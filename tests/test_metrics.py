@@ -0,0 +1,179 @@
+import threading
+
+import pytest
+
+import ziopy.services.metrics as metrics
+import ziopy.services.mock_effects.metrics as metrics_effect
+from ziopy import tracing
+from ziopy.environments import MetricsEnvironment
+from ziopy.instrumentation import MetricsCollector
+from ziopy.services.metrics import LiveMetrics, MockMetrics
+from ziopy.zio import ZIO, unsafe_run
+
+
+def test_live_counter_without_running() -> None:
+    live = LiveMetrics()
+    metrics.increment("requests_total").provide(MetricsEnvironment(live))
+    assert "requests_total" not in live.render_prometheus()
+
+
+def test_live_counter() -> None:
+    live = LiveMetrics()
+    program = (
+        metrics.increment("requests_total")
+        << metrics.increment("requests_total")
+        << metrics.increment("requests_total", 2.5)
+    )
+    unsafe_run(program.provide(MetricsEnvironment(live)))
+    assert live.counter_value("requests_total") == 4.5
+
+
+def test_live_counter_reuses_increment_effect() -> None:
+    counter = LiveMetrics().counter("requests_total")
+    assert counter.increment() is counter.increment()
+
+
+def test_live_counter_rejects_negative_increments() -> None:
+    with pytest.raises(ValueError):
+        unsafe_run(LiveMetrics().counter("requests_total").increment(-1))
+
+
+def test_updates_are_reported_to_runtime_hooks() -> None:
+    live = LiveMetrics()
+    collector = MetricsCollector()
+    program = (
+        live.counter("requests_total").increment(2)
+        << live.gauge("temperature").set(1.5)
+        << live.histogram("latency_seconds").observe(0.25)
+    )
+    unsafe_run(program, hooks=collector)
+    assert collector.labels == ["latency_seconds", "requests_total", "temperature"]
+    assert live.counter_value("requests_total") == 2
+
+
+def test_traced_updates() -> None:
+    live = LiveMetrics()
+    with tracing.tracing():
+        program = live.gauge("temperature").set(1.5)
+    unsafe_run(program)
+    assert live.gauge_value("temperature") == 1.5
+
+
+def test_live_gauge() -> None:
+    live = LiveMetrics()
+    program = metrics.set_gauge("temperature", 3) << metrics.set_gauge("temperature", 1.5)
+    unsafe_run(program.provide(MetricsEnvironment(live)))
+    assert live.gauge_value("temperature") == 1.5
+
+
+def test_live_counter_is_thread_safe() -> None:
+    live = LiveMetrics(stripes=2)
+    increment = live.counter("hits").increment()
+
+    def _worker() -> None:
+        for _ in range(1000):
+            unsafe_run(increment)
+
+    threads = [threading.Thread(target=_worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert live.counter_value("hits") == 8000
+
+
+def test_live_timer() -> None:
+    live = LiveMetrics()
+    program = metrics.timer("latency_seconds", ZIO.succeed(42))
+    assert unsafe_run(program.provide(MetricsEnvironment(live))) == 42
+    assert "latency_seconds_count 1" in live.render_prometheus()
+
+
+def test_live_timer_records_failures() -> None:
+    live = LiveMetrics()
+    program = live.timer("latency_seconds", ZIO.fail("oops")).either()
+    unsafe_run(program)
+    raising = live.timer("latency_seconds", ZIO.effect_total(lambda: 1 // 0))
+    unsafe_run(raising.catch(ZeroDivisionError).either())
+    assert "latency_seconds_count 2" in live.render_prometheus()
+
+
+def test_render_prometheus() -> None:
+    live = LiveMetrics()
+    live.counter("requests_total", help="Total requests.\nAll of them.")
+    live.gauge("temperature")
+    histogram = live.histogram("latency_seconds", buckets=[1, 0.5])
+    program = (
+        live.counter("requests_total").increment(3)
+        << live.gauge("temperature").set(-2.25)
+        << histogram.observe(0.25)
+        << histogram.observe(0.5)
+        << histogram.observe(0.75)
+        << histogram.observe(10)
+        << metrics.render_prometheus().provide(MetricsEnvironment(live))
+    )
+    assert unsafe_run(program) == (
+        "# HELP requests_total Total requests.\\nAll of them.\n"
+        "# TYPE requests_total counter\n"
+        "requests_total 3\n"
+        "# TYPE temperature gauge\n"
+        "temperature -2.25\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.5"} 2\n'
+        'latency_seconds_bucket{le="1"} 3\n'
+        'latency_seconds_bucket{le="+Inf"} 4\n'
+        "latency_seconds_sum 11.5\n"
+        "latency_seconds_count 4\n"
+    )
+
+
+def test_render_prometheus_special_values() -> None:
+    live = LiveMetrics()
+    unsafe_run(
+        live.gauge("nan").set(float("nan"))
+        << live.gauge("infinite").set(float("inf"))
+        << live.gauge("negative_infinite").set(float("-inf"))
+    )
+    assert live.render_prometheus().splitlines()[1::2] == [
+        "infinite +Inf", "nan NaN", "negative_infinite -Inf"
+    ]
+
+
+def test_metric_names_are_validated() -> None:
+    live = LiveMetrics()
+    live.counter("requests_total")
+    assert live.counter("requests_total") is live.counter("requests_total")
+    assert live.gauge("temperature") is live.gauge("temperature")
+    assert live.histogram("latency") is live.histogram("latency")
+
+    with pytest.raises(ValueError):
+        live.gauge("requests_total")
+    with pytest.raises(ValueError):
+        live.counter("not a valid name")
+    with pytest.raises(ValueError):
+        live.histogram("empty", buckets=[])
+    with pytest.raises(ValueError):
+        LiveMetrics(stripes=0)
+
+
+def test_mock_metrics() -> None:
+    mock_metrics = MockMetrics()
+    program = (
+        metrics.increment("requests_total")
+        << metrics.set_gauge("temperature", 20)
+        << metrics.observe("latency_seconds", 0.1)
+        << metrics.observe("latency_seconds", 0.2)
+        << metrics.increment("requests_total")
+    )
+    unsafe_run(program.provide(MetricsEnvironment(mock_metrics)))
+
+    assert mock_metrics.effects == [
+        metrics_effect.Increment("requests_total", 1),
+        metrics_effect.Set("temperature", 20),
+        metrics_effect.Observe("latency_seconds", 0.1),
+        metrics_effect.Observe("latency_seconds", 0.2),
+        metrics_effect.Increment("requests_total", 1),
+    ]
+    assert mock_metrics.counter_value("requests_total") == 2
+    assert mock_metrics.gauge_value("temperature") == 20
+    assert mock_metrics.observations("latency_seconds") == [0.1, 0.2]
@@ -0,0 +1,199 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Iterator, List
+
+import pytest
+
+import ziopy.services.mock_effects.net as net_effect
+import ziopy.services.net as net
+from ziopy.aio import ZIOMonadAsync, monadic_async, unsafe_run_async
+from ziopy.either import Left
+from ziopy.environments import NetEnvironment
+from ziopy.services.net import (Connection, ConnectionClosedError, ConnectionPool, LiveNet,
+                                LoopbackEchoServer, MockNet, PoolStats)
+from ziopy.zio import ZIO, unsafe_run
+
+
+@pytest.fixture
+def echo_server() -> Iterator[LoopbackEchoServer]:
+    with LoopbackEchoServer() as server:
+        yield server
+
+
+def _echo(payload: bytes) -> Callable[[Connection], ZIO[object, OSError, bytes]]:
+    def _use(connection: Connection) -> ZIO[object, OSError, bytes]:
+        return connection.send_all(payload) << connection.recv_exactly(len(payload))
+    return _use
+
+
+def test_connect_send_and_receive(echo_server: LoopbackEchoServer) -> None:
+    host, port = echo_server.address
+    env = NetEnvironment(LiveNet())
+    connection = unsafe_run(net.connect(host, port, timeout=5).provide(env))
+    assert connection.address == (host, port)
+    assert unsafe_run(_echo(b"hello")(connection)) == b"hello"
+    unsafe_run(connection.close())
+    assert connection.closed
+
+
+def test_recv_exactly_fails_when_the_peer_closes(echo_server: LoopbackEchoServer) -> None:
+    connection = unsafe_run(LiveNet().connect(*echo_server.address))
+    unsafe_run(connection.send_all(b"abc"))
+    assert unsafe_run(connection.recv_exactly(3)) == b"abc"
+    echo_server.disconnect_clients()
+    result = unsafe_run(connection.recv_exactly(1).either())
+    assert isinstance(result, Left)
+    assert isinstance(result.value, ConnectionClosedError)
+    assert result.value.partial == b""
+    unsafe_run(connection.close())
+
+
+def test_connect_failure(echo_server: LoopbackEchoServer) -> None:
+    host, port = echo_server.address
+    echo_server.close()
+    result = unsafe_run(LiveNet().connect(host, port).either())
+    assert isinstance(result, Left) and isinstance(result.value, ConnectionRefusedError)
+
+
+def test_pool_reuses_connections(echo_server: LoopbackEchoServer) -> None:
+    host, port = echo_server.address
+    pool = ConnectionPool(LiveNet())
+    for i in range(5):
+        payload = str(i).encode()
+        assert unsafe_run(pool.with_connection(host, port, _echo(payload))) == payload
+    assert echo_server.connections_accepted == 1
+    assert pool.stats(host, port) == PoolStats(idle=1, in_use=0)
+    unsafe_run(pool.close())
+    assert pool.stats(host, port) == PoolStats(idle=0, in_use=0)
+
+
+def test_pool_limits_connections_per_host(echo_server: LoopbackEchoServer) -> None:
+    host, port = echo_server.address
+    pool = ConnectionPool(LiveNet(), max_per_host=2)
+    in_use: List[int] = []
+
+    def _use(connection: Connection) -> ZIO[object, OSError, bytes]:
+        in_use.append(pool.stats(host, port).in_use)
+        return ZIO.sleep(0.02) << _echo(b"x")(connection)
+
+    program = ZIO.map_par_n(
+        *[pool.with_connection(host, port, _use) for _ in range(6)],
+        lambda *replies: list(replies)
+    )
+    assert unsafe_run(program) == [b"x"] * 6
+    assert max(in_use) <= 2
+    assert echo_server.connections_accepted == 2
+    unsafe_run(pool.close())
+
+
+def test_pool_evicts_idle_and_broken_connections(echo_server: LoopbackEchoServer) -> None:
+    host, port = echo_server.address
+    pool = ConnectionPool(LiveNet(), idle_timeout=0.05)
+    unsafe_run(pool.with_connection(host, port, _echo(b"a")))
+    time.sleep(0.1)
+    unsafe_run(pool.with_connection(host, port, _echo(b"b")))
+    assert echo_server.connections_accepted == 2
+
+    # A connection the server has closed is not handed out again.
+    echo_server.disconnect_clients()
+    time.sleep(0.05)
+    assert unsafe_run(pool.with_connection(host, port, _echo(b"c"))) == b"c"
+    assert echo_server.connections_accepted == 3
+    unsafe_run(pool.close())
+
+
+def test_pool_evicts_idle_connections_without_further_requests() -> None:
+    mock = MockNet(handler=lambda data: data)
+    pool = ConnectionPool(mock, idle_timeout=0.05)
+    unsafe_run(pool.with_connection("a", 1, _echo(b"a")))
+    unsafe_run(pool.with_connection("b", 2, _echo(b"b")))
+    assert pool.stats("a", 1) == PoolStats(idle=1, in_use=0)
+
+    deadline = time.monotonic() + 5
+    while net_effect.Close(("b", 2)) not in mock.effects and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert net_effect.Close(("a", 1)) in mock.effects
+    assert net_effect.Close(("b", 2)) in mock.effects
+    assert pool.stats("a", 1) == pool.stats("b", 2) == PoolStats(idle=0, in_use=0)
+    unsafe_run(pool.close())
+
+
+def test_pool_closes_connections_of_failed_programs(echo_server: LoopbackEchoServer) -> None:
+    host, port = echo_server.address
+    pool = ConnectionPool(LiveNet())
+    result = unsafe_run(
+        pool.with_connection(host, port, lambda connection: ZIO.fail("oops")).either()
+    )
+    assert result == Left("oops")
+    assert pool.stats(host, port) == PoolStats(idle=0, in_use=0)
+
+    unsafe_run(pool.close())
+    closed = unsafe_run(pool.with_connection(host, port, _echo(b"x")).either())
+    assert isinstance(closed, Left) and isinstance(closed.value, ConnectionAbortedError)
+
+
+def test_pool_in_monadic_async(echo_server: LoopbackEchoServer) -> None:
+    host, port = echo_server.address
+    pool = ConnectionPool(LiveNet())
+
+    @monadic_async
+    async def _twice(do: ZIOMonadAsync[object, OSError]) -> ZIO[object, OSError, bytes]:
+        first = await (do << pool.with_connection(host, port, _echo(b"1")))
+        second = await (do << pool.with_connection(host, port, _echo(b"2")))
+        return ZIO.succeed(first + second)
+
+    assert asyncio.run(unsafe_run_async(_twice())) == b"12"
+    assert echo_server.connections_accepted == 1
+    unsafe_run(pool.close())
+
+
+def test_documented_example_in_monadic_async_with_unsafe_run(
+    echo_server: LoopbackEchoServer
+) -> None:
+    host, port = echo_server.address
+    pool = ConnectionPool(LiveNet(), max_per_host=4, idle_timeout=30.0)
+
+    @monadic_async
+    async def _ping(do: ZIOMonadAsync[NetEnvironment, OSError]) -> ZIO[object, OSError, bytes]:
+        reply = await (do << pool.with_connection(host, port, lambda connection: (
+            connection.send_all(b"ping") << connection.recv_exactly(4)
+        )))
+        connection = await (do << net.connect(host, port, timeout=5))
+        await (do << connection.send_all(b"pong"))
+        reply += await (do << connection.recv_exactly(4))
+        await (do << connection.close())
+        return ZIO.succeed(reply)
+
+    replies: List[bytes] = []
+    program = _ping().provide(NetEnvironment(LiveNet()))
+    # Run it on a thread of its own, so that a deadlock fails the test.
+    thread = threading.Thread(target=lambda: replies.append(unsafe_run(program)), daemon=True)
+    thread.start()
+    thread.join(10)
+    assert replies == [b"pingpong"]
+    unsafe_run(pool.close())
+
+
+def test_mock_net() -> None:
+    mock = MockNet(handler=lambda data: data.upper())
+    pool = ConnectionPool(mock)
+    assert unsafe_run(pool.with_connection("db", 5432, _echo(b"hi"))) == b"HI"
+    assert unsafe_run(pool.with_connection("db", 5432, _echo(b"yo"))) == b"YO"
+
+    connection = unsafe_run(net.connect("db", 5432).provide(NetEnvironment(mock)))
+    short = unsafe_run(connection.recv_exactly(1).either())
+    assert isinstance(short, Left) and isinstance(short.value, ConnectionClosedError)
+    unsafe_run(pool.close())
+
+    address = ("db", 5432)
+    assert mock.effects == [
+        net_effect.Connect(address),
+        net_effect.Send(address, b"hi"),
+        net_effect.Receive(address, 2),
+        net_effect.Send(address, b"yo"),
+        net_effect.Receive(address, 2),
+        net_effect.Connect(address),
+        net_effect.Receive(address, 1),
+        net_effect.Close(address),
+    ]
@@ -0,0 +1,97 @@
+import asyncio
+import concurrent.futures
+import os
+from typing import Iterator
+
+import pytest
+
+from ziopy import parallel
+from ziopy.aio import ZIOMonadAsync, monadic_async, unsafe_run_async
+from ziopy.either import Left, Right
+from ziopy.parallel import BackendUnavailableError
+from ziopy.zio import ZIO, unsafe_run
+
+_HAS_SUBINTERPRETERS = hasattr(concurrent.futures, "InterpreterPoolExecutor")
+
+
+def _square(n: int) -> int:
+    return n * n
+
+
+def _pid(_: object) -> int:
+    return os.getpid()
+
+
+def _fail_on_three(n: int) -> int:
+    if n == 3:
+        raise ValueError("three")
+    return n
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _shutdown_executors() -> Iterator[None]:
+    yield
+    parallel.shutdown()
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_traverse_par(backend: parallel.Backend) -> None:
+    program = parallel.traverse_par(range(100), _square, backend=backend)
+    assert unsafe_run(program) == [n * n for n in range(100)]
+    assert unsafe_run(parallel.traverse_par([], _square, backend=backend)) == []
+
+
+def test_process_backend_runs_in_other_processes() -> None:
+    pids = unsafe_run(parallel.traverse_par(range(8), _pid, backend="process", chunk_size=1))
+    assert os.getpid() not in pids
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_exceptions_become_failures(backend: parallel.Backend) -> None:
+    result = unsafe_run(
+        parallel.traverse_par(range(10), _fail_on_three, backend=backend).either()
+    )
+    assert isinstance(result, Left)
+    assert isinstance(result.value, ValueError)
+
+
+def test_programs_outlive_shutdown() -> None:
+    program = parallel.traverse_par(range(10), _square)
+    assert unsafe_run(program) == [n * n for n in range(10)]
+    parallel.shutdown()
+    assert unsafe_run(program) == [n * n for n in range(10)]
+    assert unsafe_run(parallel.effect(_square, 3).either()) == Right(9)
+
+
+def test_effect_can_be_forked() -> None:
+    program = parallel.effect(_square, 7, backend="process").fork().flat_map(
+        lambda fiber: fiber.join()
+    )
+    assert unsafe_run(program) == 49
+
+
+def test_traverse_par_in_monadic_async() -> None:
+    @monadic_async
+    async def _sum(do: ZIOMonadAsync[object, Exception]) -> ZIO[object, Exception, int]:
+        squares = await (do << parallel.traverse_par(range(5), _square))
+        return ZIO.succeed(sum(squares))
+
+    assert asyncio.run(unsafe_run_async(_sum())) == 30
+
+
+@pytest.mark.skipif(_HAS_SUBINTERPRETERS, reason="subinterpreters are supported")
+def test_subinterpreter_backend_unavailable() -> None:
+    program = parallel.traverse_par(range(3), _square, backend="subinterpreter")
+    with pytest.raises(BackendUnavailableError, match="3.14"):
+        unsafe_run(program)
+
+
+@pytest.mark.skipif(not _HAS_SUBINTERPRETERS, reason="needs Python 3.14+")
+def test_subinterpreter_backend() -> None:  # pragma: nocover
+    program = parallel.traverse_par(range(10), _square, backend="subinterpreter")
+    assert unsafe_run(program) == [n * n for n in range(10)]
+
+
+def test_unknown_backend() -> None:
+    with pytest.raises(ValueError):
+        parallel.effect(_square, 1, backend="gpu")  # type: ignore
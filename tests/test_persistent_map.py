@@ -0,0 +1,104 @@
+import random
+from dataclasses import dataclass
+from typing import Dict
+
+import pytest
+
+from ziopy.persistent_map import PersistentMap
+
+
+@dataclass(frozen=True)
+class Colliding:
+    """Keys that all share the same hash."""
+    name: str
+
+    def __hash__(self) -> int:
+        return 42
+
+
+def test_empty() -> None:
+    m: PersistentMap[str, int] = PersistentMap()
+    assert len(m) == 0
+    assert m.get("a") is None
+    assert m.get("a", 1) == 1
+    assert "a" not in m
+    assert list(m) == []
+    with pytest.raises(KeyError):
+        m["a"]
+    with pytest.raises(KeyError):
+        m.delete("a")
+
+
+def test_set_is_persistent() -> None:
+    m1: PersistentMap[str, int] = PersistentMap()
+    m2 = m1.set("a", 1)
+    m3 = m2.set("a", 2).set("b", 3)
+
+    assert len(m1) == 0
+    assert m2["a"] == 1 and len(m2) == 1
+    assert m3["a"] == 2 and m3["b"] == 3 and len(m3) == 2
+    assert "b" not in m2
+
+
+def test_matches_dict_under_random_operations() -> None:
+    rng = random.Random(1234)
+    m: PersistentMap[int, int] = PersistentMap()
+    d: Dict[int, int] = {}
+    for _ in range(5000):
+        key = rng.randrange(500)
+        if rng.random() < 0.3 and key in d:
+            m = m.delete(key)
+            del d[key]
+        else:
+            value = rng.randrange(1000)
+            m = m.set(key, value)
+            d[key] = value
+        assert len(m) == len(d)
+
+    assert dict(m.items()) == d
+    for key in range(500):
+        assert m.get(key) == d.get(key)
+
+
+def test_hash_collisions() -> None:
+    a, b, c = Colliding("a"), Colliding("b"), Colliding("c")
+    m = PersistentMap[Colliding, int]().set(a, 1).set(b, 2).set(c, 3).set(b, 20)
+
+    assert len(m) == 3
+    assert (m[a], m[b], m[c]) == (1, 20, 3)
+    assert m.get(Colliding("d")) is None
+
+    m2 = m.delete(b)
+    assert len(m2) == 2 and b not in m2 and m2[c] == 3
+    with pytest.raises(KeyError):
+        m2.delete(b)
+
+    m3 = m2.delete(a)
+    assert dict(m3.items()) == {c: 3}
+    assert len(m3.delete(c)) == 0
+
+
+def test_delete_collapses_to_leaf() -> None:
+    # 1 and 33 share their lowest five hash bits, so they live in a subtree.
+    m = PersistentMap[int, str]().set(1, "x").set(33, "y").set(2, "z")
+    m = m.delete(33).delete(2)
+    assert dict(m.items()) == {1: "x"}
+    assert m[1] == "x"
+
+
+def test_update() -> None:
+    small = PersistentMap[str, int]().set("a", 1).set("b", 2)
+    large = PersistentMap[str, int]().set("b", 20).set("c", 30).set("d", 40)
+
+    assert dict(small.update(large).items()) == {"a": 1, "b": 20, "c": 30, "d": 40}
+    assert dict(large.update(small).items()) == {"a": 1, "b": 2, "c": 30, "d": 40}
+
+
+def test_equality_and_repr() -> None:
+    m1 = PersistentMap[str, int]().set("a", 1).set("b", 2)
+    m2 = PersistentMap[str, int]().set("b", 2).set("a", 1)
+    assert m1 == m2
+    assert m1 != m2.set("a", 3)
+    assert m1 != m2.set("c", 3)
+    assert m1 != {"a": 1, "b": 2}
+    assert repr(PersistentMap().set("a", 1)) == "PersistentMap({'a': 1})"
@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+
+import pytest
+
+import ziopy.services.mock_effects.process as process_effect
+import ziopy.services.process as process
+from ziopy.either import Left
+from ziopy.environments import ProcessEnvironment
+from ziopy.services.process import LiveProcess, MockProcess, ProcessResult
+from ziopy.zio import ZIO, unsafe_run
+
+LIVE = ProcessEnvironment(LiveProcess())
+
+
+def _python(code: str) -> list:
+    return [sys.executable, "-c", code]
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_live_run_collects_output() -> None:
+    program = process.run(_python(
+        "import sys; sys.stdout.write(sys.stdin.read().upper()); sys.stderr.write('e'); "
+        "sys.exit(3)"
+    ), input=b"hello").provide(LIVE)
+    result = unsafe_run(program)
+    assert (result.returncode, result.stdout, result.stderr) == (3, b"HELLO", b"e")
+    assert not result.ok
+
+
+def test_live_run_of_missing_program_fails() -> None:
+    program = process.run(["/nonexistent/program"]).either().provide(LIVE)
+    result = unsafe_run(program)
+    assert isinstance(result, Left)
+    assert isinstance(result.value, FileNotFoundError)
+
+
+def test_live_spawn_streams_stdout() -> None:
+    program = process.spawn(_python(
+        "import sys, time\n"
+        "for i in range(3):\n"
+        "    print(i, flush=True); time.sleep(0.01)"
+    )).flat_map(lambda handle: handle.stdout.run_collect().flat_map(
+        lambda chunks: handle.wait().map(lambda code: (b"".join(chunks), code))
+    )).provide(LIVE)
+    assert unsafe_run(program) == (b"0\n1\n2\n", 0)
+
+
+def test_live_run_all_is_ordered_and_bounded() -> None:
+    start = time.monotonic()
+    cmds = [_python(f"import time; time.sleep(0.3); print({i})") for i in range(4)]
+    results = unsafe_run(process.run_all(cmds, parallelism=4).provide(LIVE))
+    assert [r.stdout for r in results] == [b"0\n", b"1\n", b"2\n", b"3\n"]
+    # Four 0.3s sleeps in parallel rather than one after the other.
+    assert time.monotonic() - start < 1.0
+
+    with pytest.raises(ValueError):
+        LiveProcess().run_all(cmds, parallelism=0)
+
+
+def test_live_run_is_killed_on_interrupt() -> None:
+    pids = []
+    sleeper = _python("import os, time; print(os.getpid(), flush=True); time.sleep(30)")
+
+    def _interrupt_when_started(fiber: object) -> ZIO[object, object, None]:
+        def _started() -> bool:
+            return bool(pids)
+        return ZIO.sleep(0.01).flat_map(
+            lambda _: (
+                fiber.interrupt() if _started() else _interrupt_when_started(fiber)  # type: ignore
+            )
+        )
+
+    def _record(handle: process.ProcessHandle) -> ZIO[object, object, int]:
+        pids.append(handle.pid)
+        return handle.wait()
+
+    program = process.spawn(sleeper).flat_map(_record).provide(LIVE)
+    unsafe_run(program.fork().flat_map(_interrupt_when_started))
+    deadline = time.monotonic() + 5
+    while _alive(pids[0]) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not _alive(pids[0])
+
+
+def test_mock_process() -> None:
+    echo = ("echo", "hi")
+    mock = MockProcess({echo: ProcessResult(echo, 0, b"hi\n", b"")})
+    env = ProcessEnvironment(mock)
+
+    assert unsafe_run(process.run(list(echo)).provide(env)).stdout == b"hi\n"
+    results = unsafe_run(process.run_all([echo, echo], parallelism=2).provide(env))
+    assert [r.returncode for r in results] == [0, 0]
+
+    handle = unsafe_run(process.spawn(echo).provide(env))
+    assert unsafe_run(handle.stdout.run_collect()) == [b"hi\n"]
+    unsafe_run(handle.kill())
+    assert unsafe_run(handle.wait()) == -9
+
+    missing = unsafe_run(process.run(["nope"]).either().provide(env))
+    assert isinstance(missing, Left) and isinstance(missing.value, FileNotFoundError)
+
+    assert mock.effects == [
+        process_effect.Run(echo, None),
+        process_effect.Run(echo, None),
+        process_effect.Run(echo, None),
+        process_effect.Spawn(echo),
+        process_effect.Kill(echo),
+        process_effect.Run(("nope",), None),
+    ]
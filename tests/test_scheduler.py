@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import List, NoReturn, Set
+
+import pytest
+
+from ziopy.either import Left
+from ziopy.scheduler import Scheduler
+from ziopy.zio import ZIO, ZIOMonad, monadic, unsafe_run
+
+
+@monadic
+def _fib(n: int, do: ZIOMonad[object, NoReturn]) -> ZIO[object, NoReturn, int]:
+    if n < 2:
+        return ZIO.succeed(n)
+    left = do << _fib(n - 1).fork()
+    right = do << _fib(n - 2).fork()
+    a = do << left.join()
+    b = do << right.join()
+    return ZIO.succeed(a + b)
+
+
+def test_nested_joins_do_not_deadlock() -> None:
+    # Every fiber waits for fibers queued behind it, with a single worker.
+    with Scheduler(workers=1) as scheduler:
+        assert unsafe_run(_fib(10), scheduler=scheduler) == 55
+
+
+def test_fibers_run_on_worker_threads() -> None:
+    threads: Set[str] = set()
+    lock = threading.Lock()
+
+    def _record(n: int) -> int:
+        with lock:
+            threads.add(threading.current_thread().name)
+        return n * n
+
+    with Scheduler(workers=2) as scheduler:
+        program = ZIO.map_par_n(
+            *[ZIO.effect_total(lambda n=n: _record(n)) for n in range(8)],  # type: ignore
+            lambda *squares: sum(squares)
+        )
+        assert unsafe_run(program, scheduler=scheduler) == sum(n * n for n in range(8))
+    assert threads and all(name.startswith("ziopy-worker-") for name in threads)
+
+
+def test_idle_workers_steal_forked_fibers() -> None:
+    @monadic
+    def _parent(do: ZIOMonad[object, NoReturn]) -> ZIO[object, NoReturn, int]:
+        # Forked on a worker, so the children go to that worker's deque.
+        fibers = [do << ZIO.sleep(0.01).map(lambda _, i=i: i).fork() for i in range(8)]
+        return ZIO.succeed(sum(do << fiber.join() for fiber in fibers))
+
+    with Scheduler(workers=2) as scheduler:
+        assert unsafe_run(_parent().fork().flat_map(lambda f: f.join()),
+                          scheduler=scheduler) == 28
+        assert scheduler.steals > 0
+
+
+def test_blocking_sections_start_spare_workers() -> None:
+    def _block() -> None:
+        time.sleep(0.2)
+
+    with Scheduler(workers=1) as scheduler:
+        start = time.monotonic()
+        program = ZIO.map_par_n(
+            *[ZIO.effect_total(_block).blocking() for _ in range(4)],
+            lambda *_: None
+        )
+        unsafe_run(program, scheduler=scheduler)
+        # The four sections overlapped instead of taking turns on one worker.
+        assert time.monotonic() - start < 0.6
+        assert scheduler.threads_started > 1
+
+
+def test_surplus_workers_retire() -> None:
+    with Scheduler(workers=1) as scheduler:
+        program = ZIO.map_par_n(
+            *[ZIO.sleep(0.05) for _ in range(4)],
+            lambda *_: None
+        )
+        unsafe_run(program, scheduler=scheduler)
+        deadline = time.monotonic() + 2
+        while len(scheduler._workers) > 1 and time.monotonic() < deadline:
+            unsafe_run(ZIO.succeed(1).fork().flat_map(lambda f: f.join()), scheduler=scheduler)
+            time.sleep(0.01)
+        assert len(scheduler._workers) == 1
+
+
+def test_interruption_and_failures() -> None:
+    log: List[str] = []
+    with Scheduler(workers=2) as scheduler:
+        program = (
+            ZIO.sleep(10)
+            .ensuring(ZIO.effect_total(lambda: log.append("finalized")))
+            .fork()
+            .flat_map(lambda fiber: ZIO.sleep(0.01) << fiber.interrupt())
+        )
+        unsafe_run(program, scheduler=scheduler)
+        assert log == ["finalized"]
+
+        failing = ZIO.fail("boom").zip_par(ZIO.sleep(10)).either()
+        assert unsafe_run(failing, scheduler=scheduler) == Left("boom")
+
+
+def test_shutdown() -> None:
+    scheduler = Scheduler(workers=2)
+    scheduler.shutdown()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(lambda: None)
+    with pytest.raises(ValueError):
+        Scheduler(workers=0)
+    with pytest.raises(ValueError):
+        Scheduler(workers=4, max_threads=2)
@@ -0,0 +1,134 @@
+import os
+import pickle
+from typing import Iterator
+
+import pytest
+
+from ziopy import parallel, serializable
+from ziopy.either import Left, Right
+from ziopy.serializable import UnregisteredFunctionError
+from ziopy.zio import ZIO, unsafe_run
+
+
+@serializable.function
+def _add(a: int, b: int) -> int:
+    return a + b
+
+
+@serializable.function
+def _scale(value: int, factor: int = 1) -> int:
+    return value * factor
+
+
+@serializable.function
+def _halve(n: int) -> serializable.Program[str, int]:
+    return serializable.succeed(n // 2) if n % 2 == 0 else serializable.fail(f"{n} is odd")
+
+
+@serializable.function
+def _parse(text: str) -> int:
+    return int(text)
+
+
+@serializable.function
+def _pid() -> int:
+    return os.getpid()
+
+
+def _unregistered(n: int) -> int:
+    return n
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _shutdown_executors() -> Iterator[None]:
+    yield
+    parallel.shutdown()
+
+
+def test_run() -> None:
+    program = serializable.effect(_add, 1, 2).map(_scale, 10).flat_map(_halve)
+    assert serializable.run(program) == Right(15)
+    assert serializable.run(program.flat_map(_halve)) == Left("15 is odd")
+    assert serializable.run(serializable.fail("boom").map(_scale, 2)) == Left("boom")
+
+
+def test_effect_captures_exceptions() -> None:
+    result = serializable.run(serializable.effect(_parse, "x"))
+    assert isinstance(result, Left) and isinstance(result.value, ValueError)
+
+    with pytest.raises(ValueError):
+        serializable.run(serializable.effect_total(_parse, "x"))
+
+
+def test_keyword_arguments() -> None:
+    program = serializable.effect(_scale, 4, factor=3)
+    assert serializable.run(serializable.loads(serializable.dumps(program))) == Right(12)
+
+
+def test_to_zio() -> None:
+    program = serializable.succeed(20).map(_add, 1).to_zio().flat_map(lambda n: ZIO.succeed(n * 2))
+    assert unsafe_run(program) == 42
+
+
+def test_programs_pickle_functions_by_name() -> None:
+    program = serializable.effect(_add, 1, 2).flat_map(_halve)
+    data = pickle.dumps(program)
+    assert b"_add" in data and serializable.loads(data) == program
+    assert serializable.run(pickle.loads(data)) == Left("3 is odd")
+
+
+def test_run_serialized() -> None:
+    data = serializable.dumps(serializable.effect(_add, 2, 2))
+    assert pickle.loads(serializable.run_serialized(data)) == Right(4)
+
+
+def test_loads_rejects_other_objects() -> None:
+    with pytest.raises(TypeError):
+        serializable.loads(pickle.dumps(42))
+
+
+def test_unknown_functions_are_rejected() -> None:
+    program = serializable.Effect(
+        serializable.FunctionRef(f"{__name__}:_unregistered"), (1,), (), total=True
+    )
+    with pytest.raises(UnregisteredFunctionError):
+        program.to_zio()
+
+
+@pytest.mark.skipif(serializable.cloudpickle is not None, reason="cloudpickle is installed")
+def test_unregistered_functions_need_cloudpickle() -> None:
+    with pytest.raises(TypeError, match="cloudpickle"):
+        serializable.effect(_unregistered, 1)
+    with pytest.raises(TypeError):
+        serializable.succeed(1).map(lambda n: n + 1)
+
+
+@pytest.mark.skipif(serializable.cloudpickle is None, reason="cloudpickle is not installed")
+def test_closures_with_cloudpickle() -> None:
+    offset = 5
+    program = serializable.succeed(1).map(lambda n: n + offset)
+    assert serializable.run(serializable.loads(serializable.dumps(program))) == Right(6)
+
+
+def test_local_functions_cannot_be_registered() -> None:
+    def local() -> None:
+        pass
+
+    with pytest.raises(ValueError):
+        serializable.function(local)
+
+
+def test_on_backend() -> None:
+    assert unsafe_run(serializable.on_backend(serializable.effect(_pid))) != os.getpid()
+
+    program = serializable.effect(_add, 3, 4).flat_map(_halve)
+    assert unsafe_run(serializable.on_backend(program).either()) == Left("7 is odd")
+
+    error = unsafe_run(serializable.on_backend(serializable.effect(_parse, "x")).either())
+    assert isinstance(error, Left) and isinstance(error.value, ValueError)
+
+
+def test_on_backend_starts_the_backend_when_run() -> None:
+    program = serializable.on_backend(serializable.effect(_add, 1, 2))
+    parallel.shutdown()
+    assert unsafe_run(program) == 3
@@ -0,0 +1,90 @@
+import asyncio
+from typing import List, NoReturn
+
+from ziopy.aio import AsyncZIO, ZIOMonadAsync, monadic_async, unsafe_run_async
+from ziopy.either import Either, Left, Right
+from ziopy.stream import ZStream
+from ziopy.zio import ZIO, unsafe_run
+
+
+def test_from_iterable_in_chunks() -> None:
+    chunks: List[List[int]] = []
+    stream = ZStream.from_iterable(range(7), chunk_size=3)
+    unsafe_run(stream.run_foreach_chunk(lambda chunk: ZIO.effect_total(
+        lambda: chunks.append(chunk)
+    )))
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_stream_can_be_run_again() -> None:
+    stream = ZStream.from_iterable(range(3)).map(lambda n: n * 10)
+    assert unsafe_run(stream.run_collect()) == [0, 10, 20]
+    assert unsafe_run(stream.run_collect()) == [0, 10, 20]
+
+
+def test_filter_skips_emptied_chunks() -> None:
+    stream = ZStream.from_chunks([[1, 3], [5], [6, 7]]).filter(lambda n: n % 2 == 0)
+    assert unsafe_run(stream.run_collect()) == [6]
+
+
+def test_take_stops_pulling() -> None:
+    pulled: List[int] = []
+
+    def _pull() -> List[int]:
+        pulled.append(len(pulled))
+        return [len(pulled)]
+
+    stream = ZStream.from_pull(ZIO.effect_total(_pull)).take(3)
+    assert unsafe_run(stream.run_collect()) == [1, 2, 3]
+    assert len(pulled) == 3
+    assert unsafe_run(stream.take(0).run_collect()) == []
+
+
+def test_run_fold_and_drain() -> None:
+    stream = ZStream.from_iterable("abc")
+    assert unsafe_run(stream.run_fold("", lambda s, c: c + s)) == "cba"
+    assert unsafe_run(stream.run_drain()) is None
+
+
+def test_failures_stop_the_stream() -> None:
+    seen: List[int] = []
+
+    def _visit(n: int) -> ZIO[object, str, None]:
+        if n == 2:
+            return ZIO.fail("two")
+        return ZIO.effect_total(lambda: seen.append(n))
+
+    program = ZStream.from_iterable([1, 2, 3]).run_foreach(_visit).either()
+    assert unsafe_run(program) == Left("two")
+    assert seen == [1]
+
+    failing: ZStream[object, str, int] = ZStream.from_pull(ZIO.fail("pull"))
+    assert unsafe_run(failing.map(str).run_collect().either()) == Left("pull")
+
+
+def test_environment_is_provided_to_pulls() -> None:
+    stream = ZStream.from_pull(ZIO.access(lambda r: [r])).take(2)
+    assert unsafe_run(stream.run_collect().provide("env")) == ["env", "env"]
+
+
+def _async_source(values: List[bytes]) -> ZStream[object, NoReturn, bytes]:
+    remaining = list(values)
+
+    async def _pull(_: object) -> Either[NoReturn, List[bytes]]:
+        await asyncio.sleep(0)
+        return Right([remaining.pop(0)] if remaining else [])
+    return ZStream.from_pull(AsyncZIO(_pull))
+
+
+def test_async_pulls_run_synchronously() -> None:
+    stream = _async_source([b"a", b"b"]).map(bytes.upper)
+    assert unsafe_run(stream.run_collect()) == [b"A", b"B"]
+
+
+def test_async_pulls_are_awaited_in_monadic_async() -> None:
+    @monadic_async
+    async def _collect(do: ZIOMonadAsync[object, NoReturn]) -> ZIO[object, NoReturn, bytes]:
+        chunks = await (do << _async_source([b"x", b"y", b"z"]).take(2).run_collect())
+        return ZIO.succeed(b"".join(chunks))
+
+    assert asyncio.run(unsafe_run_async(_collect())) == b"xy"
@@ -0,0 +1,140 @@
+import io
+import os
+import signal
+import threading
+import time
+import warnings
+from typing import Callable
+
+import pytest
+
+from ziopy.instrumentation import CompositeHooks, MetricsCollector
+from ziopy.supervisor import FiberLeakWarning, Supervisor
+from ziopy.zio import ZIO, Fiber, unsafe_run
+
+
+def _wait_until(predicate: Callable[[], object]) -> None:
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_supervisor_tracks_live_fibers() -> None:
+    supervisor = Supervisor()
+    release = threading.Event()
+    blocking = ZIO.effect_total(release.wait, label="wait_for_release")
+
+    fiber = unsafe_run(blocking.fork(), hooks=supervisor)
+    _wait_until(lambda: supervisor.fibers() and supervisor.fibers()[0].effect is not None)
+
+    [info] = supervisor.fibers()
+    assert info.id == fiber.id
+    assert info.parent_id is None
+    assert info.status == "running"
+    assert info.effect == "wait_for_release"
+    assert info.age >= 0
+
+    release.set()
+    unsafe_run(fiber.join())
+    _wait_until(lambda: supervisor.fibers() == [])
+
+
+def test_fiber_status() -> None:
+    supervisor = Supervisor()
+    fiber: Fiber = unsafe_run(ZIO.sleep(60).fork(), hooks=supervisor)
+    _wait_until(lambda: fiber.status == "suspended")
+    assert supervisor.fibers()[0].status == "suspended"
+    unsafe_run(fiber.interrupt())
+    assert fiber.status == "done"
+
+
+def test_fiber_dump() -> None:
+    supervisor = Supervisor()
+    fiber = unsafe_run(ZIO.sleep(60).labeled("nap").fork(), hooks=supervisor)
+    _wait_until(lambda: fiber.status == "suspended")
+
+    out = io.StringIO()
+    supervisor.fiber_dump(out)
+    dump = out.getvalue()
+    assert dump.startswith("Fiber dump: 1 live fiber(s)\n")
+    assert f"#{fiber.id} parent=- status=suspended" in dump
+    assert "effect=nap" in dump
+
+    out = io.StringIO()
+    supervisor.fiber_dump(out, include_stacks=True)
+    assert "File " in out.getvalue()
+
+    unsafe_run(fiber.interrupt())
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="requires SIGUSR1")
+def test_fiber_dump_on_signal() -> None:
+    supervisor = Supervisor()
+    out = io.StringIO()
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        supervisor.install_signal_handler(signal.SIGUSR1, file=out, include_stacks=False)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        _wait_until(lambda: out.getvalue())
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+    assert out.getvalue() == "Fiber dump: 0 live fiber(s)\n"
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="requires SIGUSR1")
+def test_fiber_dump_on_signal_while_the_main_thread_holds_the_lock() -> None:
+    supervisor = Supervisor()
+    out = io.StringIO()
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        supervisor.install_signal_handler(signal.SIGUSR1, file=out, include_stacks=False)
+        # As if the signal arrived during on_effect_start on the main thread.
+        with supervisor._lock:
+            signal.raise_signal(signal.SIGUSR1)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+    assert out.getvalue() == "Fiber dump: 0 live fiber(s)\n"
+
+
+def test_leak_warning() -> None:
+    supervisor = Supervisor()
+    release = threading.Event()
+    leaky_parent = ZIO.effect_total(release.wait).fork()
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        parent = unsafe_run(leaky_parent.fork(), hooks=supervisor)
+        child = unsafe_run(parent.join())
+        _wait_until(lambda: caught)
+
+    assert issubclass(caught[0].category, FiberLeakWarning)
+    assert f"Fiber #{child.id}" in str(caught[0].message)
+    release.set()
+
+
+def test_no_leak_warning_when_disabled() -> None:
+    supervisor = Supervisor(warn_on_leaks=False)
+    release = threading.Event()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        parent = unsafe_run(ZIO.effect_total(release.wait).fork().fork(), hooks=supervisor)
+        unsafe_run(parent.join())
+    release.set()
+
+
+def test_composite_hooks() -> None:
+    supervisor = Supervisor()
+    collector = MetricsCollector()
+    hooks = CompositeHooks(supervisor, collector)
+    program = (
+        ZIO.effect_total(lambda: 1, label="child").fork().flat_map(lambda f: f.join())
+        .labeled("parent")
+        << ZIO.fail("oops").labeled("bad")
+    ).either() << ZIO.effect(lambda: 1 // 0).either()
+    unsafe_run(program, hooks=hooks)
+
+    assert collector.histogram("child").count == 1
+    assert collector.failures("bad") == 1
+    assert collector.catches == 1
+    _wait_until(lambda: supervisor.fibers() == [])
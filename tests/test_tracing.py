@@ -0,0 +1,183 @@
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Iterator, List, NoReturn
+
+import pytest
+
+from ziopy import tracing
+from ziopy.either import Left
+from ziopy.zio import ZIO, ZIOMonad, monadic, unsafe_run
+
+
+@dataclass(frozen=True)
+class Bippy(Exception):
+    pass
+
+
+def _kaboom() -> NoReturn:
+    raise Bippy()
+
+
+@pytest.fixture(autouse=True)
+def _restore_tracing() -> Iterator[None]:
+    enabled = tracing.is_enabled()
+    yield
+    tracing.enable() if enabled else tracing.disable()
+
+
+def _lines(trace: List[tracing.TraceElement]) -> List[int]:
+    return [lineno for code, lineno in trace if code.co_filename == __file__]
+
+
+def _lineno() -> int:
+    return sys._getframe(1).f_lineno
+
+
+def test_tracing_is_opt_in() -> None:
+    tracing.disable()
+    result = ZIO.fail(Bippy()).map(lambda x: x)._run(None)
+    assert tracing.trace_of(result) == []
+
+
+def test_enable_disable_and_context_manager() -> None:
+    tracing.enable()
+    assert tracing.is_enabled()
+    with tracing.tracing(False):
+        assert not tracing.is_enabled()
+    assert tracing.is_enabled()
+    tracing.disable()
+    assert not tracing.is_enabled()
+    with tracing.tracing():
+        assert tracing.is_enabled()
+
+
+def test_context_manager_applies_to_the_current_thread_only() -> None:
+    tracing.disable()
+    inside, outside = threading.Event(), threading.Event()
+    seen = []
+
+    def _other_thread() -> None:
+        inside.wait()
+        seen.append(tracing.is_enabled())
+        outside.set()
+
+    thread = threading.Thread(target=_other_thread)
+    thread.start()
+    with tracing.tracing():
+        inside.set()
+        outside.wait()
+        assert tracing.is_enabled()
+    thread.join()
+    assert seen == [False]
+
+
+def test_failed_left_records_call_sites() -> None:
+    with tracing.tracing():
+        line = _lineno() + 1
+        step = ZIO.fail(Bippy()).map(lambda x: x)
+        outer = step.flat_map(ZIO.succeed)
+    result = outer._run(None)
+    assert isinstance(result, Left)
+    assert _lines(tracing.trace_of(result)) == [line, line + 1]
+
+
+def test_repeated_runs_do_not_share_traces() -> None:
+    with tracing.tracing():
+        program = ZIO.fail("a").map(lambda x: x)
+    assert len(tracing.trace_of(program._run(None))) == 1
+    assert len(tracing.trace_of(program._run(None))) == 1
+
+
+def test_exceptions_record_call_sites() -> None:
+    with tracing.tracing():
+        line = _lineno() + 1
+        program = ZIO.effect_total(_kaboom).map(lambda x: x)
+    with pytest.raises(Bippy) as exc_info:
+        program._run(None)
+    assert _lines(tracing.trace_of(exc_info.value)) == [line, line]
+
+
+def test_monadic_records_do_steps() -> None:
+    @monadic
+    def _program(do: ZIOMonad[object, str]) -> ZIO[object, str, None]:
+        do << ZIO.succeed(1)
+        do << ZIO.fail("oops")
+        return ZIO.succeed(None)
+
+    failing_line = _program.__wrapped__.__code__.co_firstlineno + 3  # type: ignore
+    with tracing.tracing():
+        call_line = _lineno() + 1
+        result = _program()._run(None)
+    assert result == Left("oops")
+    assert _lines(tracing.trace_of(result)) == [failing_line, call_line]
+
+
+def test_unsafe_run_adds_trace_note() -> None:
+    with tracing.tracing():
+        program = ZIO.fail(Bippy()).map(lambda x: x)
+        with pytest.raises(Bippy) as exc_info:
+            unsafe_run(program)
+    notes = exc_info.value.__notes__  # type: ignore
+    assert notes[0].startswith("ZIO trace (most recent call last):")
+    assert __file__ in notes[0]
+
+
+def test_programs_built_with_tracing_are_traced_when_run_without() -> None:
+    # The pattern of the module's docstring: build inside the block, run outside.
+    with tracing.tracing():
+        line = _lineno() + 1
+        program = ZIO.fail(Bippy()).map(lambda x: x)
+    with pytest.raises(Bippy) as exc_info:
+        unsafe_run(program)
+    notes = exc_info.value.__notes__  # type: ignore
+    assert f'File "{__file__}", line {line}' in notes[0]
+
+
+def test_unsafe_run_adds_trace_note_to_defects() -> None:
+    with tracing.tracing():
+        program = ZIO.effect_total(_kaboom)
+        with pytest.raises(Bippy) as exc_info:
+            unsafe_run(program)
+    notes = exc_info.value.__notes__  # type: ignore
+    assert "test_unsafe_run_adds_trace_note_to_defects" in notes[0]
+
+
+def test_reused_exceptions_are_traced_once_per_run() -> None:
+    error = Bippy()
+
+    def _raise_error() -> NoReturn:
+        raise error
+
+    with tracing.tracing():
+        line = _lineno() + 1
+        raising = ZIO.effect_total(_raise_error).map(lambda x: x)
+        failing = ZIO.fail(error).map(lambda x: x)
+    for _ in range(3):
+        with pytest.raises(Bippy):
+            unsafe_run(raising)
+        assert _lines(tracing.trace_of(error)) == [line, line]
+    assert len(error.__notes__) == 1  # type: ignore
+    for _ in range(3):
+        with pytest.raises(Bippy):
+            unsafe_run(failing)
+    assert len(error.__notes__) == 2  # type: ignore
+    assert error.__notes__[1].count(f'line {line + 1},') == 1  # type: ignore
+    assert f'line {line},' not in error.__notes__[1]  # type: ignore
+
+
+def test_trace_length_is_bounded() -> None:
+    with tracing.tracing():
+        program = ZIO.fail("a")
+        for _ in range(tracing.MAX_TRACE_LENGTH + 10):
+            program = program.map(lambda x: x)
+    assert len(tracing.trace_of(program._run(None))) == tracing.MAX_TRACE_LENGTH
+
+
+def test_format_trace() -> None:
+    code = test_format_trace.__code__
+    assert tracing.format_trace([(code, 10), (code, 20)]).splitlines() == [
+        "ZIO trace (most recent call last):",
+        f'  File "{__file__}", line 20, in test_format_trace',
+        f'  File "{__file__}", line 10, in test_format_trace',
+    ]
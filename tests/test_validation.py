@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+
+from ziopy.either import Left, Right
+from ziopy.validation import Chunk, Invalid, Valid, Validation
+from ziopy.zio import ZIO, unsafe_run
+
+
+@dataclass(frozen=True)
+class User:
+    name: str
+    age: int
+
+
+def _validate_name(name: str) -> Validation[str, str]:
+    return Validation.from_predicate(name, bool, lambda _: "name is empty")
+
+
+def _validate_age(age: int) -> Validation[str, int]:
+    return Validation.from_predicate(age, lambda a: a >= 0, lambda a: f"age {a} is negative")
+
+
+def test_chunk() -> None:
+    chunk = Chunk.single(1) + Chunk.of([2, 3]) + Chunk.empty() + Chunk.single(4)
+    assert list(chunk) == [1, 2, 3, 4]
+    assert chunk.to_list() == [1, 2, 3, 4]
+    assert len(chunk) == 4
+    assert chunk == Chunk.of([1, 2, 3, 4])
+    assert chunk != Chunk.of([1, 2, 3])
+    assert chunk != [1, 2, 3, 4]
+    assert repr(chunk) == "Chunk([1, 2, 3, 4])"
+    assert not Chunk.empty()
+    assert Chunk.empty() + chunk is chunk
+    assert hash(chunk) == hash(Chunk.of([1, 2, 3, 4]))
+
+
+def test_chunk_deep_concatenation() -> None:
+    chunk: Chunk[int] = Chunk.empty()
+    for i in range(100_000):
+        chunk = chunk + Chunk.single(i)
+    assert len(chunk) == 100_000
+    assert sum(chunk) == sum(range(100_000))
+
+
+def test_valid_and_invalid() -> None:
+    assert Validation.valid(1) == Valid(1)
+    assert Validation.invalid("a", "b") == Invalid(Chunk.of(["a", "b"]))
+
+
+def test_map_n_success() -> None:
+    result = Validation.map_n(_validate_name("bob"), _validate_age(42), User)
+    assert result == Valid(User("bob", 42))
+
+
+def test_map_n_accumulates_errors() -> None:
+    result = Validation.map_n(
+        _validate_name(""), _validate_age(-1), _validate_age(-2), lambda n, a, b: (n, a, b)
+    )
+    assert result == Validation.invalid("name is empty", "age -1 is negative", "age -2 is negative")
+
+
+def test_zip_par() -> None:
+    assert Valid(1).zip_par(Valid("a")) == Valid((1, "a"))
+    assert Valid(1).zip_par(Validation.invalid("x")) == Validation.invalid("x")
+    assert Validation.invalid("x").zip_par(Valid(1)) == Validation.invalid("x")
+    assert (
+        Validation.invalid("x").zip_par(Validation.invalid("y", "z"))
+        == Validation.invalid("x", "y", "z")
+    )
+
+
+def test_sequence_par() -> None:
+    assert Validation.sequence_par([Valid(1), Valid(2)]) == Valid([1, 2])
+    assert Validation.sequence_par(
+        _validate_age(a) for a in [1, -1, 2, -2]
+    ) == Validation.invalid("age -1 is negative", "age -2 is negative")
+
+
+def test_sequence_par_many_errors() -> None:
+    result = Validation.sequence_par(_validate_age(-i - 1) for i in range(50_000))
+    assert isinstance(result, Invalid)
+    assert len(result.errors) == 50_000
+
+
+def test_map_flat_map_and_map_error() -> None:
+    assert Valid(1).map(lambda x: x + 1) == Valid(2)
+    assert Validation.invalid("a").map(lambda x: x + 1) == Validation.invalid("a")
+    assert Valid(1).map_error(str.upper) == Valid(1)
+    assert Validation.invalid("a", "b").map_error(str.upper) == Validation.invalid("A", "B")
+    assert Valid(-1).flat_map(_validate_age) == Validation.invalid("age -1 is negative")
+    assert Validation.invalid("a").flat_map(_validate_age) == Validation.invalid("a")
+
+
+def test_either_conversions() -> None:
+    assert Validation.from_either(Right(1)) == Valid(1)
+    assert Validation.from_either(Left("a")) == Validation.invalid("a")
+    assert Valid(1).to_either() == Right(1)
+    assert Validation.invalid("a", "b").to_either() == Left(["a", "b"])
+
+
+def test_zio_conversions() -> None:
+    assert unsafe_run(Valid(1).to_zio().either()) == Right(1)
+    assert unsafe_run(Validation.invalid("a").to_zio().either()) == Left(["a"])
+    assert unsafe_run(Validation.from_zio(ZIO.succeed(1))) == Valid(1)
+    assert unsafe_run(Validation.from_zio(ZIO.fail("a"))) == Validation.invalid("a")
+
+
+def test_fold() -> None:
+    assert Valid(1).fold(len, lambda x: x + 1) == 2
+    assert Validation.invalid("a", "b").fold(len, lambda x: x + 1) == 2
@@ -0,0 +1,123 @@
+import pytest
+
+import ziopy.services.console as console
+import ziopy.services.mock_effects.console as console_effect
+import ziopy.services.system as system
+from ziopy.services.console import Console, LiveConsole, MockConsole
+from ziopy.services.system import MockSystem, System
+from ziopy.zenvironment import ZEnvironment, accessor_name, service_type_of
+from ziopy.zio import ZIO, unsafe_run
+
+
+class Plain:
+    pass
+
+
+class FileSystem:
+    pass
+
+
+def test_service_type_of() -> None:
+    assert service_type_of(LiveConsole()) is Console
+    assert service_type_of(MockSystem()) is System
+    assert service_type_of(Plain()) is Plain
+
+
+def test_accessor_name() -> None:
+    assert accessor_name(Console) == "console"
+    assert accessor_name(FileSystem) == "file_system"
+
+
+def test_add_and_get() -> None:
+    mock_console = MockConsole()
+    mock_system = MockSystem()
+    env = ZEnvironment.empty().add(mock_console).add(mock_system)
+
+    assert env.get(Console) is mock_console
+    assert env.get(Console) is mock_console
+    assert env.get(System) is mock_system
+    assert Console in env and System in env
+    assert len(env) == 2
+    assert len(ZEnvironment.empty()) == 0
+    assert dict(env) == {Console: mock_console, System: mock_system}
+
+
+def test_add_is_persistent() -> None:
+    first, second = MockConsole(), MockConsole()
+    env1 = ZEnvironment.of(first)
+    env2 = env1.add(second)
+    assert env1.get(Console) is first
+    assert env2.get(Console) is second
+
+
+def test_add_explicit_type_and_accessor() -> None:
+    plain = Plain()
+    env = ZEnvironment.empty().add(plain, Plain, accessor="thing")
+    assert env.thing is plain
+    with pytest.raises(TypeError):
+        ZEnvironment.empty().add(plain, Console)  # type: ignore
+
+
+def test_missing_service() -> None:
+    env = ZEnvironment.of(MockConsole())
+    with pytest.raises(LookupError):
+        env.get(System)
+    with pytest.raises(AttributeError):
+        env.system
+    with pytest.raises(AttributeError):
+        env._private
+
+
+def test_update() -> None:
+    original, replacement = MockConsole(), MockConsole()
+    env = ZEnvironment.of(original)
+    updated = env.update(Console, lambda _: replacement)
+    assert updated.get(Console) is replacement
+    assert updated.console is replacement
+    assert env.get(Console) is original
+
+
+def test_union() -> None:
+    console1, console2, mock_system = MockConsole(), MockConsole(), MockSystem()
+    env = ZEnvironment.of(console1).union(ZEnvironment.of(console2, mock_system))
+    assert env.get(Console) is console2
+    assert env.get(System) is mock_system
+    assert env == ZEnvironment.of(console2, mock_system)
+    assert env != ZEnvironment.of(console1, mock_system)
+    assert env != object()
+    assert repr(env) == "ZEnvironment(Console, System)"
+
+
+def test_has_protocol_accessors() -> None:
+    mock_console = MockConsole(["bad", "42"])
+    mock_system = MockSystem()
+    env = ZEnvironment.of(mock_console, mock_system)
+
+    program = console.get_input_from_console(
+        prompt="Number?",
+        parse_value=ZIO.from_callable(str).map(int).catch(ValueError).either().to_callable(),
+        default_value=None
+    )
+    assert unsafe_run(program.provide(env)) == 42
+    assert mock_console.effects == [
+        console_effect.Input("Number?", "bad"),
+        console_effect.Input("Number?", "42")
+    ]
+
+    with pytest.raises(SystemExit):
+        unsafe_run(system.exit(3).provide(env))
+
+
+def test_types_of_services() -> None:
+    # The point of this test is to ensure that mypy accepts abstract service
+    # types and the `Has*` protocols, ergo it only uses annotated variables.
+    mock_console = MockConsole()
+    env = ZEnvironment.of(mock_console, MockSystem())
+
+    service: Console = env.get(Console)
+    assert service is mock_console
+    env = env.update(Console, lambda c: c)
+    has_console: console.HasConsole = env
+    assert has_console.console is mock_console
+    has_system: system.HasSystem = env
+    assert isinstance(has_system.system, MockSystem)
@@ -5,6 +5,7 @@ import pytest
 
 from . import zio_equivalence_relations as eqr
 from ziopy.either import Either, Left, Right
+from ziopy.zenvironment import ZEnvironment
 from ziopy.zio import (
     Environment, TypeMatchException, ZIO, unsafe_run, _raise, FunctionArguments
 )
@@ -134,6 +135,35 @@ def test_zio_provide() -> None:
     ) == Right(103)
 
 
+def test_zio_provide_some() -> None:
+    program = ZIO.access(lambda s: s.upper()).provide_some(lambda t: t[1])
+    assert program._run(("a", "b")) == Right("B")
+
+
+def test_zio_provide_some_does_not_run_eagerly() -> None:
+    calls = []
+    program = ZIO.access(len).provide_some(lambda r: calls.append(r) or "abc")
+    assert calls == []
+    assert program._run(1) == Right(3)
+    assert program._run(2) == Right(3)
+    assert calls == [1, 2]
+
+
+class Greeter:
+    def __init__(self, greeting: str) -> None:
+        self.greeting = greeting
+
+
+def test_zio_update_service() -> None:
+    env = ZEnvironment.of(Greeter("Hello"))
+    program = (
+        ZIO.access(lambda e: e.get(Greeter).greeting)
+        .update_service(Greeter, lambda g: Greeter(g.greeting + "!"))
+    )
+    assert program._run(env) == Right("Hello!")
+    assert env.get(Greeter).greeting == "Hello"
+
+
 def test_zio_effect_total() -> None:
     x: Optional[int] = None
 
@@ -0,0 +1,350 @@
+"""
+asyncio integration: `async def` do notation, and running ZIO programs from
+coroutines.
+
+    @monadic_async
+    async def fetch(
+        do: ZIOMonadAsync[HasConsole, Exception],
+        url: str
+    ) -> ZIO[HasConsole, Exception, bytes]:
+        body = await http_get(url)           # Any native awaitable.
+        await (do << console.print(body))    # Any ZIO program.
+        return ZIO.succeed(body)
+
+Note the parentheses: `await` binds more tightly than `<<`.
+
+Asynchronous programs (`AsyncZIO`, such as those of `monadic_async` and
+`from_coroutine`, and the programs built from them with `map`, `flat_map`,
+`<<`, `catch`, `either`, `provide` and `aio.access_m`) are awaited on the
+event loop. Other ZIO steps run inline on the loop's thread, except for
+blocking ones (`BlockingZIO`: those marked with `blocking()`, `ZIO.sleep`,
+`effect_async` and fiber joins), which run on the loop's default executor.
+Mark synchronous steps that block (e.g. on I/O), including plain ZIO
+programs that run an asynchronous one synchronously, with `blocking()`, so
+that they cannot stall the loop. The coroutine bodies run on the event loop
+of `unsafe_run_async`'s caller, or on a shared background event loop when
+the program is run with the synchronous `unsafe_run`.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import threading
+from typing import (Any, Awaitable, Callable, Generic, NoReturn, Optional, Tuple, Type,
+                    TypeVar, Union, cast)
+
+from ziopy.either import Either, Left, Right
+from ziopy.instrumentation import RuntimeHooks, _active_hooks
+from ziopy.zio import (ZIO, BlockingZIO, _blocking_region, _checkpoint, _current_fiber,
+                       _raise, _RaiseLeft)
+
+R = TypeVar('R', contravariant=True)
+E = TypeVar('E', covariant=True)
+A = TypeVar('A', covariant=True)
+B = TypeVar('B')
+
+AA = TypeVar('AA')
+BB = TypeVar('BB')
+EE = TypeVar('EE')
+E2 = TypeVar('E2')
+RR = TypeVar('RR')
+T = TypeVar('T')
+
+F = TypeVar('F', bound=Callable)
+
+X = TypeVar('X', bound=BaseException)
+
+_loop_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """
+    The shared event loop, running forever on a daemon thread, on which
+    asynchronous programs run when they are started from synchronous code.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            threading.Thread(target=_run, name="ziopy-asyncio", daemon=True).start()
+            ready.wait()
+            _loop = loop
+        return _loop
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _submit(make: Callable[[], Awaitable[T]]) -> "concurrent.futures.Future[T]":
+    """
+    Starts the awaitable returned by `make` on the background loop, in a copy
+    of the caller's context (so runtime hooks and the current fiber carry
+    over), and returns a future for its result.
+    """
+    loop = background_loop()
+    if _running_loop() is not loop:
+        async def _await() -> T:
+            return await make()
+        return asyncio.run_coroutine_threadsafe(_await(), loop)
+
+    # Blocking the background loop's own thread while it runs the awaitable
+    # would deadlock, so nested synchronous calls get a private event loop.
+    future: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+    context = contextvars.copy_context()
+
+    def _run_privately() -> None:
+        if not future.set_running_or_notify_cancel():
+            return  # pragma: nocover
+        try:
+            future.set_result(context.run(asyncio.run, make()))  # type: ignore
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run_privately, daemon=True).start()
+    return future
+
+
+async def on_background_loop(make: Callable[[], Awaitable[T]]) -> T:
+    """
+    Awaits the awaitable returned by `make` on the background loop, from any
+    event loop. Use it for awaitables bound to the background loop, such as
+    streams and subprocesses created there.
+    """
+    loop = background_loop()
+    if _running_loop() is loop:
+        return await make()
+
+    async def _await() -> T:
+        return await make()
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_await(), loop))
+
+
+def _wait(future: "concurrent.futures.Future[T]") -> T:
+    """
+    Waits for `future`. Inside a fiber, the wait can be interrupted, which
+    cancels the underlying coroutine.
+    """
+    fiber = _current_fiber.get()
+    if fiber is None:
+        try:
+            return future.result()
+        except BaseException:
+            # E.g. a KeyboardInterrupt delivered to the waiting main thread.
+            future.cancel()
+            raise
+    wakeup = fiber._wakeup
+    future.add_done_callback(lambda _: wakeup.set())
+    fiber._suspended = True
+    try:
+        with _blocking_region():
+            while not future.done():
+                try:
+                    _checkpoint()
+                    wakeup.wait()
+                except BaseException:
+                    future.cancel()
+                    raise
+                wakeup.clear()
+    finally:
+        fiber._suspended = False
+    return future.result()
+
+
+class AsyncZIO(ZIO[R, E, A]):
+    """
+    A ZIO program whose implementation is a coroutine. It can be run like any
+    other program, in which case the coroutine runs on the background event
+    loop; asynchronous callers (`unsafe_run_async`, `monadic_async` bodies)
+    await it directly instead.
+
+    `run` optionally replaces the default synchronous implementation, which
+    waits for `run_async` on the background event loop.
+    """
+    def __init__(
+        self,
+        run_async: Callable[[R], Awaitable[Either[E, A]]],
+        run: Optional[Callable[[R], Either[E, A]]] = None
+    ) -> None:
+        self._run_async = run_async
+        super().__init__(run or (lambda r: _wait(_submit(lambda: run_async(r)))))
+
+    # The combinators below keep programs asynchronous. Their synchronous
+    # paths are those of `ZIO`.
+
+    def map(self, f: Callable[[A], B]) -> "AsyncZIO[R, E, B]":
+        run_async = self._run_async
+
+        async def _map(r: R) -> "Either[E, B]":
+            return (await run_async(r)).map(f)
+        return AsyncZIO(_map, ZIO.map(self, f)._run)
+
+    def map_error(self: "AsyncZIO[RR, EE, AA]", f: Callable[[EE], E2]) -> "AsyncZIO[RR, E2, AA]":
+        run_async = self._run_async
+
+        async def _map_error(r: RR) -> "Either[E2, AA]":
+            return (await run_async(r)).map_left(f)
+        return AsyncZIO(_map_error, ZIO.map_error(self, f)._run)
+
+    def flat_map(
+        self: "AsyncZIO[RR, E, AA]",
+        f: Callable[[AA], ZIO[RR, EE, B]]
+    ) -> "AsyncZIO[RR, Union[E, EE], B]":
+        run_async = self._run_async
+
+        async def _flat_map(r: RR) -> "Either[Union[E, EE], B]":
+            _checkpoint()
+            result = await run_async(r)
+            if isinstance(result, Left):
+                return result
+            return await _run_step(f(cast("Right[AA]", result).value), r)
+        return AsyncZIO(_flat_map, ZIO.flat_map(self, f)._run)
+
+    def catch(self: "AsyncZIO[R, E, AA]", exc: Type[X]) -> "AsyncZIO[R, Union[E, X], AA]":
+        run_async = self._run_async
+
+        async def _catch(r: R) -> "Either[Union[E, X], AA]":
+            try:
+                return await run_async(r)
+            except exc as e:
+                hooks = _active_hooks.get()
+                if hooks is not None:
+                    hooks.on_catch(e)
+                return Left(e)
+        return AsyncZIO(_catch, ZIO.catch(self, exc)._run)
+
+    def either(self) -> "AsyncZIO[R, NoReturn, Either[E, A]]":
+        run_async = self._run_async
+
+        async def _either(r: R) -> "Right[Either[E, A]]":
+            return Right(await run_async(r))
+        return AsyncZIO(_either, ZIO.either(self)._run)
+
+    def provide(self, r: R) -> "AsyncZIO[object, E, A]":
+        run_async = self._run_async
+        return AsyncZIO(lambda _: run_async(r), ZIO.provide(self, r)._run)
+
+
+def access_m(f: Callable[[R], ZIO[R, E, A]]) -> "AsyncZIO[R, E, A]":
+    """
+    Like `ZIO.access_m`, but awaits the program returned by `f` natively when
+    it is asynchronous. Use it for accessors of services with asynchronous
+    implementations.
+    """
+    async def _access_m(r: R) -> "Either[E, A]":
+        return await _run_step(f(r), r)
+    return AsyncZIO(_access_m, ZIO.access_m(f)._run)
+
+
+def from_coroutine(
+    make: Callable[[], Awaitable[AA]],
+    exception_type: Union[Type[X], Tuple[Type[X], ...], None] = None
+) -> "AsyncZIO[object, X, AA]":
+    """
+    A program that awaits the awaitable returned by `make`. Exceptions of
+    `exception_type` are moved into the error channel, whether the awaitable
+    raises them or they are delivered to a thread waiting for it (such as a
+    KeyboardInterrupt).
+    """
+    async def _await(_: object) -> "Either[X, AA]":
+        return Right(await make())
+
+    if exception_type is None:
+        return AsyncZIO(_await)
+    # Narrowed once here, since the narrowing does not carry into closures.
+    caught: Union[Type[X], Tuple[Type[X], ...]] = exception_type
+
+    async def _run_async(_: object) -> "Either[X, AA]":
+        try:
+            return Right(await make())
+        except caught as e:
+            return Left(e)
+
+    def _run(_: object) -> "Either[X, AA]":
+        try:
+            return _wait(_submit(lambda: _run_async(None)))
+        except caught as e:
+            return Left(e)
+    return AsyncZIO(_run_async, _run)
+
+
+async def _run_step(zio: ZIO[R, E, A], environment: R) -> Either[E, A]:
+    """
+    Awaits an asynchronous program natively. A program that blocks (a
+    `BlockingZIO`) runs on the loop's default executor, and any other program
+    runs inline, on the loop's thread.
+    """
+    if isinstance(zio, AsyncZIO):
+        return await zio._run_async(environment)
+    if isinstance(zio, BlockingZIO):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            None, context.run, zio._run, environment
+        )
+    return zio._run(environment)
+
+
+class ZIOMonadAsync(Generic[R, EE]):
+    """The `do` argument of a `monadic_async` function: `await (do << zio)`."""
+    def __init__(self, environment: R) -> None:
+        self._environment = environment
+
+    def __lshift__(self, arg: ZIO[R, EE, BB]) -> Awaitable[BB]:
+        return self._step(arg)
+
+    async def _step(self, arg: ZIO[R, EE, BB]) -> BB:
+        _checkpoint()
+        result = await _run_step(arg, self._environment)
+        if isinstance(result, Left):
+            raise _RaiseLeft(result.value, result)
+        return cast("Right[BB]", result).value
+
+
+def monadic_async(func: F) -> F:
+    """
+    The `async def` counterpart of `@monadic`: the decorated coroutine
+    function takes a `do: ZIOMonadAsync[R, E]` argument, returns a
+    `ZIO[R, E, A]`, and is turned into a function that returns that program.
+    """
+    @functools.wraps(func)
+    def _wrapper(*args: object, **kwargs: object) -> object:
+        async def _run_async(environment: Any) -> Either[Any, Any]:
+            _checkpoint()
+            try:
+                program = await func(do=ZIOMonadAsync(environment), *args, **kwargs)
+            except _RaiseLeft as raise_left:
+                if raise_left.left is not None:
+                    return raise_left.left
+                return Left(raise_left.value)
+            return await _run_step(program, environment)
+
+        return AsyncZIO(_run_async)
+    return _wrapper  # type: ignore
+
+
+async def unsafe_run_async(io: ZIO[object, X, AA], hooks: Optional[RuntimeHooks] = None) -> AA:
+    """
+    The asynchronous counterpart of `unsafe_run`, for use from coroutines.
+    Asynchronous programs, and synchronous ones that do not block, run on the
+    caller's event loop; blocking programs run on the loop's default executor.
+    """
+    token = _active_hooks.set(hooks) if hooks is not None else None
+    try:
+        result = await _run_step(io, None)
+        if hooks is not None and isinstance(result, Left):
+            hooks.on_failure("unsafe_run", result.value)
+        return result.fold(_raise, lambda a: a)
+    finally:
+        if token is not None:
+            _active_hooks.reset(token)
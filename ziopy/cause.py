@@ -0,0 +1,169 @@
+"""
+A structured description of why a program failed.
+
+A failing `ZIO` reports a single error `E` in a `Left`, or raises a defect.
+When several things go wrong at once (parallel branches that fail together,
+a finalizer that raises while the program is already failing), the complete
+`Cause` is attached to that `Left` or exception, and `ZIO.sandbox` exposes it:
+
+    unsafe_run(program.sandbox().either())  # Left(Both(Fail('a'), Die(...)))
+
+Causes only hold references to the errors and exceptions themselves; Python
+tracebacks are formatted only when `pretty` asks for them.
+"""
+import traceback
+from abc import ABCMeta
+from dataclasses import dataclass
+from typing import Any, Generic, Iterator, List, NoReturn, Optional, TypeVar
+
+from ziopy.either import Either, Left
+
+E = TypeVar('E', covariant=True)
+EE = TypeVar('EE')
+T = TypeVar('T')
+
+_CAUSE_ATTRIBUTE = "__zio_cause__"
+
+
+class Cause(Generic[E], metaclass=ABCMeta):
+    """A tree of failures (Fail), defects (Die) and interruptions (Interrupt)."""
+
+    def then(self, that: "Cause[EE]") -> "Cause[Any]":
+        """The cause of `that` happening after this (e.g. in a finalizer)."""
+        return Then(self, that)
+
+    def both(self, that: "Cause[EE]") -> "Cause[Any]":
+        """The cause of this and `that` happening concurrently."""
+        return Both(self, that)
+
+    def _leaves(self) -> Iterator["Cause[E]"]:
+        stack: List[Cause[E]] = [self]
+        while stack:
+            cause = stack.pop()
+            if isinstance(cause, (Then, Both)):
+                stack.append(cause.right)
+                stack.append(cause.left)
+            else:
+                yield cause
+
+    def failures(self) -> List[E]:
+        return [leaf.error for leaf in self._leaves() if isinstance(leaf, Fail)]
+
+    def defects(self) -> List[BaseException]:
+        return [leaf.exception for leaf in self._leaves() if isinstance(leaf, Die)]
+
+    def interruptions(self) -> List[int]:
+        """The ids of the interrupted fibers."""
+        return [leaf.fiber_id for leaf in self._leaves() if isinstance(leaf, Interrupt)]
+
+    @property
+    def is_failure(self) -> bool:
+        """True if this cause is a single, typed failure."""
+        return isinstance(self, Fail)
+
+    def pretty(self, tracebacks: bool = True) -> str:
+        """
+        Renders this cause as an indented tree. With `tracebacks`, the Python
+        traceback of every defect is included.
+        """
+        lines: List[str] = []
+        _render(self, "", "", tracebacks, lines)
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class Fail(Generic[E], Cause[E]):
+    error: E
+
+
+@dataclass(frozen=True)
+class Die(Cause[NoReturn]):
+    exception: BaseException
+
+
+@dataclass(frozen=True)
+class Interrupt(Cause[NoReturn]):
+    fiber_id: int
+
+
+@dataclass(frozen=True)
+class Then(Generic[E], Cause[E]):
+    left: Cause[E]
+    right: Cause[E]
+
+
+@dataclass(frozen=True)
+class Both(Generic[E], Cause[E]):
+    left: Cause[E]
+    right: Cause[E]
+
+
+def _render(cause: Cause, head: str, tail: str, tracebacks: bool, lines: List[str]) -> None:
+    if isinstance(cause, (Then, Both)):
+        lines.append(head + type(cause).__name__)
+        _render(cause.left, tail + "├─ ", tail + "│  ", tracebacks, lines)
+        _render(cause.right, tail + "└─ ", tail + "   ", tracebacks, lines)
+    elif isinstance(cause, Fail):
+        lines.append(f"{head}Fail: {cause.error!r}")
+    elif isinstance(cause, Die):
+        exception = cause.exception
+        summary = "".join(traceback.format_exception_only(type(exception), exception)).strip()
+        lines.append(f"{head}Die: {summary}")
+        if tracebacks and exception.__traceback__ is not None:
+            for line in "".join(traceback.format_tb(exception.__traceback__)).splitlines():
+                lines.append(f"{tail}   {line}")
+    else:
+        assert isinstance(cause, Interrupt)
+        lines.append(f"{head}Interrupt: fiber #{cause.fiber_id}")
+
+
+def attached_cause(value: object) -> Optional[Cause[Any]]:
+    """The cause attached to a `Left` or an exception, if any."""
+    return getattr(value, _CAUSE_ATTRIBUTE, None)
+
+
+def attach_cause(value: T, cause: Cause[Any]) -> T:
+    """
+    Attaches `cause` to a `Left` or an exception, so that it survives being
+    propagated as a plain error or defect.
+    """
+    object.__setattr__(value, _CAUSE_ATTRIBUTE, cause)
+    return value
+
+
+def cause_of_left(left: Left[EE]) -> Cause[EE]:
+    return attached_cause(left) or Fail(left.value)
+
+
+def cause_of_exception(exception: BaseException) -> Cause[NoReturn]:
+    cause = attached_cause(exception)
+    if cause is not None:
+        return cause
+    fiber_id = getattr(exception, "fiber_id", None)
+    if fiber_id is not None:
+        # FiberInterruption, or the FiberInterruptedError raised by joining an
+        # interrupted fiber.
+        return Interrupt(fiber_id)
+    return Die(exception)
+
+
+def to_either(cause: Cause[EE]) -> Either[EE, NoReturn]:
+    """
+    The inverse of the capture done by `ZIO.sandbox`: the first typed failure
+    becomes a `Left`, otherwise the first defect is raised. Either way, the
+    whole cause stays attached.
+    """
+    if isinstance(cause, Fail):
+        return Left(cause.error)
+    failures = cause.failures()
+    if failures:
+        return attach_cause(Left(failures[0]), cause)
+    defects = cause.defects()
+    if defects:
+        raise attach_cause(defects[0], cause)
+    raise attach_cause(_interruption_error(cause.interruptions()[0]), cause)
+
+
+def _interruption_error(fiber_id: int) -> BaseException:
+    from ziopy.zio import FiberInterruptedError
+    return FiberInterruptedError(fiber_id)
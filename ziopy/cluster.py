@@ -0,0 +1,520 @@
+"""
+Running serializable programs on worker processes, on this machine or others.
+
+A `Cluster` listens on a TCP address or a Unix socket, and workers connect to
+it. `start_workers` starts workers on this machine; on another machine, start
+them with the address of the cluster and its authentication key:
+
+    ZIOPY_CLUSTER_AUTHKEY=<cluster.authkey.hex()> python -m ziopy.cluster host:port
+
+Programs must be built with `ziopy.serializable`, and the modules of their
+functions must be importable on the workers:
+
+    with Cluster(address=("0.0.0.0", 7000)) as cluster:
+        cluster.start_workers(4)
+        result = unsafe_run(cluster.remote(program).either())
+
+Each worker runs one program at a time, and sends a heartbeat every
+`heartbeat_interval` seconds, even while it is busy. A worker is lost when its
+connection drops or when no message arrives for `heartbeat_timeout` seconds
+(a local worker that stops responding is killed). The program it was running
+fails with `WorkerLostError`, unless it was submitted as idempotent, in which
+case it is resubmitted to another worker, up to `max_attempts` times in all.
+Interrupting a `remote` program only withdraws it if it has not started yet;
+once it has, it runs to completion on its worker.
+
+Messages are pickled, so only let trusted workers connect: the authentication
+key (random by default) keeps others out.
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (Client, Connection, Listener, answer_challenge,
+                                        deliver_challenge)
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from ziopy import serializable
+from ziopy.aio import AsyncZIO, _wait
+from ziopy.either import Either, Left
+from ziopy.serializable import Program
+from ziopy.zio import ZIO
+
+A = TypeVar('A')
+E = TypeVar('E')
+
+Address = Union[Tuple[str, int], str]
+
+AUTHKEY_ENV = "ZIOPY_CLUSTER_AUTHKEY"
+
+
+class ClusterError(RuntimeError):
+    """The cluster could not run a program."""
+
+
+class WorkerLostError(ClusterError):
+    """The worker running a program disconnected or stopped responding."""
+
+
+class RemoteTaskError(ClusterError):
+    """The worker could not run a program (e.g. it failed to unpickle it)."""
+
+
+def format_address(address: Address) -> str:
+    """`host:port` for TCP addresses; Unix socket paths are left as they are."""
+    return address if isinstance(address, str) else f"{address[0]}:{address[1]}"
+
+
+def parse_address(text: str) -> Address:
+    """The inverse of `format_address`."""
+    host, sep, port = text.rpartition(":")
+    if sep and "/" not in text and port.isdigit():
+        return (host, int(port))
+    return text
+
+
+def _settle(
+    future: "concurrent.futures.Future[bytes]",
+    error: Optional[Exception] = None,
+    result: bytes = b""
+) -> None:
+    """Completes `future`, unless it already is (e.g. failed by `close`)."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        pass
+
+
+def _shutdown(conn: Connection) -> None:
+    """Shuts down the socket of `conn`, which wakes up a thread blocked reading it."""
+    try:
+        with socket.socket(fileno=os.dup(conn.fileno())) as sock:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class _Task:
+    __slots__ = ("id", "data", "idempotent", "attempts", "future")
+
+    def __init__(self, id: int, data: bytes, idempotent: bool) -> None:
+        self.id = id
+        self.data = data
+        self.idempotent = idempotent
+        self.attempts = 0
+        self.future: "concurrent.futures.Future[bytes]" = concurrent.futures.Future()
+
+
+class _Worker:
+    __slots__ = ("conn", "host", "pid", "last_seen", "task", "lost", "send_lock")
+
+    def __init__(self, conn: Connection, host: str, pid: int) -> None:
+        self.conn = conn
+        self.host = host
+        self.pid = pid
+        self.last_seen = time.monotonic()
+        self.task: Optional[_Task] = None
+        self.lost = False
+        self.send_lock = threading.Lock()
+
+    def send(self, message: tuple) -> None:
+        with self.send_lock:
+            self.conn.send(message)
+
+    def __repr__(self) -> str:
+        return f"{self.host}/{self.pid}"
+
+
+class Cluster:
+    """
+    Dispatches programs to the workers connected to `address` (by default, a
+    free port on the loopback interface). Workers must present `authkey`.
+    """
+    def __init__(
+        self,
+        address: Address = ("127.0.0.1", 0),
+        authkey: Optional[bytes] = None,
+        heartbeat_interval: float = 1.0,
+        heartbeat_timeout: float = 10.0,
+        max_attempts: int = 3
+    ) -> None:
+        if heartbeat_timeout <= heartbeat_interval:
+            raise ValueError("heartbeat_timeout must be longer than heartbeat_interval")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.authkey = authkey if authkey is not None else os.urandom(32)
+        self._heartbeat_interval = heartbeat_interval
+        self._heartbeat_timeout = heartbeat_timeout
+        self._max_attempts = max_attempts
+        # Connections are authenticated by the thread that serves them.
+        self._listener = Listener(address)
+        self._lock = threading.Lock()
+        self._workers_changed = threading.Condition(self._lock)
+        self._workers: List[_Worker] = []
+        self._pending: Deque[_Task] = collections.deque()
+        self._task_ids = itertools.count()
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self.resubmissions = 0
+        self._accepter = threading.Thread(
+            target=self._accept, name="ziopy-cluster-accept", daemon=True
+        )
+        self._accepter.start()
+
+    @property
+    def address(self) -> Address:
+        """The address to connect workers to (with the actual port, if 0 was given)."""
+        address: Address = self._listener.address
+        return address
+
+    @property
+    def workers(self) -> int:
+        """The number of connected workers."""
+        with self._lock:
+            return len(self._workers)
+
+    def start_workers(self, count: Optional[int] = None) -> None:
+        """Starts `count` (by default, one per CPU) worker processes on this machine."""
+        env = dict(os.environ)
+        env[AUTHKEY_ENV] = self.authkey.hex()
+        env["PYTHONPATH"] = os.pathsep.join(path or os.getcwd() for path in sys.path)
+        command = [sys.executable, "-m", "ziopy.cluster", format_address(self.address)]
+        for _ in range(count if count is not None else os.cpu_count() or 1):
+            process = subprocess.Popen(command, env=env)
+            with self._lock:
+                self._processes[process.pid] = process
+
+    def wait_for_workers(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Waits until at least `count` workers are connected; False on timeout."""
+        with self._workers_changed:
+            return self._workers_changed.wait_for(
+                lambda: len(self._workers) >= count or self._closed, timeout
+            ) and not self._closed
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                continue
+            if self._closed:
+                conn.close()
+                return
+            thread = threading.Thread(
+                target=self._serve, args=(conn,), name="ziopy-cluster-worker", daemon=True
+            )
+            with self._lock:
+                self._threads = [other for other in self._threads if other.is_alive()]
+                self._threads.append(thread)
+            thread.start()
+
+    def _authenticate(self, conn: Connection) -> bool:
+        """
+        Runs the authentication handshake that `Listener.accept` would, but on
+        this connection's thread, and for at most `heartbeat_timeout` seconds:
+        a peer that connects and never answers must not hold up the others.
+        """
+        lock = threading.Lock()
+        done = False
+
+        def _give_up() -> None:
+            with lock:
+                if not done:
+                    _shutdown(conn)
+
+        timer = threading.Timer(self._heartbeat_timeout, _give_up)
+        timer.daemon = True
+        timer.start()
+        try:
+            deliver_challenge(conn, self.authkey)
+            answer_challenge(conn, self.authkey)
+            return True
+        except (OSError, EOFError, AuthenticationError):
+            # E.g. a wrong authentication key, a silent peer, or the wake-up
+            # connection made by `close`.
+            return False
+        finally:
+            with lock:
+                done = True
+            timer.cancel()
+
+    def _serve(self, conn: Connection) -> None:
+        if not self._authenticate(conn):
+            conn.close()
+            return
+        try:
+            if not conn.poll(self._heartbeat_timeout):
+                conn.close()
+                return
+            _, host, pid = conn.recv()
+            conn.send(("welcome", self._heartbeat_interval))
+        except (OSError, EOFError, TypeError, ValueError, pickle.UnpicklingError):
+            conn.close()
+            return
+        worker = _Worker(conn, host, pid)
+        with self._lock:
+            if self._closed:
+                worker.lost = True
+            else:
+                self._workers.append(worker)
+                self._workers_changed.notify_all()
+        self._dispatch()
+        try:
+            while not worker.lost:
+                if conn.poll(self._heartbeat_interval):
+                    message = conn.recv()
+                    worker.last_seen = time.monotonic()
+                    self._handle(worker, message)
+                elif time.monotonic() - worker.last_seen > self._heartbeat_timeout:
+                    self._lose(worker, "it missed its heartbeats")
+        except (OSError, EOFError):
+            self._lose(worker, "its connection was lost")
+        finally:
+            if self._closed:
+                try:
+                    worker.send(("stop",))
+                except (OSError, ValueError):
+                    pass
+            conn.close()
+
+    def _handle(self, worker: _Worker, message: tuple) -> None:
+        kind = message[0]
+        if kind == "heartbeat":
+            return
+        with self._lock:
+            task = worker.task
+            if task is None or task.id != message[1]:
+                return
+            worker.task = None
+        if kind == "result":
+            _settle(task.future, result=message[2])
+        else:
+            _settle(task.future, RemoteTaskError(f"worker {worker}: {message[2]}"))
+        self._dispatch()
+
+    def _lose(self, worker: _Worker, reason: str) -> None:
+        with self._lock:
+            if worker.lost:
+                return
+            worker.lost = True
+            self._workers.remove(worker)
+            self._workers_changed.notify_all()
+            task, worker.task = worker.task, None
+            failed = None
+            if task is not None and not task.future.done():
+                if task.idempotent and task.attempts < self._max_attempts and not self._closed:
+                    self._pending.appendleft(task)
+                    self.resubmissions += 1
+                else:
+                    failed = task
+            process = self._processes.pop(worker.pid, None)
+        if process is not None and worker.host == socket.gethostname():
+            process.kill()
+            process.wait()
+        if failed is not None:
+            _settle(failed.future, WorkerLostError(
+                f"worker {worker} was lost after {failed.attempts} attempt(s): {reason}"
+            ))
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        assignments = []
+        with self._lock:
+            idle = [worker for worker in self._workers if worker.task is None]
+            while idle and self._pending:
+                task = self._pending.popleft()
+                if task.attempts == 0 and not task.future.set_running_or_notify_cancel():
+                    continue
+                worker = idle.pop()
+                worker.task = task
+                task.attempts += 1
+                assignments.append((worker, task))
+        for worker, task in assignments:
+            try:
+                worker.send(("task", task.id, task.data))
+            except (OSError, ValueError):
+                self._lose(worker, "its connection was lost")
+
+    def submit(self, data: bytes, idempotent: bool = False) -> "concurrent.futures.Future[bytes]":
+        """
+        Queues a program serialized with `serializable.dumps`. The future
+        holds the pickled `Either` that the program produced.
+        """
+        task = _Task(next(self._task_ids), data, idempotent)
+        with self._lock:
+            if self._closed:
+                task.future.set_exception(ClusterError("the cluster is closed"))
+                return task.future
+            self._pending.append(task)
+        self._dispatch()
+        return task.future
+
+    def remote(
+        self,
+        program: Program[E, A],
+        idempotent: bool = False
+    ) -> ZIO[object, Union[E, ClusterError], A]:
+        """
+        A program that runs `program` on one of the workers. It fails with
+        `program`'s error, or with a `ClusterError` if no worker could run it.
+        Only mark programs `idempotent` if running them twice is harmless:
+        they may be resubmitted after running partway on a lost worker.
+
+        Interrupting the returned program (or cancelling it) withdraws
+        `program` if no worker has started it yet. A worker cannot stop a
+        program it is running, though: it runs it to completion, and stays
+        busy until then; the result is discarded.
+        """
+        if not isinstance(program, Program):
+            raise TypeError(
+                f"{program!r} is not a serializable program; build it with ziopy.serializable"
+            )
+        data = serializable.dumps(program)
+
+        def _run(_: object) -> Either[Union[E, ClusterError], A]:
+            try:
+                payload = _wait(self.submit(data, idempotent))
+            except ClusterError as e:
+                return Left(e)
+            result: Either[E, A] = pickle.loads(payload)
+            return result
+
+        async def _run_async(_: object) -> Either[Union[E, ClusterError], A]:
+            try:
+                payload = await asyncio.wrap_future(self.submit(data, idempotent))
+            except ClusterError as e:
+                return Left(e)
+            result: Either[E, A] = pickle.loads(payload)
+            return result
+
+        return AsyncZIO(_run_async, _run)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Fails the programs that have not finished, stops the workers, and
+        waits up to `timeout` seconds for local workers to exit (then kills
+        them).
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._workers_changed.notify_all()
+            tasks = list(self._pending) + [w.task for w in self._workers if w.task is not None]
+            self._pending.clear()
+            for worker in self._workers:
+                worker.lost = True
+                worker.task = None
+            self._workers = []
+            threads = list(self._threads)
+            processes = list(self._processes.values())
+            self._processes.clear()
+        for task in tasks:
+            if task.attempts == 0 and not task.future.set_running_or_notify_cancel():
+                continue
+            _settle(task.future, ClusterError("the cluster was closed"))
+        self._wake_accepter()
+        self._accepter.join()
+        self._listener.close()
+        for thread in threads:
+            thread.join()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            try:
+                process.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def _wake_accepter(self) -> None:
+        address = self.address
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        try:
+            with socket.socket(family) as wake:
+                wake.connect(address)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "Cluster":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def serve(address: Address, authkey: bytes) -> None:
+    """
+    Runs a worker: connects to the cluster at `address`, and runs the programs
+    it sends until the cluster stops it or disconnects.
+    """
+    conn = Client(address, authkey=authkey)
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def _send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    def _beat(interval: float) -> None:
+        while not stopped.wait(interval):
+            try:
+                _send(("heartbeat",))
+            except (OSError, ValueError):
+                return
+
+    try:
+        _send(("hello", socket.gethostname(), os.getpid()))
+        _, interval = conn.recv()
+        threading.Thread(target=_beat, args=(interval,), daemon=True).start()
+        while True:
+            message = conn.recv()
+            if message[0] == "stop":
+                return
+            _, task_id, data = message
+            reply: tuple
+            try:
+                reply = ("result", task_id, serializable.run_serialized(data))
+            except Exception:
+                reply = ("error", task_id, traceback.format_exc())
+            _send(reply)
+    except (EOFError, OSError):
+        return
+    finally:
+        stopped.set()
+        conn.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m ziopy.cluster",
+        description=f"Runs a ziopy cluster worker. The key is read from ${AUTHKEY_ENV} (hex).",
+    )
+    parser.add_argument("address", help="host:port, or the path of a Unix socket")
+    args = parser.parse_args(argv)
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        parser.error(f"${AUTHKEY_ENV} is not set")
+    try:
+        serve(parse_address(args.address), bytes.fromhex(authkey))
+    except AuthenticationError:
+        parser.exit(1, f"the cluster at {args.address} rejected ${AUTHKEY_ENV}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from abc import ABCMeta
 from dataclasses import dataclass
-from typing import (Any, Callable, Generic, NoReturn, Optional, Type, TypeVar,
-                    Union)
+from typing import (Any, Callable, Generic, Iterable, List, NoReturn, Optional, Tuple,
+                    Type, TypeVar, Union)
 
 
 A = TypeVar('A', covariant=True)
@@ -59,6 +59,51 @@ class Either(Generic[A, B], metaclass=ABCMeta):
         else:
             raise TypeError()
 
+    @staticmethod
+    def traverse(
+        iterable: Iterable[A1],
+        f: "Callable[[A1], Either[AA, BB]]"
+    ) -> "Either[AA, List[BB]]":
+        """
+        Applies `f` to each element, collecting the values of the `Right`s.
+        Stops at (and returns) the first `Left`, without consuming the rest of
+        the iterable, which may be a generator.
+        """
+        values: List[BB] = []
+        append = values.append
+        for item in iterable:
+            result = f(item)
+            if isinstance(result, Left):
+                return result
+            append(result.value)  # type: ignore
+        return Right(values)
+
+    @staticmethod
+    def sequence(iterable: "Iterable[Either[AA, BB]]") -> "Either[AA, List[BB]]":
+        """
+        Turns an iterable of `Either`s into an `Either` of a list. Stops at (and
+        returns) the first `Left`.
+        """
+        values: List[BB] = []
+        append = values.append
+        for item in iterable:
+            if isinstance(item, Left):
+                return item
+            append(item.value)  # type: ignore
+        return Right(values)
+
+    @staticmethod
+    def partition(iterable: "Iterable[Either[AA, BB]]") -> Tuple[List[AA], List[BB]]:
+        """Splits an iterable of `Either`s into the values of its `Left`s and `Right`s."""
+        lefts: List[AA] = []
+        rights: List[BB] = []
+        for item in iterable:
+            if isinstance(item, Left):
+                lefts.append(item.value)
+            else:
+                rights.append(item.value)  # type: ignore
+        return lefts, rights
+
     def to_left(self: "Either[AA, NoReturn]") -> "Left[AA]":
         if not isinstance(self, Left):
             raise TypeError("to_left can only be called on an instance of Left.")
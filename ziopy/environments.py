@@ -1,7 +1,12 @@
 from dataclasses import dataclass
 
 import ziopy.services.console as console
+import ziopy.services.fs as fs
+import ziopy.services.metrics as metrics
+import ziopy.services.net as net
+import ziopy.services.process as process
 import ziopy.services.system as system
+from ziopy.zenvironment import ZEnvironment  # noqa: F401
 
 
 @dataclass(frozen=True)
@@ -17,3 +22,23 @@ class SystemEnvironment:
 @dataclass(frozen=True)
 class ConsoleSystemEnvironment(ConsoleEnvironment, SystemEnvironment):
     pass
+
+
+@dataclass(frozen=True)
+class MetricsEnvironment:
+    metrics: metrics.Metrics
+
+
+@dataclass(frozen=True)
+class ProcessEnvironment:
+    process: process.Process
+
+
+@dataclass(frozen=True)
+class FileSystemEnvironment:
+    file_system: fs.FileSystem
+
+
+@dataclass(frozen=True)
+class NetEnvironment:
+    net: net.Net
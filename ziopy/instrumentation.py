@@ -0,0 +1,243 @@
+"""
+Low-overhead instrumentation hooks for the `unsafe_run` interpreter.
+
+Hooks are installed for the duration of a single `unsafe_run` call:
+
+    collector = MetricsCollector()
+    unsafe_run(program, hooks=collector)
+    collector.histogram("fetch_user").percentile(99)
+
+When no hooks are installed, instrumented steps pay for a single context
+variable lookup. No spans or other per-step objects are ever allocated.
+"""
+import threading
+from contextvars import ContextVar
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+A = TypeVar('A')
+
+
+class RuntimeHooks:
+    """
+    Base class for interpreter instrumentation. Every method is a no-op, so
+    subclasses only need to override the events they care about.
+    """
+    def on_effect_start(self, label: str) -> None:
+        pass
+
+    def on_effect_end(self, label: str, elapsed_ns: int) -> None:
+        pass
+
+    def on_failure(self, label: str, error: object) -> None:
+        pass
+
+    def on_catch(self, exception: BaseException) -> None:
+        pass
+
+    def on_fiber_start(self, fiber: Any) -> None:
+        """Called on the new fiber's thread, before the fiber runs its program."""
+        pass
+
+    def on_fiber_end(self, fiber: Any) -> None:
+        """Called on the fiber's thread, after it has completed."""
+        pass
+
+
+class CompositeHooks(RuntimeHooks):
+    """Forwards every event to each of the given hooks, in order."""
+    def __init__(self, *hooks: RuntimeHooks) -> None:
+        self._hooks = hooks
+
+    def on_effect_start(self, label: str) -> None:
+        for hooks in self._hooks:
+            hooks.on_effect_start(label)
+
+    def on_effect_end(self, label: str, elapsed_ns: int) -> None:
+        for hooks in self._hooks:
+            hooks.on_effect_end(label, elapsed_ns)
+
+    def on_failure(self, label: str, error: object) -> None:
+        for hooks in self._hooks:
+            hooks.on_failure(label, error)
+
+    def on_catch(self, exception: BaseException) -> None:
+        for hooks in self._hooks:
+            hooks.on_catch(exception)
+
+    def on_fiber_start(self, fiber: Any) -> None:
+        for hooks in self._hooks:
+            hooks.on_fiber_start(fiber)
+
+    def on_fiber_end(self, fiber: Any) -> None:
+        for hooks in self._hooks:
+            hooks.on_fiber_end(fiber)
+
+
+_active_hooks: ContextVar[Optional[RuntimeHooks]] = ContextVar(
+    "ziopy_runtime_hooks", default=None
+)
+
+
+def timed(hooks: RuntimeHooks, label: str, thunk: Callable[[], A]) -> A:
+    """
+    Evaluates `thunk`, reporting its start, end and (if it raises) failure to
+    `hooks` under the given label.
+    """
+    hooks.on_effect_start(label)
+    start = perf_counter_ns()
+    try:
+        return thunk()
+    except BaseException as e:
+        hooks.on_failure(label, e)
+        raise
+    finally:
+        hooks.on_effect_end(label, perf_counter_ns() - start)
+
+
+class LatencyHistogram:
+    """
+    An HDR-style histogram of non-negative integer values (typically
+    nanoseconds). Values are grouped into log-linear buckets: every power of two
+    is split into 2**(precision_bits - 1) equally sized sub-buckets, which bounds
+    the relative error of any reported value by 2**-(precision_bits - 1).
+
+    Recording a value never allocates unless the histogram has to grow to
+    accommodate a value larger than any previously seen.
+    """
+    def __init__(self, precision_bits: int = 5) -> None:
+        if precision_bits < 1:
+            raise ValueError("precision_bits must be at least 1")
+        self._bits = precision_bits
+        self._half = 1 << (precision_bits - 1)
+        self._counts: List[int] = [0] * (1 << precision_bits)
+        self._total = 0
+        self._sum = 0
+        self._min: Optional[int] = None
+        self._max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self._bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _lower_bound(self, index: int) -> int:
+        if index < (1 << self._bits):
+            return index
+        shift = index // self._half - 1
+        return (index - shift * self._half) << shift
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            raise ValueError("LatencyHistogram can only record non-negative values")
+        index = self._index(value)
+        counts = self._counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self._total += 1
+        self._sum += value
+        if self._min is None or value < self._min:
+            self._min = value
+        if self._max is None or value > self._max:
+            self._max = value
+
+    @property
+    def count(self) -> int:
+        return self._total
+
+    @property
+    def total(self) -> int:
+        return self._sum
+
+    @property
+    def min(self) -> Optional[int]:
+        return self._min
+
+    @property
+    def max(self) -> Optional[int]:
+        return self._max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._sum / self._total if self._total else None
+
+    def percentile(self, p: float) -> Optional[int]:
+        """
+        Returns the lower bound of the bucket containing the p-th percentile
+        (0 <= p <= 100), clamped to the observed minimum and maximum.
+        """
+        if not 0 <= p <= 100:
+            raise ValueError("p must be between 0 and 100")
+        if self._total == 0:
+            return None
+        assert self._min is not None and self._max is not None
+        rank = max(1, -(-self._total * p // 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(max(self._lower_bound(index), self._min), self._max)
+        return self._max  # pragma: nocover
+
+    def buckets(self) -> Iterator[Tuple[int, int]]:
+        """Yields (bucket lower bound, count) pairs for every non-empty bucket."""
+        for index, count in enumerate(self._counts):
+            if count:
+                yield self._lower_bound(index), count
+
+
+class MetricsCollector(RuntimeHooks):
+    """
+    Aggregates per-label latency histograms, per-label failure counts, the
+    number of caught exceptions, and the number of steps (effects and labeled
+    regions) executed.
+    """
+    def __init__(self, precision_bits: int = 5) -> None:
+        self._precision_bits = precision_bits
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._failures: Dict[str, int] = {}
+        self._steps = 0
+        self._catches = 0
+
+    def on_effect_start(self, label: str) -> None:
+        with self._lock:
+            self._steps += 1
+
+    def on_effect_end(self, label: str, elapsed_ns: int) -> None:
+        with self._lock:
+            histogram = self._histograms.get(label)
+            if histogram is None:
+                histogram = self._histograms[label] = LatencyHistogram(self._precision_bits)
+            histogram.record(elapsed_ns)
+
+    def on_failure(self, label: str, error: object) -> None:
+        with self._lock:
+            self._failures[label] = self._failures.get(label, 0) + 1
+
+    def on_catch(self, exception: BaseException) -> None:
+        with self._lock:
+            self._catches += 1
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+    @property
+    def catches(self) -> int:
+        return self._catches
+
+    @property
+    def labels(self) -> List[str]:
+        return sorted(self._histograms)
+
+    def histogram(self, label: str) -> LatencyHistogram:
+        histogram = self._histograms.get(label)
+        if histogram is None:
+            raise KeyError(label)
+        return histogram
+
+    def failures(self, label: str) -> int:
+        return self._failures.get(label, 0)
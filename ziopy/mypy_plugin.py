@@ -1,11 +1,37 @@
+"""
+mypy plugin for ziopy.
+
+The plugin never mutates the types mypy hands to it; it always builds new
+ones. That keeps it safe to use with the incremental cache and with the mypy
+daemon (dmypy), which both reuse types across runs.
+"""
 import typing
-from mypy.nodes import Decorator
-from mypy.plugin import FunctionContext, MethodContext, Plugin, Type
+from mypy.nodes import Decorator, Import, ImportAll, ImportFrom, MypyFile
+from mypy.plugin import FunctionContext, MethodContext, Plugin, ReportConfigContext, Type
 import mypy.types as mt
 
+# Bump this whenever the plugin's behaviour changes, so that mypy invalidates
+# the cached results of modules that were checked with an older version.
+PLUGIN_VERSION = 3
+
+# Modules whose types the hooks below look up by name.
+_ZIO_MODULE = "ziopy.zio"
+_PRI_MED = 10  # mypy.build.PRI_MED
+
 
 class CustomPlugin(Plugin):
     def _analyze_decorator(self, function_ctx: FunctionContext) -> Type:
+        return self._analyze_monadic(function_ctx, "ziopy.zio.ZIOMonad")
+
+    def _analyze_async_decorator(self, function_ctx: FunctionContext) -> Type:
+        return self._analyze_monadic(function_ctx, "ziopy.aio.ZIOMonadAsync", is_async=True)
+
+    def _analyze_monadic(
+        self,
+        function_ctx: FunctionContext,
+        monad_fullname: str,
+        is_async: bool = False
+    ) -> Type:
         if isinstance(function_ctx.context, Decorator):
             t = function_ctx.context.type
             if isinstance(t, mt.CallableType):
@@ -17,18 +43,27 @@ class CustomPlugin(Plugin):
                         "You must supply an argument called 'do'",
                         function_ctx.context
                     )
+                    return function_ctx.default_return_type
 
                 # Ensure that the type of the "do" argument is ziopy.zio.ZIOMonad
+                # (ziopy.aio.ZIOMonadAsync for coroutine functions)
                 a = t.arg_types[idx]
-                if not isinstance(a, mt.Instance) or a.type.fullname != 'ziopy.zio.ZIOMonad':
+                if not isinstance(a, mt.Instance) or a.type.fullname != monad_fullname:
                     function_ctx.api.fail(
-                        "The 'do' parameter must be of type ziopy.zio.ZIOMonad",
+                        f"The 'do' parameter must be of type {monad_fullname}",
                         function_ctx.context
                     )
                     return function_ctx.default_return_type
 
-                # Ensure that the return type is ziopy.zio.ZIO
+                # Ensure that the return type is ziopy.zio.ZIO. The declared
+                # return type of an `async def` is wrapped in a Coroutine.
                 b = t.ret_type
+                if (
+                    is_async
+                    and isinstance(b, mt.Instance)
+                    and b.type.fullname == "typing.Coroutine"
+                ):
+                    b = b.args[2]
                 if not isinstance(b, mt.Instance) or b.type.fullname != "ziopy.zio.ZIO":
                     function_ctx.api.fail(
                         "The return value must be of type ziopy.zio.ZIO",
@@ -60,23 +95,31 @@ class CustomPlugin(Plugin):
                     )
                     return function_ctx.default_return_type
 
-                del t.arg_names[idx]
-                del t.arg_kinds[idx]
-                del t.arg_types[idx]
-                return t
+                return t.copy_modified(
+                    arg_types=t.arg_types[:idx] + t.arg_types[idx + 1:],
+                    arg_kinds=t.arg_kinds[:idx] + t.arg_kinds[idx + 1:],
+                    arg_names=t.arg_names[:idx] + t.arg_names[idx + 1:],
+                    ret_type=b
+                )
         return function_ctx.default_return_type
 
     def _analyze_method_context_from_callable(self, method_ctx: MethodContext) -> Type:
-        if not isinstance(method_ctx.default_return_type, mt.Instance):
-            return method_ctx.default_return_type
+        default_return_type = method_ctx.default_return_type
+        if not isinstance(default_return_type, mt.Instance):
+            return default_return_type
 
         function_type = method_ctx.arg_types[0][0]
         if not isinstance(function_type, mt.CallableType):
-            return method_ctx.default_return_type
+            return default_return_type
 
-        func_return_type = function_type.ret_type
-        method_ctx.default_return_type.args[2] = func_return_type
-        return method_ctx.default_return_type
+        args = list(default_return_type.args)
+        args[2] = function_type.ret_type
+        return mt.Instance(
+            default_return_type.type,
+            args,
+            line=default_return_type.line,
+            column=default_return_type.column
+        )
 
     def _analyze_method_context_to_callable(self, method_ctx: MethodContext) -> Type:
         if not isinstance(method_ctx.default_return_type, mt.CallableType):
@@ -92,11 +135,11 @@ class CustomPlugin(Plugin):
         if not isinstance(f_type, mt.CallableType):
             return method_ctx.default_return_type
 
-        method_ctx.default_return_type.arg_types = f_type.arg_types
-        method_ctx.default_return_type.arg_kinds = f_type.arg_kinds
-        method_ctx.default_return_type.arg_names = f_type.arg_names
-
-        return method_ctx.default_return_type
+        return method_ctx.default_return_type.copy_modified(
+            arg_types=f_type.arg_types,
+            arg_kinds=f_type.arg_kinds,
+            arg_names=f_type.arg_names
+        )
 
     def get_function_hook(
         self,
@@ -104,6 +147,8 @@ class CustomPlugin(Plugin):
     ) -> typing.Optional[typing.Callable[[FunctionContext], Type]]:
         if fullname == "ziopy.zio.monadic":
             return self._analyze_decorator
+        elif fullname == "ziopy.aio.monadic_async":
+            return self._analyze_async_decorator
         return None
 
     def get_method_hook(
@@ -116,6 +161,30 @@ class CustomPlugin(Plugin):
             return self._analyze_method_context_to_callable
         return None
 
+    def report_config_data(self, ctx: ReportConfigContext) -> typing.Any:
+        # Part of every module's cache metadata: changing it invalidates the cache.
+        return {"ziopy_plugin_version": PLUGIN_VERSION}
+
+    def get_additional_deps(self, file: MypyFile) -> typing.List[typing.Tuple[int, str, int]]:
+        """
+        Makes every module that uses ziopy depend on `ziopy.zio`, so that the
+        types the hooks refer to are always loaded, even in incremental runs
+        where only some modules are re-checked. Modules that don't import
+        ziopy, and ziopy's own modules, get no extra dependencies.
+        """
+        if file.fullname.startswith("ziopy.") or file.fullname == "ziopy":
+            return []
+        for imp in file.imports:
+            if isinstance(imp, Import):
+                names = [name for name, _ in imp.ids]
+            elif isinstance(imp, (ImportFrom, ImportAll)):
+                names = [imp.id]
+            else:  # pragma: nocover
+                continue
+            if any(name == "ziopy" or name.startswith("ziopy.") for name in names):
+                return [(_PRI_MED, _ZIO_MODULE, -1)]
+        return []
+
 
 def plugin(version: str) -> typing.Type[CustomPlugin]:
     return CustomPlugin
@@ -0,0 +1,217 @@
+"""
+Running CPU-bound functions in parallel, on a choice of execution backends.
+
+Fibers run on threads, which only run Python code in parallel on the
+free-threaded interpreter. On the standard interpreter, CPU-bound work needs
+separate interpreters:
+
+    squares = parallel.traverse_par(range(1000), square, backend="process")
+
+- "thread": a thread pool. Cheapest to start, and shares memory with the
+  caller, but the Global Interpreter Lock serializes Python code.
+- "process": a process pool (started with forkserver where available, since
+  the caller may already be running threads).
+- "subinterpreter": a pool of isolated interpreters in this process (PEP 734,
+  Python 3.14+), which start faster and use less memory than processes.
+
+With the "process" and "subinterpreter" backends, the function and its
+arguments and results are pickled, so the function must be importable (a
+module-level function, not a lambda or closure).
+"""
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, TypeVar
+
+from typing_extensions import Literal
+
+from ziopy.aio import AsyncZIO, _wait
+from ziopy.either import Either, Left, Right
+from ziopy.zio import ZIO
+
+A = TypeVar('A')
+B = TypeVar('B')
+T = TypeVar('T')
+
+Backend = Literal["thread", "process", "subinterpreter"]
+
+BACKENDS = ("thread", "process", "subinterpreter")
+
+_CHUNKS_PER_WORKER = 4
+
+_executors_lock = threading.Lock()
+_executors: Dict[str, concurrent.futures.Executor] = {}
+_workers: Dict[str, int] = {}
+
+
+class BackendUnavailableError(RuntimeError):
+    """The requested backend is not supported by this Python interpreter."""
+
+
+def _default_workers(backend: str) -> int:
+    cpus = os.cpu_count() or 1
+    # The defaults of the executors themselves, chosen here so that they are known.
+    return cpus if backend == "process" else min(32, cpus + 4)
+
+
+def _new_executor(backend: str, workers: int) -> concurrent.futures.Executor:
+    if backend == "thread":
+        return concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix="ziopy-parallel"
+        )
+    if backend == "process":
+        methods = multiprocessing.get_all_start_methods()
+        method = "forkserver" if "forkserver" in methods else "spawn"
+        return concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context(method)
+        )
+    interpreter_pool = getattr(concurrent.futures, "InterpreterPoolExecutor", None)
+    if interpreter_pool is None:
+        raise BackendUnavailableError(
+            'backend="subinterpreter" needs Python 3.14 or later '
+            "(concurrent.futures.InterpreterPoolExecutor, PEP 734); "
+            'use backend="process" on this interpreter'
+        )
+    return interpreter_pool(workers)
+
+
+def _check_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}; expected one of {BACKENDS}")
+
+
+def _executor_and_workers(backend: str) -> Tuple[concurrent.futures.Executor, int]:
+    _check_backend(backend)
+    with _executors_lock:
+        if backend not in _executors:
+            workers = _default_workers(backend)
+            _executors[backend] = _new_executor(backend, workers)
+            _workers[backend] = workers
+        return _executors[backend], _workers[backend]
+
+
+def executor(backend: Backend) -> concurrent.futures.Executor:
+    """The shared executor of `backend`, created on first use."""
+    return _executor_and_workers(backend)[0]
+
+
+def shutdown(wait: bool = True) -> None:
+    """
+    Shuts down the shared executors. They are recreated if used again, even
+    by programs built before the shutdown.
+    """
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+        _workers.clear()
+    for pool in executors:
+        pool.shutdown(wait=wait)
+
+
+def _apply_chunk(f: Callable[[A], B], chunk: Sequence[A]) -> List[B]:
+    return [f(item) for item in chunk]
+
+
+def _in_executor(
+    backend: str,
+    submit: Callable[
+        [concurrent.futures.Executor, int], List["concurrent.futures.Future[T]"]
+    ],
+    finish: Callable[[List[T]], B]
+) -> "ZIO[object, Exception, B]":
+    """
+    Waits for the futures that `submit` starts on the executor of `backend`
+    (given its number of workers), which is resolved when the program runs.
+    The first exception fails the program, and cancels the futures that have
+    not started yet; so does interrupting (or cancelling) the wait.
+    """
+    _check_backend(backend)
+
+    def _cancel(futures: List["concurrent.futures.Future[T]"]) -> None:
+        for future in futures:
+            future.cancel()
+
+    def _run(_: object) -> Either[Exception, B]:
+        try:
+            futures = submit(*_executor_and_workers(backend))
+        except Exception as e:
+            return Left(e)
+        results = []
+        try:
+            for future in futures:
+                results.append(_wait(future))
+        except Exception as e:
+            _cancel(futures)
+            return Left(e)
+        except BaseException:
+            _cancel(futures)
+            raise
+        return Right(finish(results))
+
+    async def _run_async(_: object) -> Either[Exception, B]:
+        try:
+            futures = submit(*_executor_and_workers(backend))
+        except Exception as e:
+            return Left(e)
+        try:
+            results = await asyncio.gather(*map(asyncio.wrap_future, futures))
+        except Exception as e:
+            _cancel(futures)
+            return Left(e)
+        except BaseException:
+            _cancel(futures)
+            raise
+        return Right(finish(results))
+
+    return AsyncZIO(_run_async, _run)
+
+
+def effect(
+    f: Callable[..., B],
+    *args: object,
+    backend: Backend = "thread"
+) -> "ZIO[object, Exception, B]":
+    """
+    A program that calls `f(*args)` on `backend`. Fork it to run it in the
+    background; an exception raised by `f` becomes the program's error, as
+    does an unavailable backend.
+    """
+    def _submit(
+        pool: concurrent.futures.Executor,
+        _: int
+    ) -> List["concurrent.futures.Future[B]"]:
+        return [pool.submit(f, *args)]
+
+    return _in_executor(backend, _submit, lambda results: results[0])
+
+
+def traverse_par(
+    items: Iterable[A],
+    f: Callable[[A], B],
+    backend: Backend = "thread",
+    chunk_size: int = 0
+) -> "ZIO[object, Exception, List[B]]":
+    """
+    Applies `f` to every item in parallel on `backend`, and returns the
+    results in order. The items are sent in chunks of `chunk_size` (by
+    default, a few chunks per worker), so that small items do not each pay
+    for a round trip to a worker.
+    """
+    values = list(items)
+
+    def _submit(
+        pool: concurrent.futures.Executor,
+        workers: int
+    ) -> List["concurrent.futures.Future[List[B]]"]:
+        size = chunk_size or max(1, -(-len(values) // (workers * _CHUNKS_PER_WORKER)))
+        return [
+            pool.submit(_apply_chunk, f, values[i:i + size])
+            for i in range(0, len(values), size)
+        ]
+
+    def _flatten(chunks: List[List[B]]) -> List[B]:
+        return [result for chunk in chunks for result in chunk]
+
+    return _in_executor(backend, _submit, _flatten)
@@ -0,0 +1,226 @@
+"""
+An immutable hash array mapped trie (HAMT).
+
+Adding or removing a key copies only the O(log32 n) nodes on the path to that
+key; every other node is shared with the original map.
+"""
+from typing import Generic, Iterator, Optional, Tuple, TypeVar, Union, cast
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_HASH_MASK = (1 << _HASH_BITS) - 1
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+class _Leaf:
+    __slots__ = ("hash", "key", "value")
+
+    def __init__(self, hash: int, key: object, value: object) -> None:
+        self.hash = hash
+        self.key = key
+        self.value = value
+
+
+class _Collision:
+    """Holds every entry whose full hash is identical."""
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash: int, leaves: Tuple[_Leaf, ...]) -> None:
+        self.hash = hash
+        self.leaves = leaves
+
+
+class _Node:
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: Tuple["_Entry", ...]) -> None:
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+_Entry = Union[_Leaf, _Collision, _Node]
+
+_EMPTY_NODE = _Node(0, ())
+
+
+def _merge(shift: int, a: _Leaf, b: _Leaf) -> _Entry:
+    """Builds the smallest subtree (starting at `shift`) holding two distinct leaves."""
+    if shift >= _HASH_BITS:
+        return _Collision(a.hash, (a, b))
+    a_index = (a.hash >> shift) & _MASK
+    b_index = (b.hash >> shift) & _MASK
+    if a_index == b_index:
+        return _Node(1 << a_index, (_merge(shift + _BITS, a, b),))
+    if a_index < b_index:
+        return _Node((1 << a_index) | (1 << b_index), (a, b))
+    return _Node((1 << a_index) | (1 << b_index), (b, a))
+
+
+def _assoc(entry: _Entry, shift: int, leaf: _Leaf) -> Tuple[_Entry, bool]:
+    """Returns the updated entry, and whether a new key was added."""
+    if isinstance(entry, _Leaf):
+        if entry.key is leaf.key or entry.key == leaf.key:
+            return leaf, False
+        if entry.hash == leaf.hash:
+            return _Collision(leaf.hash, (entry, leaf)), True
+        return _merge(shift, entry, leaf), True
+
+    if isinstance(entry, _Collision):
+        for i, existing in enumerate(entry.leaves):
+            if existing.key is leaf.key or existing.key == leaf.key:
+                leaves = entry.leaves[:i] + (leaf,) + entry.leaves[i + 1:]
+                return _Collision(entry.hash, leaves), False
+        return _Collision(entry.hash, entry.leaves + (leaf,)), True
+
+    bit = 1 << ((leaf.hash >> shift) & _MASK)
+    position = _popcount(entry.bitmap & (bit - 1))
+    entries = entry.entries
+    if not entry.bitmap & bit:
+        return _Node(entry.bitmap | bit, entries[:position] + (leaf,) + entries[position:]), True
+    child, added = _assoc(entries[position], shift + _BITS, leaf)
+    return _Node(entry.bitmap, entries[:position] + (child,) + entries[position + 1:]), added
+
+
+def _dissoc(entry: _Entry, shift: int, hash: int, key: object) -> Optional[_Entry]:
+    """
+    Returns the updated entry (None if it became empty), or `entry` itself if
+    the key is absent.
+    """
+    if isinstance(entry, _Leaf):
+        return None if entry.key is key or entry.key == key else entry
+
+    if isinstance(entry, _Collision):
+        leaves = tuple(leaf for leaf in entry.leaves if not (leaf.key is key or leaf.key == key))
+        if len(leaves) == len(entry.leaves):
+            return entry
+        return leaves[0] if len(leaves) == 1 else _Collision(entry.hash, leaves)
+
+    bit = 1 << ((hash >> shift) & _MASK)
+    if not entry.bitmap & bit:
+        return entry
+    position = _popcount(entry.bitmap & (bit - 1))
+    child = entry.entries[position]
+    new_child = _dissoc(child, shift + _BITS, hash, key)
+    if new_child is child:
+        return entry
+    if new_child is None:
+        bitmap = entry.bitmap & ~bit
+        entries = entry.entries[:position] + entry.entries[position + 1:]
+        if not bitmap:
+            return None
+        if len(entries) == 1 and not isinstance(entries[0], _Node):
+            # Pull a lone leaf (or collision) up so that lookups stay shallow.
+            return entries[0]
+        return _Node(bitmap, entries)
+    entries = entry.entries[:position] + (new_child,) + entry.entries[position + 1:]
+    return _Node(entry.bitmap, entries)
+
+
+def _iterate(entry: _Entry) -> Iterator[_Leaf]:
+    if isinstance(entry, _Leaf):
+        yield entry
+    elif isinstance(entry, _Collision):
+        yield from entry.leaves
+    else:
+        for child in entry.entries:
+            yield from _iterate(child)
+
+
+class PersistentMap(Generic[K, V]):
+    """An immutable mapping whose `set` and `delete` return new maps."""
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, _root: _Node = _EMPTY_NODE, _size: int = 0) -> None:
+        self._root = _root
+        self._size = _size
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        hash_ = hash(key) & _HASH_MASK
+        entry: _Entry = self._root
+        shift = 0
+        while True:
+            if isinstance(entry, _Node):
+                bit = 1 << ((hash_ >> shift) & _MASK)
+                if not entry.bitmap & bit:
+                    return default
+                entry = entry.entries[_popcount(entry.bitmap & (bit - 1))]
+                shift += _BITS
+            elif isinstance(entry, _Leaf):
+                if entry.key is key or entry.key == key:
+                    return cast(V, entry.value)
+                return default
+            else:
+                for leaf in entry.leaves:
+                    if leaf.key is key or leaf.key == key:
+                        return cast(V, leaf.value)
+                return default
+
+    def __getitem__(self, key: K) -> V:
+        missing = object()
+        value = self.get(key, missing)  # type: ignore
+        if value is missing:
+            raise KeyError(key)
+        return cast(V, value)
+
+    def __contains__(self, key: object) -> bool:
+        missing = object()
+        return self.get(key, missing) is not missing  # type: ignore
+
+    def set(self, key: K, value: V) -> "PersistentMap[K, V]":
+        root, added = _assoc(self._root, 0, _Leaf(hash(key) & _HASH_MASK, key, value))
+        if not isinstance(root, _Node):  # pragma: nocover
+            raise AssertionError("The root of a PersistentMap must be a node")
+        return PersistentMap(root, self._size + added)
+
+    def delete(self, key: K) -> "PersistentMap[K, V]":
+        root = _dissoc(self._root, 0, hash(key) & _HASH_MASK, key)
+        if root is self._root:
+            raise KeyError(key)
+        if root is None:
+            return PersistentMap()
+        if not isinstance(root, _Node):
+            root = _Node(1 << (root.hash & _MASK), (root,))
+        return PersistentMap(root, self._size - 1)
+
+    def update(self, other: "PersistentMap[K, V]") -> "PersistentMap[K, V]":
+        """Returns a map with every entry of `other` added to (or replacing) this map's."""
+        if len(other) > len(self):
+            result = other
+            for key, value in self.items():
+                if key not in other:
+                    result = result.set(key, value)
+            return result
+        result = self
+        for key, value in other.items():
+            result = result.set(key, value)
+        return result
+
+    def items(self) -> Iterator[Tuple[K, V]]:
+        for leaf in _iterate(self._root):
+            yield cast(K, leaf.key), cast(V, leaf.value)
+
+    def __iter__(self) -> Iterator[K]:
+        for key, _ in self.items():
+            yield key
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PersistentMap):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        missing = object()
+        return all(other.get(key, missing) == value for key, value in self.items())
+
+    def __repr__(self) -> str:
+        contents = ", ".join(f"{key!r}: {value!r}" for key, value in self.items())
+        return f"PersistentMap({{{contents}}})"
@@ -0,0 +1,237 @@
+"""
+A work-stealing scheduler for fibers.
+
+By default every fiber started with `ZIO.fork` gets a thread of its own. On
+the free-threaded interpreter (3.13t and later), where threads run Python code
+in parallel, CPU-bound fibers are better served by a fixed number of worker
+threads:
+
+    with Scheduler(workers=8) as scheduler:
+        unsafe_run(pipeline, scheduler=scheduler)
+
+Each worker has a deque of fibers to start. A fiber forked on a worker is
+pushed onto that worker's deque, which the worker pops from the back (so
+related fibers run close together), and idle workers steal from the front of
+the others' deques. Fibers forked from outside the scheduler go to a shared
+queue.
+
+A fiber runs on the Python stack of its worker, so it stays on that thread
+until it completes. When it blocks (joining another fiber, sleeping, waiting
+for a callback, or running a `ZIO.blocking` section), the scheduler counts the
+worker as blocked and, if fibers are waiting to start, starts a spare worker
+in its place; surplus workers retire once the blocked ones resume. So a fiber
+can wait for fibers queued behind it without deadlocking the scheduler.
+"""
+import collections
+import os
+import random
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Callable, Deque, Iterator, List, Optional
+
+Task = Callable[[], None]
+
+
+class _Worker:
+    __slots__ = ("scheduler", "deque", "blocking_depth")
+
+    def __init__(self, scheduler: "Scheduler") -> None:
+        self.scheduler = scheduler
+        self.deque: Deque[Task] = collections.deque()
+        self.blocking_depth = 0
+
+
+class Scheduler:
+    """
+    Runs tasks (fibers) on `workers` threads (by default, one per CPU), with
+    work stealing. At most `max_threads` threads exist at once, counting the
+    spare workers started while others are blocked.
+    """
+    def __init__(self, workers: Optional[int] = None, max_threads: int = 256) -> None:
+        target = workers if workers is not None else _cpu_count()
+        if target < 1:
+            raise ValueError("workers must be at least 1")
+        if max_threads < target:
+            raise ValueError("max_threads must be at least workers")
+        self._target = target
+        self._max_threads = max_threads
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._shared: Deque[Task] = collections.deque()
+        self._workers: List[_Worker] = []
+        self._threads: List[threading.Thread] = []
+        self._local = threading.local()
+        self._active = 0
+        self._parked = 0
+        self._shutdown = False
+        self.steals = 0
+        self.threads_started = 0
+        with self._lock:
+            for _ in range(target):
+                self._start_worker()
+
+    def _current_worker(self) -> Optional[_Worker]:
+        worker = getattr(self._local, "worker", None)
+        return worker if worker is not None and worker.scheduler is self else None
+
+    def _start_worker(self) -> None:
+        # Called with the lock held.
+        worker = _Worker(self)
+        self._workers = self._workers + [worker]
+        self._active += 1
+        self.threads_started += 1
+        thread = threading.Thread(
+            target=self._work, args=(worker,), name=f"ziopy-worker-{self.threads_started}",
+            daemon=True
+        )
+        self._threads = [other for other in self._threads if other.is_alive()] + [thread]
+        thread.start()
+
+    def _has_work(self) -> bool:
+        return bool(self._shared) or any(worker.deque for worker in self._workers)
+
+    def _compensate(self) -> None:
+        """Starts a spare worker if fibers are waiting and no worker is free to start them."""
+        # Called with the lock held.
+        if (
+            self._parked == 0
+            and self._active < self._target
+            and len(self._workers) < self._max_threads
+            and self._has_work()
+        ):
+            self._start_worker()
+
+    def submit(self, task: Task) -> None:
+        worker = self._current_worker()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit to a scheduler that has been shut down")
+            (worker.deque if worker is not None else self._shared).append(task)
+            if self._parked:
+                self._work_available.notify()
+            else:
+                self._compensate()
+
+    @contextmanager
+    def blocking(self) -> Iterator[None]:
+        """
+        Marks the current worker as blocked for the duration of the block. It
+        does nothing on threads that are not workers of this scheduler.
+        """
+        worker = self._current_worker()
+        if worker is None:
+            yield
+            return
+        worker.blocking_depth += 1
+        if worker.blocking_depth == 1:
+            with self._lock:
+                self._active -= 1
+                self._compensate()
+        try:
+            yield
+        finally:
+            worker.blocking_depth -= 1
+            if worker.blocking_depth == 0:
+                with self._lock:
+                    self._active += 1
+                    if self._active > self._target and self._parked:
+                        # Wake up an idle worker, so that it retires.
+                        self._work_available.notify()
+
+    def _steal(self, thief: _Worker) -> Optional[Task]:
+        victims = self._workers
+        start = random.randrange(len(victims))
+        for i in range(len(victims)):
+            victim = victims[(start + i) % len(victims)]
+            if victim is thief:
+                continue
+            try:
+                task = victim.deque.popleft()
+            except IndexError:
+                continue
+            with self._lock:
+                self.steals += 1
+            return task
+        return None
+
+    def _next_task(self, worker: _Worker) -> Optional[Task]:
+        while True:
+            try:
+                return worker.deque.pop()
+            except IndexError:
+                pass
+            try:
+                return self._shared.popleft()
+            except IndexError:
+                pass
+            task = self._steal(worker)
+            if task is not None:
+                return task
+            with self._lock:
+                if self._has_work():
+                    continue
+                if self._shutdown or self._retire_if_surplus(worker):
+                    return None
+                self._parked += 1
+                self._work_available.wait()
+                self._parked -= 1
+
+    def _retire_if_surplus(self, worker: _Worker) -> bool:
+        # Called with the lock held.
+        if self._active <= self._target:
+            return False
+        self._active -= 1
+        self._workers = [other for other in self._workers if other is not worker]
+        if worker.deque:
+            self._shared.extend(worker.deque)
+            worker.deque.clear()
+            self._work_available.notify()
+        return True
+
+    def _work(self, worker: _Worker) -> None:
+        self._local.worker = worker
+        while True:
+            with self._lock:
+                if self._retire_if_surplus(worker):
+                    return
+            task = self._next_task(worker)
+            if task is None:
+                return
+            try:
+                task()
+            except BaseException:
+                # Fibers catch everything themselves; this keeps the worker
+                # alive if a task submitted directly does not.
+                sys.excepthook(*sys.exc_info())  # type: ignore
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops accepting tasks. The workers exit once every task that was
+        already submitted has started.
+        """
+        with self._lock:
+            self._shutdown = True
+            self._work_available.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+    def __enter__(self) -> "Scheduler":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
+
+    def __repr__(self) -> str:
+        return (
+            f"Scheduler(workers={self._target}, threads={len(self._workers)}, "
+            f"steals={self.steals})"
+        )
+
+
+def _cpu_count() -> int:
+    process_cpu_count = getattr(os, "process_cpu_count", None)
+    return (process_cpu_count() if process_cpu_count is not None else os.cpu_count()) or 1
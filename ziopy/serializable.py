@@ -0,0 +1,243 @@
+"""
+Programs that can be pickled, and so sent to other processes or machines.
+
+A `ZIO` is a closure, so it cannot be pickled. A serializable `Program`
+describes the same kind of computation as data instead (defunctionalization):
+its effects and continuations name registered, importable functions, and
+carry only data arguments. A worker turns it back into a `ZIO` with `to_zio`.
+
+    @serializable.function
+    def load(path: str) -> bytes: ...
+
+    @serializable.function
+    def checksum(data: bytes, algorithm: str) -> str: ...
+
+    program = serializable.effect(load, "/data/a").map(checksum, "sha256")
+    payload = serializable.dumps(program)   # Ship these bytes to a worker...
+    result = serializable.run_serialized(payload)   # ...which runs them.
+
+Functions are referenced by their module and qualified name, and are looked
+up in the registry (importing their module if needed) when the program runs.
+If `cloudpickle` is installed, unregistered functions, including lambdas and
+closures, are accepted too, and are pickled by value.
+
+Unpickling can run arbitrary code: only load programs from trusted sources.
+"""
+import importlib
+import pickle
+from abc import ABCMeta
+from dataclasses import dataclass
+from typing import (Any, Callable, Dict, Generic, NoReturn, Optional, Tuple, TypeVar, Union,
+                    cast)
+
+from ziopy import parallel
+from ziopy.either import Either
+from ziopy.zio import ZIO, unsafe_run
+
+try:
+    import cloudpickle
+except ImportError:  # pragma: nocover
+    cloudpickle = None
+
+A = TypeVar('A', covariant=True)
+E = TypeVar('E', covariant=True)
+
+AA = TypeVar('AA')
+B = TypeVar('B')
+EE = TypeVar('EE')
+F = TypeVar('F', bound=Callable)
+
+_registry: Dict[str, Callable] = {}
+
+
+class UnregisteredFunctionError(LookupError):
+    """A program refers to a function that is not in the registry."""
+
+
+def _name_of(f: Callable) -> str:
+    return f"{f.__module__}:{f.__qualname__}"
+
+
+def function(f: F) -> F:
+    """
+    Registers `f` for use in serializable programs. `f` must be importable,
+    i.e. defined at the top level of a module (or as a static method).
+    """
+    name = _name_of(f)
+    if "<lambda>" in name or "<locals>" in name:
+        raise ValueError(f"{name} is not importable, so it cannot be registered")
+    _registry[name] = f
+    return f
+
+
+def resolve(name: str) -> Callable:
+    """The registered function called `name`, importing its module if needed."""
+    if name not in _registry:
+        importlib.import_module(name.partition(":")[0])
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnregisteredFunctionError(
+            f"{name} is not registered; decorate it with @serializable.function"
+        ) from None
+
+
+@dataclass(frozen=True)
+class FunctionRef:
+    """A registered function, by name, or (with cloudpickle) any function, by value."""
+    name: str
+    function: Optional[Callable] = None
+
+    @staticmethod
+    def to(f: Callable) -> "FunctionRef":
+        name = _name_of(f)
+        if _registry.get(name) is f:
+            return FunctionRef(name)
+        if cloudpickle is not None:
+            return FunctionRef(name, f)
+        raise TypeError(
+            f"{name} cannot be serialized: register it with @serializable.function, "
+            "or install cloudpickle"
+        )
+
+    def resolve(self) -> Callable:
+        return self.function if self.function is not None else resolve(self.name)
+
+
+class Program(Generic[E, A], metaclass=ABCMeta):
+    """A serializable description of a `ZIO[object, E, A]`."""
+
+    def map(self, f: Callable[..., B], *args: Any) -> "Program[E, B]":
+        """Applies `f(value, *args)` to the result."""
+        return Map(self, FunctionRef.to(f), args)
+
+    def flat_map(
+        self,
+        f: "Callable[..., Program[EE, B]]",
+        *args: Any
+    ) -> "Program[Union[E, EE], B]":
+        """Continues with the program returned by `f(value, *args)`."""
+        return FlatMap(self, FunctionRef.to(f), args)
+
+    def to_zio(self) -> "ZIO[object, E, A]":
+        return _to_zio(self)
+
+
+@dataclass(frozen=True)
+class Succeed(Generic[A], Program[NoReturn, A]):
+    value: A
+
+
+@dataclass(frozen=True)
+class Fail(Generic[E], Program[E, NoReturn]):
+    error: E
+
+
+@dataclass(frozen=True)
+class Effect(Program[Any, Any]):
+    function: FunctionRef
+    args: Tuple[Any, ...]
+    kwargs: Tuple[Tuple[str, Any], ...]
+    total: bool
+
+
+@dataclass(frozen=True)
+class Map(Program[Any, Any]):
+    program: Program
+    function: FunctionRef
+    args: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class FlatMap(Program[Any, Any]):
+    program: Program
+    function: FunctionRef
+    args: Tuple[Any, ...]
+
+
+def succeed(value: AA) -> Program[Any, AA]:
+    return Succeed(value)
+
+
+def fail(error: EE) -> Program[EE, Any]:
+    return Fail(error)
+
+
+def effect(f: Callable[..., AA], *args: Any, **kwargs: Any) -> Program[Exception, AA]:
+    """Calls `f(*args, **kwargs)`; like `ZIO.effect`, an `Exception` becomes the error."""
+    return Effect(FunctionRef.to(f), args, tuple(kwargs.items()), total=False)
+
+
+def effect_total(f: Callable[..., AA], *args: Any, **kwargs: Any) -> Program[Any, AA]:
+    """Calls `f(*args, **kwargs)`, which is not expected to raise."""
+    return Effect(FunctionRef.to(f), args, tuple(kwargs.items()), total=True)
+
+
+def _continue(result: object) -> ZIO[object, Any, Any]:
+    if isinstance(result, Program):
+        return _to_zio(result)
+    if isinstance(result, ZIO):
+        return result
+    raise TypeError(f"a flat_map continuation returned {result!r}, not a Program")
+
+
+def _to_zio(program: Program[EE, AA]) -> ZIO[object, EE, AA]:
+    if isinstance(program, Succeed):
+        return ZIO.succeed(program.value)
+    if isinstance(program, Fail):
+        return ZIO.fail(program.error)
+    if isinstance(program, Effect):
+        f, args, kwargs = program.function.resolve(), program.args, dict(program.kwargs)
+        if program.total:
+            return ZIO.effect_total(lambda: f(*args, **kwargs))
+        # An `Effect` is a `Program[Exception, ...]`, so `EE` includes `Exception`.
+        return cast("ZIO[object, EE, AA]", ZIO.effect(lambda: f(*args, **kwargs)))
+    if isinstance(program, Map):
+        f, args = program.function.resolve(), program.args
+        return _to_zio(program.program).map(lambda a: f(a, *args))
+    if isinstance(program, FlatMap):
+        f, args = program.function.resolve(), program.args
+        return _to_zio(program.program).flat_map(lambda a: _continue(f(a, *args)))
+    raise TypeError(f"not a serializable program: {program!r}")
+
+
+def dumps(program: Program) -> bytes:
+    """Pickles `program`, with cloudpickle if it is installed."""
+    return (cloudpickle or pickle).dumps(program)
+
+
+def loads(data: bytes) -> Program:
+    program = pickle.loads(data)
+    if not isinstance(program, Program):
+        raise TypeError(f"not a serializable program: {program!r}")
+    return program
+
+
+def run(program: Program[EE, AA]) -> Either[EE, AA]:
+    """Runs `program` on the calling thread, capturing its success or failure."""
+    return unsafe_run(program.to_zio().either())
+
+
+def run_serialized(data: bytes) -> bytes:
+    """
+    The worker's side of shipping a program: unpickles it, runs it, and
+    pickles the resulting `Either`. Defects are raised.
+    """
+    return (cloudpickle or pickle).dumps(run(loads(data)))
+
+
+def on_backend(
+    program: Program[EE, AA],
+    backend: parallel.Backend = "process"
+) -> ZIO[object, Union[EE, Exception], AA]:
+    """
+    Runs `program` on one of the `ziopy.parallel` backends. Failures of the
+    program and exceptions of the backend (e.g. a crashed worker, or an
+    unavailable backend) are errors. The backend's executor is only started
+    when the returned program runs.
+    """
+    data = dumps(program)
+    results: ZIO[object, Exception, Either[EE, AA]] = parallel.effect(
+        run_serialized, data, backend=backend
+    ).map(pickle.loads)
+    return results.absolve()
@@ -1,8 +1,18 @@
+import asyncio
 import builtins
+import sys
+import threading
+import weakref
 from abc import ABCMeta, abstractmethod
-from typing import Callable, List, NoReturn, Optional, TypeVar, Union
+from collections import deque
+from enum import Enum
+from typing import (IO, Any, Callable, Deque, Iterable, List, NoReturn, Optional, TextIO,
+                    TypeVar, Union)
 
 import ziopy.services.mock_effects.console as console_effect
+from ziopy import aio
+from ziopy.aio import (ZIOMonadAsync, background_loop, from_coroutine, monadic_async,
+                       on_background_loop)
 from ziopy.either import Either, Right
 from ziopy.zio import ZIO, Environment, ZIOMonad, monadic
 from ziopy.services.system import System, HasSystem
@@ -24,6 +34,20 @@ class Console(metaclass=ABCMeta):
     ) -> ZIO[object, Union[EOFError, KeyboardInterrupt], str]:
         pass  # pragma: nocover
 
+    @monadic
+    def print_lines(
+        self,
+        lines: Iterable[str],
+        do: ZIOMonad[object, NoReturn]
+    ) -> ZIO[object, NoReturn, None]:
+        for line in lines:
+            do << self.print(line)
+        return ZIO.succeed(None)
+
+    def flush(self) -> ZIO[object, NoReturn, None]:
+        """Writes out any buffered output. Unbuffered consoles have nothing to do."""
+        return ZIO.succeed(None)
+
     @monadic
     def get_input_from_console(
         self,
@@ -41,6 +65,7 @@ class Console(metaclass=ABCMeta):
 
             if isinstance(keyboard_input, (EOFError, KeyboardInterrupt)):
                 do << self.print("")
+                do << self.flush()
                 system = do << Environment()
                 return system.exit()
 
@@ -51,15 +76,13 @@ class Console(metaclass=ABCMeta):
             if isinstance(parse_result, Right):
                 return ZIO.succeed(parse_result.value)
 
-    @monadic
     def ask(
         self,
         prompt: str,
-        default: Literal['y', 'n'],
-        do: ZIOMonad[System, NoReturn]
+        default: Literal['y', 'n']
     ) -> ZIO[System, NoReturn, bool]:
         default_str = 'Y/n' if default == 'y' else 'y/N'
-        choice = do << self.get_input_from_console(
+        return self.get_input_from_console(
             prompt=f"{prompt} [{default_str}]: ",
             parse_value=(
                 ZIO.from_callable(str)
@@ -69,14 +92,20 @@ class Console(metaclass=ABCMeta):
                 .to_callable()
             ),
             default_value=default
-        )
-        return ZIO.succeed(choice == 'y')
+        ).map(lambda choice: choice == 'y')
 
 
 class LiveConsole(Console):
     def print(self, line: str) -> ZIO[object, NoReturn, None]:
         return ZIO.effect_total(lambda: builtins.print(line))
 
+    def print_lines(self, lines: Iterable[str]) -> ZIO[object, NoReturn, None]:
+        def _print_lines() -> None:
+            printed = list(lines)
+            if printed:
+                builtins.print("\n".join(printed))
+        return ZIO.effect_total(_print_lines)
+
     def input(
         self,
         prompt: Optional[str] = None
@@ -87,26 +116,280 @@ class LiveConsole(Console):
                 EOFError
             )
             .catch(KeyboardInterrupt)
+            .blocking()
+        )
+
+
+class AsyncLiveConsole(LiveConsole):
+    """
+    A live console whose `input` reads standard input (or `stdin`) through an
+    asyncio stream reader on the shared background event loop, instead of
+    blocking a thread in `builtins.input`. Its `input` programs can be awaited
+    from `monadic_async` functions without blocking the event loop, and
+    interrupting a fiber that is waiting for input cancels the read.
+
+    The input stream is switched to non-blocking mode. If it cannot be read
+    through the event loop (e.g. it is a regular file), each line is read on
+    the loop's default executor instead.
+    """
+    def __init__(self, stdin: Optional[IO[Any]] = None) -> None:
+        self._stdin = stdin
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._transport: Optional[asyncio.BaseTransport] = None
+        self._use_executor = False
+        self._connected: Optional[asyncio.Future] = None
+        self._read_lock: Optional[asyncio.Lock] = None
+
+    def _input_stream(self) -> IO[Any]:
+        return self._stdin if self._stdin is not None else sys.stdin
+
+    def _binary_input(self) -> IO[bytes]:
+        stream = self._input_stream()
+        return getattr(stream, "buffer", stream)
+
+    async def _connect(self) -> None:
+        binary = self._binary_input()
+        reader = asyncio.StreamReader()
+        try:
+            # The transport closes the stream when it is garbage collected, so
+            # it has to be kept alive.
+            self._transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), binary
+            )
+            self._reader = reader
+        except (OSError, ValueError, NotImplementedError):
+            self._use_executor = True
+
+    async def _read_line_on_loop(self) -> bytes:
+        if self._connected is None:
+            self._connected = asyncio.ensure_future(self._connect())
+            self._read_lock = asyncio.Lock()
+        # A read that is cancelled while connecting must not cancel (and so
+        # close) the connection itself.
+        await asyncio.shield(self._connected)
+        assert self._read_lock is not None
+        async with self._read_lock:
+            if self._reader is not None:
+                return await self._reader.readline()
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._binary_input().readline
+            )
+
+    async def _read_line(self, prompt: Optional[str]) -> str:
+        if prompt is not None:
+            sys.stdout.write(prompt)
+            sys.stdout.flush()
+        line = await on_background_loop(self._read_line_on_loop)
+        if not line:
+            raise EOFError("EOF when reading a line")
+        encoding = getattr(self._input_stream(), "encoding", None) or "utf-8"
+        return line.decode(encoding).rstrip("\r\n")
+
+    def close(self) -> None:
+        """
+        Stops reading the input stream through the event loop, and closes it.
+        Blocks until the loop has let go of the stream's file descriptor.
+        """
+        transport, self._transport = self._transport, None
+        self._reader = None
+        self._connected = None
+        if transport is None:
+            return
+        loop = background_loop()
+        if _running_loop_is(loop):
+            transport.close()
+        else:
+            loop.call_soon_threadsafe(transport.close)
+            # Wait for a callback scheduled after the close has been processed.
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result()
+
+    def input(
+        self,
+        prompt: Optional[str] = None
+    ) -> ZIO[object, Union[EOFError, KeyboardInterrupt], str]:
+        return from_coroutine(
+            lambda: self._read_line(prompt),
+            (EOFError, KeyboardInterrupt)
         )
 
+    @monadic_async
+    async def get_input_from_console(
+        self,
+        prompt: str,
+        parse_value: Callable[[str], Either[E, A]],
+        default_value: Optional[A],
+        do: ZIOMonadAsync[System, NoReturn]
+    ) -> ZIO[System, NoReturn, A]:
+        # `Console.get_input_from_console`, awaiting each read on the event loop.
+        while True:
+            keyboard_input = await (do << (
+                self.input(prompt)
+                .either()
+                .map(lambda e: e.to_union())
+            ))
+
+            if isinstance(keyboard_input, (EOFError, KeyboardInterrupt)):
+                await (do << self.print(""))
+                await (do << self.flush())
+                system = await (do << Environment[System]())
+                return system.exit()
+
+            if keyboard_input == '' and default_value is not None:
+                return ZIO.succeed(default_value)
+
+            parse_result = parse_value(keyboard_input)
+            if isinstance(parse_result, Right):
+                return ZIO.succeed(parse_result.value)
+
+
+def _running_loop_is(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+class FlushPolicy(Enum):
+    LINE = "line"
+    """Flush after every write that contains a newline."""
+
+    SIZE = "size"
+    """Flush once the buffer holds at least `buffer_size` characters."""
+
+    AUTO = "auto"
+    """`LINE` if the output stream is a TTY, `SIZE` otherwise."""
+
+
+class _OutputBuffer:
+    """
+    The output of a `BufferedLiveConsole` that has not been written yet. It is
+    kept apart from the console so that it can be flushed when the console is
+    garbage collected.
+    """
+    def __init__(self, stream: Optional[TextIO]) -> None:
+        self._stream = stream
+        self.parts: List[str] = []
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def output(self) -> TextIO:
+        return self._stream if self._stream is not None else sys.stdout
+
+    def flush_locked(self) -> None:
+        if self.parts:
+            text = "".join(self.parts)
+            self.parts.clear()
+            self.size = 0
+            output = self.output()
+            output.write(text)
+            output.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            self.flush_locked()
+
+
+class BufferedLiveConsole(LiveConsole):
+    """
+    A live console that accumulates output in memory and writes it to the
+    output stream (`sys.stdout` by default) in large chunks, which avoids one
+    write system call per line when stdout is a pipe or a file.
+
+    Buffered output is always flushed before reading input, before
+    `get_input_from_console` exits the program, and when the console is
+    garbage collected or the interpreter exits.
+    """
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        flush_policy: FlushPolicy = FlushPolicy.AUTO,
+        buffer_size: int = 65536
+    ) -> None:
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be at least 1")
+        self._buffer = _OutputBuffer(stream)
+        if flush_policy is FlushPolicy.AUTO:
+            isatty = self._buffer.output().isatty()
+            flush_policy = FlushPolicy.LINE if isatty else FlushPolicy.SIZE
+        self._flush_policy = flush_policy
+        self._buffer_size = buffer_size
+        # Also runs at exit, through a single atexit hook shared by all finalizers.
+        weakref.finalize(self, self._buffer.flush)
+
+    @property
+    def flush_policy(self) -> FlushPolicy:
+        return self._flush_policy
+
+    def _write(self, text: str) -> None:
+        buffer = self._buffer
+        with buffer.lock:
+            buffer.parts.append(text)
+            buffer.size += len(text)
+            if self._flush_policy is FlushPolicy.LINE or buffer.size >= self._buffer_size:
+                buffer.flush_locked()
+
+    def print(self, line: str) -> ZIO[object, NoReturn, None]:
+        return ZIO.effect_total(lambda: self._write(line + "\n"))
+
+    def print_lines(self, lines: Iterable[str]) -> ZIO[object, NoReturn, None]:
+        return ZIO.effect_total(lambda: self._write("".join(line + "\n" for line in lines)))
+
+    def flush(self) -> ZIO[object, NoReturn, None]:
+        return ZIO.effect_total(self._buffer.flush)
+
+    def input(
+        self,
+        prompt: Optional[str] = None
+    ) -> ZIO[object, Union[EOFError, KeyboardInterrupt], str]:
+        read = super().input(prompt)
+        return self.flush().flat_map(lambda _: read)
+
+
+ConsoleEffect = Union[console_effect.Print, console_effect.Input]
+UserInput = Union[EOFError, KeyboardInterrupt, str]
+
+_PRINT = 0
+_INPUT = 1
+
 
 class MockConsole(Console):
-    def __init__(self, user_input: List[Union[EOFError, KeyboardInterrupt, str]] = None) -> None:
-        self._effects: List[Union[console_effect.Print, console_effect.Input]] = []
-        if user_input is None:
-            user_input = []
-        self._user_input = user_input
+    """
+    A console for tests. User input is consumed from a queue, and every print
+    and input is recorded in a columnar log that is only materialized into
+    `console_effect` objects when `effects` is read.
+
+    If `max_effects` is given, only the most recent `max_effects` effects are
+    kept.
+    """
+    def __init__(
+        self,
+        user_input: Optional[Iterable[UserInput]] = None,
+        max_effects: Optional[int] = None
+    ) -> None:
+        if max_effects is not None and max_effects < 0:
+            raise ValueError("max_effects must be non-negative")
+        self._user_input: Deque[UserInput] = deque(user_input or ())
+        self._kinds: Deque[int] = deque(maxlen=max_effects)
+        self._values: Deque[UserInput] = deque(maxlen=max_effects)
+        self._prompts: Deque[Optional[str]] = deque(maxlen=max_effects)
+        self._materialized: Optional[List[ConsoleEffect]] = None
+
+    def _record(self, kind: int, value: UserInput, prompt: Optional[str]) -> None:
+        self._kinds.append(kind)
+        self._values.append(value)
+        self._prompts.append(prompt)
+        self._materialized = None
 
     def print(self, line: str) -> ZIO[object, NoReturn, None]:
-        self._effects.append(console_effect.Print(line))
+        self._record(_PRINT, line, None)
         return ZIO.succeed(None)
 
     def input(
         self,
         prompt: Optional[str] = None
     ) -> ZIO[object, Union[EOFError, KeyboardInterrupt], str]:
-        user_input = self._user_input.pop(0)
-        self._effects.append(console_effect.Input(prompt, user_input))
+        user_input = self._user_input.popleft()
+        self._record(_INPUT, user_input, prompt)
         if isinstance(user_input, str):
             return ZIO.succeed(user_input)
         else:
@@ -114,12 +397,22 @@ class MockConsole(Console):
             return ZIO.fail(result)
 
     @property
-    def effects(self) -> List[Union[console_effect.Print, console_effect.Input]]:
-        return self._effects
+    def effects(self) -> List[ConsoleEffect]:
+        if self._materialized is None:
+            self._materialized = [
+                console_effect.Print(value) if kind == _PRINT  # type: ignore
+                else console_effect.Input(prompt, value)
+                for kind, value, prompt in zip(self._kinds, self._values, self._prompts)
+            ]
+        return self._materialized
 
     @property
-    def user_input(self) -> List[Union[EOFError, KeyboardInterrupt, str]]:
-        return self._user_input
+    def effect_count(self) -> int:
+        return len(self._kinds)
+
+    @property
+    def user_input(self) -> List[UserInput]:
+        return list(self._user_input)
 
 
 class HasConsole(Protocol):
@@ -135,6 +428,20 @@ print = (
     .to_callable()
 )
 
+print_lines = (
+    Environment[HasConsole]()
+    .map(lambda env: ZIO.from_callable(env.console.print_lines).flatten())
+    .swap_environments()
+    .to_callable()
+)
+
+flush = (
+    Environment[HasConsole]()
+    .map(lambda env: ZIO.from_callable(env.console.flush).flatten())
+    .swap_environments()
+    .to_callable()
+)
+
 input = (
     Environment[HasConsole]()
     .map(lambda env: ZIO.from_callable(env.console.input).flatten())
@@ -152,17 +459,12 @@ def get_input_from_console(
     parse_value: Callable[[str], Either[E, A]],
     default_value: Optional[A]
 ) -> ZIO[HasConsoleSystem, NoReturn, A]:
-    return (
-        Environment[HasConsoleSystem]()
-        .flat_map(
-            lambda env: env.console.get_input_from_console(
-                prompt, parse_value, default_value
-            ).provide(env.system)
-        )
+    return aio.access_m(
+        lambda env: env.console.get_input_from_console(
+            prompt, parse_value, default_value
+        ).provide(env.system)
     )
 
 
 def ask(prompt: str, default: Literal['y', 'n']) -> ZIO[HasConsoleSystem, NoReturn, bool]:
-    return Environment[HasConsoleSystem]().flat_map(
-        lambda env: env.console.ask(prompt, default).provide(env.system)
-    )
+    return aio.access_m(lambda env: env.console.ask(prompt, default).provide(env.system))
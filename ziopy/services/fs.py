@@ -0,0 +1,352 @@
+"""
+Reading and writing files.
+
+Filesystem calls block, so the live implementation runs them on a thread pool
+of bounded size. Bulk operations (`read_many`, `write_many`) hand the pool a
+few batches of calls rather than one task per file, which keeps the cost of
+reading thousands of small files close to the cost of the reads themselves.
+"""
+import asyncio
+import concurrent.futures
+import errno
+import functools
+import os
+import stat as stat_module
+import threading
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass
+from typing import (Callable, Dict, Iterable, List, Mapping, NoReturn, Optional, Sequence,
+                    Tuple, TypeVar, Union, cast)
+from typing_extensions import Protocol
+
+import ziopy.services.mock_effects.fs as fs_effect
+from ziopy import aio
+from ziopy.aio import AsyncZIO, _wait
+from ziopy.either import Either, Left, Right
+from ziopy.zio import ZIO, ZIOMonad, monadic
+
+T = TypeVar('T')
+B = TypeVar('B')
+
+Path = Union[str, "os.PathLike[str]"]
+
+FileSystemEffect = Union[
+    fs_effect.ReadBytes, fs_effect.WriteBytes, fs_effect.Walk, fs_effect.Stat
+]
+
+_BATCHES_PER_WORKER = 4
+
+
+@dataclass(frozen=True)
+class FileStat:
+    size: int
+    mtime: float
+    is_dir: bool
+
+
+@monadic
+def _read_in_sequence(
+    fs: "FileSystem",
+    paths: List[Path],
+    do: ZIOMonad[object, OSError]
+) -> ZIO[object, OSError, List[bytes]]:
+    return ZIO.succeed([do << fs.read_bytes(path) for path in paths])
+
+
+@monadic
+def _write_in_sequence(
+    fs: "FileSystem",
+    files: List[Tuple[Path, bytes]],
+    do: ZIOMonad[object, OSError]
+) -> ZIO[object, OSError, None]:
+    for path, data in files:
+        do << fs.write_bytes(path, data)
+    return ZIO.succeed(None)
+
+
+class FileSystem(metaclass=ABCMeta):
+    @abstractmethod
+    def read_bytes(self, path: Path) -> ZIO[object, OSError, bytes]:
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def write_bytes(self, path: Path, data: bytes) -> ZIO[object, OSError, None]:
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def walk(self, root: Path) -> ZIO[object, OSError, List[str]]:
+        """The paths of all files under `root`, recursively, in sorted order."""
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def stat(self, path: Path) -> ZIO[object, OSError, FileStat]:
+        pass  # pragma: nocover
+
+    def read_many(self, paths: Iterable[Path]) -> ZIO[object, OSError, List[bytes]]:
+        """
+        The contents of each file, in order. Fails with the first error. This
+        default implementation reads the files one after the other.
+        """
+        return _read_in_sequence(self, list(paths))
+
+    def write_many(self, files: Mapping[Path, bytes]) -> ZIO[object, OSError, None]:
+        return _write_in_sequence(self, list(files.items()))
+
+
+def _read_bytes(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_bytes(path: Path, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _walk(root: Path) -> List[str]:
+    def _raise(error: OSError) -> NoReturn:
+        raise error
+
+    paths: List[str] = []
+    for directory, directories, files in os.walk(root, onerror=_raise):
+        directories.sort()
+        paths.extend(os.path.join(directory, name) for name in sorted(files))
+    return paths
+
+
+def _stat(path: Path) -> FileStat:
+    result = os.stat(path)
+    return FileStat(result.st_size, result.st_mtime, stat_module.S_ISDIR(result.st_mode))
+
+
+def _run_batch(
+    batch: Sequence[Callable[[], T]],
+    failed: threading.Event
+) -> Either[OSError, List[T]]:
+    results: List[T] = []
+    for call in batch:
+        if failed.is_set():
+            # Another batch has failed, so these results would be discarded.
+            break
+        try:
+            results.append(call())
+        except OSError as e:
+            failed.set()
+            return Left(e)
+    return Right(results)
+
+
+class LiveFileSystem(FileSystem):
+    """
+    A filesystem backed by the operating system. At most `max_workers`
+    calls (by default, the thread pool default) run at the same time.
+    """
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self._max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            self._max_workers, thread_name_prefix="ziopy-fs"
+        )
+
+    def _in_pool(
+        self,
+        calls: Sequence[Callable[[], T]],
+        finish: Callable[[List[T]], B]
+    ) -> ZIO[object, OSError, B]:
+        """
+        Runs `calls` on the pool in contiguous batches, and finishes with their
+        results, in order. The first failure stops the batches that are still
+        running, as does interrupting (or cancelling) the wait for them.
+        """
+        def _submit() -> Tuple[List["concurrent.futures.Future[Either[OSError, List[T]]]"],
+                               threading.Event]:
+            failed = threading.Event()
+            size = max(1, -(-len(calls) // (self._max_workers * _BATCHES_PER_WORKER)))
+            futures = [
+                self._executor.submit(_run_batch, calls[i:i + size], failed)
+                for i in range(0, len(calls), size)
+            ]
+            return futures, failed
+
+        def _collect(outcomes: Iterable[Either[OSError, List[T]]]) -> Either[OSError, B]:
+            results: List[T] = []
+            for outcome in outcomes:
+                if isinstance(outcome, Left):
+                    return outcome
+                results.extend(cast("Right[List[T]]", outcome).value)
+            return Right(finish(results))
+
+        def _abandon(
+            futures: List["concurrent.futures.Future[Either[OSError, List[T]]]"],
+            failed: threading.Event
+        ) -> None:
+            failed.set()
+            for future in futures:
+                future.cancel()
+
+        def _run(_: object) -> Either[OSError, B]:
+            futures, failed = _submit()
+            outcomes = []
+            try:
+                for future in futures:
+                    outcome = _wait(future)
+                    if isinstance(outcome, Left):
+                        _abandon(futures, failed)
+                        return outcome
+                    outcomes.append(outcome)
+            except BaseException:
+                _abandon(futures, failed)
+                raise
+            return _collect(outcomes)
+
+        async def _run_async(_: object) -> Either[OSError, B]:
+            futures, failed = _submit()
+            try:
+                outcomes = await asyncio.gather(*map(asyncio.wrap_future, futures))
+            except BaseException:
+                _abandon(futures, failed)
+                raise
+            return _collect(outcomes)
+
+        return AsyncZIO(_run_async, _run)
+
+    def _call(self, call: Callable[[], T]) -> ZIO[object, OSError, T]:
+        return self._in_pool([call], lambda results: results[0])
+
+    def read_bytes(self, path: Path) -> ZIO[object, OSError, bytes]:
+        return self._call(lambda: _read_bytes(path))
+
+    def write_bytes(self, path: Path, data: bytes) -> ZIO[object, OSError, None]:
+        return self._call(lambda: _write_bytes(path, data))
+
+    def walk(self, root: Path) -> ZIO[object, OSError, List[str]]:
+        return self._call(lambda: _walk(root))
+
+    def stat(self, path: Path) -> ZIO[object, OSError, FileStat]:
+        return self._call(lambda: _stat(path))
+
+    def read_many(self, paths: Iterable[Path]) -> ZIO[object, OSError, List[bytes]]:
+        return self._in_pool([functools.partial(_read_bytes, path) for path in paths], list)
+
+    def write_many(self, files: Mapping[Path, bytes]) -> ZIO[object, OSError, None]:
+        return self._in_pool([
+            functools.partial(_write_bytes, path, data) for path, data in files.items()
+        ], lambda _: None)
+
+    def close(self) -> None:
+        """Shuts down the thread pool, once the calls that are running complete."""
+        self._executor.shutdown(wait=True)
+
+
+def _not_found(path: str) -> FileNotFoundError:
+    return FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+
+class MockFileSystem(FileSystem):
+    """
+    An in-memory filesystem for tests. Directories exist implicitly, as the
+    parents of the files. Every call is recorded as an `fs_effect`.
+    """
+    def __init__(self, files: Optional[Mapping[Path, bytes]] = None) -> None:
+        self._files: Dict[str, bytes] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._effects: List[FileSystemEffect] = []
+        for path, data in (files or {}).items():
+            self._store(_normalize(path), data)
+
+    def _store(self, path: str, data: bytes) -> None:
+        self._files[path] = data
+        # A logical clock, so that later writes have later modification times.
+        self._mtimes[path] = float(len(self._mtimes) + 1)
+
+    def _is_dir(self, path: str) -> bool:
+        prefix = path.rstrip(os.sep) + os.sep
+        return any(name.startswith(prefix) for name in self._files)
+
+    # The files are looked up (and the calls recorded) when the programs run,
+    # so that they see the writes of the programs that ran before them.
+
+    def read_bytes(self, path: Path) -> ZIO[object, OSError, bytes]:
+        name = _normalize(path)
+
+        def _read(_: object) -> Either[OSError, bytes]:
+            self._effects.append(fs_effect.ReadBytes(name))
+            if name not in self._files:
+                return Left(_not_found(name))
+            return Right(self._files[name])
+        return ZIO(_read)
+
+    def write_bytes(self, path: Path, data: bytes) -> ZIO[object, OSError, None]:
+        name = _normalize(path)
+
+        def _write(_: object) -> Either[OSError, None]:
+            self._effects.append(fs_effect.WriteBytes(name, data))
+            self._store(name, data)
+            return Right(None)
+        return ZIO(_write)
+
+    def walk(self, root: Path) -> ZIO[object, OSError, List[str]]:
+        name = _normalize(root)
+
+        def _walk(_: object) -> Either[OSError, List[str]]:
+            self._effects.append(fs_effect.Walk(name))
+            if not self._is_dir(name):
+                return Left(_not_found(name))
+            prefix = name.rstrip(os.sep) + os.sep
+            return Right(sorted(path for path in self._files if path.startswith(prefix)))
+        return ZIO(_walk)
+
+    def stat(self, path: Path) -> ZIO[object, OSError, FileStat]:
+        name = _normalize(path)
+
+        def _stat(_: object) -> Either[OSError, FileStat]:
+            self._effects.append(fs_effect.Stat(name))
+            if name in self._files:
+                return Right(FileStat(len(self._files[name]), self._mtimes[name], False))
+            if self._is_dir(name):
+                return Right(FileStat(0, 0.0, True))
+            return Left(_not_found(name))
+        return ZIO(_stat)
+
+    @property
+    def files(self) -> Dict[str, bytes]:
+        return dict(self._files)
+
+    @property
+    def effects(self) -> List[FileSystemEffect]:
+        return self._effects
+
+
+def _normalize(path: Path) -> str:
+    return os.path.normpath(os.fspath(path))
+
+
+class HasFileSystem(Protocol):
+    @property
+    def file_system(self) -> FileSystem:
+        pass  # pragma: nocover
+
+
+def read_bytes(path: Path) -> ZIO[HasFileSystem, OSError, bytes]:
+    return aio.access_m(lambda env: env.file_system.read_bytes(path))
+
+
+def write_bytes(path: Path, data: bytes) -> ZIO[HasFileSystem, OSError, None]:
+    return aio.access_m(lambda env: env.file_system.write_bytes(path, data))
+
+
+def read_many(paths: Iterable[Path]) -> ZIO[HasFileSystem, OSError, List[bytes]]:
+    return aio.access_m(lambda env: env.file_system.read_many(paths))
+
+
+def write_many(files: Mapping[Path, bytes]) -> ZIO[HasFileSystem, OSError, None]:
+    return aio.access_m(lambda env: env.file_system.write_many(files))
+
+
+def walk(root: Path) -> ZIO[HasFileSystem, OSError, List[str]]:
+    return aio.access_m(lambda env: env.file_system.walk(root))
+
+
+def stat(path: Path) -> ZIO[HasFileSystem, OSError, FileStat]:
+    return aio.access_m(lambda env: env.file_system.stat(path))
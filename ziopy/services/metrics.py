@@ -0,0 +1,429 @@
+import functools
+import math
+import re
+import threading
+from abc import ABCMeta, abstractmethod
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, List, NoReturn, Sequence, Tuple, TypeVar, Union
+from typing_extensions import Protocol
+
+import ziopy.services.mock_effects.metrics as metrics_effect
+from ziopy import tracing
+from ziopy.either import Either, Right
+from ziopy.instrumentation import _active_hooks, timed
+from ziopy.zio import ZIO
+
+R = TypeVar('R')
+E = TypeVar('E')
+A = TypeVar('A')
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_METRIC_NAME = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+
+_DONE: "Right[None]" = Right(None)
+
+
+class Counter(metaclass=ABCMeta):
+    @abstractmethod
+    def increment(self, amount: float = 1) -> ZIO[object, NoReturn, None]:
+        pass  # pragma: nocover
+
+
+class Gauge(metaclass=ABCMeta):
+    @abstractmethod
+    def set(self, value: float) -> ZIO[object, NoReturn, None]:
+        pass  # pragma: nocover
+
+
+class Histogram(metaclass=ABCMeta):
+    @abstractmethod
+    def observe(self, value: float) -> ZIO[object, NoReturn, None]:
+        pass  # pragma: nocover
+
+
+class Metrics(metaclass=ABCMeta):
+    @abstractmethod
+    def counter(self, name: str, help: str = "") -> Counter:
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def timer(self, name: str, zio: ZIO[R, E, A]) -> ZIO[R, E, A]:
+        """
+        Runs `zio`, observing its wall-clock duration in seconds in the
+        histogram called `name` whether it succeeds, fails or raises.
+        """
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def render_prometheus(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        pass  # pragma: nocover
+
+
+class _CounterCell:
+    __slots__ = ("name", "help", "lock", "value")
+
+    def __init__(self, name: str, help: str, lock: threading.Lock) -> None:
+        self.name = name
+        self.help = help
+        self.lock = lock
+        self.value: float = 0
+
+
+class _HistogramCell:
+    __slots__ = ("name", "help", "lock", "bounds", "counts", "sum", "count")
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        lock: threading.Lock,
+        bounds: Tuple[float, ...]
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.lock = lock
+        self.bounds = bounds
+        # One slot per finite upper bound, plus one for +Inf.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum: float = 0
+        self.count = 0
+
+
+class _Update(ZIO[object, NoReturn, None]):
+    """
+    `ZIO.effect_total(lambda: update(value), label)`, as a single small object
+    without closures, since metrics are updated on hot paths.
+    """
+    __slots__ = ("_update", "_value", "_label")
+
+    def __init__(self, update: Callable[[float], None], value: float, label: str) -> None:
+        self._update = update
+        self._value = value
+        self._label = label
+
+    def _run(self, _: object) -> "Either[NoReturn, None]":
+        hooks = _active_hooks.get()
+        if hooks is None:
+            self._update(self._value)
+        else:
+            timed(hooks, self._label, functools.partial(self._update, self._value))
+        return _DONE
+
+
+def _update_program(
+    update: Callable[[float], None],
+    value: float,
+    label: str
+) -> ZIO[object, NoReturn, None]:
+    if tracing.is_enabled():
+        return ZIO.effect_total(functools.partial(update, value), label=label)
+    return _Update(update, value, label)
+
+
+class LiveCounter(Counter):
+    def __init__(self, cell: _CounterCell) -> None:
+        self._cell = cell
+        self._increment_one = ZIO.effect_total(self._increment_by_one, label=cell.name)
+
+    def _increment_by_one(self) -> None:
+        self._add(1)
+
+    def _add(self, amount: float) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented by non-negative amounts")
+        cell = self._cell
+        with cell.lock:
+            cell.value += amount
+
+    def increment(self, amount: float = 1) -> ZIO[object, NoReturn, None]:
+        if amount == 1:
+            return self._increment_one
+        return _update_program(self._add, amount, self._cell.name)
+
+
+class LiveGauge(Gauge):
+    def __init__(self, cell: _CounterCell) -> None:
+        self._cell = cell
+
+    def _set(self, value: float) -> None:
+        cell = self._cell
+        with cell.lock:
+            cell.value = value
+
+    def set(self, value: float) -> ZIO[object, NoReturn, None]:
+        return _update_program(self._set, value, self._cell.name)
+
+
+class LiveHistogram(Histogram):
+    def __init__(self, cell: _HistogramCell) -> None:
+        self._cell = cell
+
+    def _observe(self, value: float) -> None:
+        cell = self._cell
+        index = bisect_left(cell.bounds, value)
+        with cell.lock:
+            cell.counts[index] += 1
+            cell.sum += value
+            cell.count += 1
+
+    def observe(self, value: float) -> ZIO[object, NoReturn, None]:
+        return _update_program(self._observe, value, self._cell.name)
+
+
+class LiveMetrics(Metrics):
+    """
+    In-memory metrics registry. Every metric is assigned to one of `stripes`
+    locks by name, so concurrent updates to unrelated metrics rarely contend.
+    Updating a metric mutates preallocated slots in place.
+    """
+    def __init__(self, stripes: int = 16) -> None:
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._registry_lock = threading.Lock()
+        self._counters: Dict[str, LiveCounter] = {}
+        self._gauges: Dict[str, LiveGauge] = {}
+        self._histograms: Dict[str, LiveHistogram] = {}
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        return self._stripes[hash(name) % len(self._stripes)]
+
+    def _check_name(self, name: str) -> None:
+        if not _METRIC_NAME.match(name):
+            raise ValueError(f"Invalid metric name: {name!r}")
+        if name in self._counters or name in self._gauges or name in self._histograms:
+            raise ValueError(f"A metric called {name!r} has already been registered")
+
+    def _new_counter(self, cell: _CounterCell) -> LiveCounter:
+        return LiveCounter(cell)
+
+    def _new_gauge(self, cell: _CounterCell) -> LiveGauge:
+        return LiveGauge(cell)
+
+    def _new_histogram(self, cell: _HistogramCell) -> LiveHistogram:
+        return LiveHistogram(cell)
+
+    def counter(self, name: str, help: str = "") -> LiveCounter:
+        counter = self._counters.get(name)
+        if counter is not None:
+            return counter
+        with self._registry_lock:
+            counter = self._counters.get(name)
+            if counter is None:
+                self._check_name(name)
+                counter = self._new_counter(_CounterCell(name, help, self._lock_for(name)))
+                self._counters[name] = counter
+            return counter
+
+    def gauge(self, name: str, help: str = "") -> LiveGauge:
+        gauge = self._gauges.get(name)
+        if gauge is not None:
+            return gauge
+        with self._registry_lock:
+            gauge = self._gauges.get(name)
+            if gauge is None:
+                self._check_name(name)
+                gauge = self._new_gauge(_CounterCell(name, help, self._lock_for(name)))
+                self._gauges[name] = gauge
+            return gauge
+
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> LiveHistogram:
+        histogram = self._histograms.get(name)
+        if histogram is not None:
+            return histogram
+        bounds = tuple(sorted(buckets))
+        if not bounds:
+            raise ValueError("A histogram needs at least one bucket")
+        with self._registry_lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                self._check_name(name)
+                histogram = self._new_histogram(
+                    _HistogramCell(name, help, self._lock_for(name), bounds)
+                )
+                self._histograms[name] = histogram
+            return histogram
+
+    def timer(self, name: str, zio: ZIO[R, E, A]) -> ZIO[R, E, A]:
+        histogram = self.histogram(name)
+
+        def _f(r: R) -> Either[E, A]:
+            start = perf_counter()
+            try:
+                return zio._run(r)
+            finally:
+                histogram._observe(perf_counter() - start)
+        return ZIO(_f)
+
+    def counter_value(self, name: str) -> float:
+        cell = self._counters[name]._cell
+        with cell.lock:
+            return cell.value
+
+    def gauge_value(self, name: str) -> float:
+        cell = self._gauges[name]._cell
+        with cell.lock:
+            return cell.value
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for counter in sorted(self._counters.values(), key=lambda c: c._cell.name):
+            cell = counter._cell
+            with cell.lock:
+                value = cell.value
+            _render_header(lines, cell.name, cell.help, "counter")
+            lines.append(f"{cell.name} {_format_value(value)}")
+
+        for gauge in sorted(self._gauges.values(), key=lambda g: g._cell.name):
+            cell = gauge._cell
+            with cell.lock:
+                value = cell.value
+            _render_header(lines, cell.name, cell.help, "gauge")
+            lines.append(f"{cell.name} {_format_value(value)}")
+
+        for histogram in sorted(self._histograms.values(), key=lambda h: h._cell.name):
+            hcell = histogram._cell
+            with hcell.lock:
+                counts = list(hcell.counts)
+                total, count = hcell.sum, hcell.count
+            _render_header(lines, hcell.name, hcell.help, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(hcell.bounds + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{hcell.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}'
+                )
+            lines.append(f"{hcell.name}_sum {_format_value(total)}")
+            lines.append(f"{hcell.name}_count {count}")
+
+        return "".join(line + "\n" for line in lines)
+
+
+def _render_header(lines: List[str], name: str, help: str, metric_type: str) -> None:
+    if help:
+        escaped = help.replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {name} {escaped}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _MockCounter(LiveCounter):
+    def __init__(self, cell: _CounterCell, effects: List["MetricsEffect"]) -> None:
+        self._effects = effects
+        super().__init__(cell)
+
+    def _add(self, amount: float) -> None:
+        super()._add(amount)
+        self._effects.append(metrics_effect.Increment(self._cell.name, amount))
+
+
+class _MockGauge(LiveGauge):
+    def __init__(self, cell: _CounterCell, effects: List["MetricsEffect"]) -> None:
+        self._effects = effects
+        super().__init__(cell)
+
+    def _set(self, value: float) -> None:
+        super()._set(value)
+        self._effects.append(metrics_effect.Set(self._cell.name, value))
+
+
+class _MockHistogram(LiveHistogram):
+    def __init__(self, cell: _HistogramCell, effects: List["MetricsEffect"]) -> None:
+        self._effects = effects
+        super().__init__(cell)
+
+    def _observe(self, value: float) -> None:
+        super()._observe(value)
+        self._effects.append(metrics_effect.Observe(self._cell.name, value))
+
+
+MetricsEffect = Union[metrics_effect.Increment, metrics_effect.Set, metrics_effect.Observe]
+
+
+class MockMetrics(LiveMetrics):
+    """
+    Aggregates metrics exactly like `LiveMetrics`, and additionally records
+    every update (in the order it was performed) as a mock effect.
+    """
+    def __init__(self) -> None:
+        super().__init__(stripes=1)
+        self._effects: List[MetricsEffect] = []
+
+    def _new_counter(self, cell: _CounterCell) -> LiveCounter:
+        return _MockCounter(cell, self._effects)
+
+    def _new_gauge(self, cell: _CounterCell) -> LiveGauge:
+        return _MockGauge(cell, self._effects)
+
+    def _new_histogram(self, cell: _HistogramCell) -> LiveHistogram:
+        return _MockHistogram(cell, self._effects)
+
+    @property
+    def effects(self) -> List[MetricsEffect]:
+        return self._effects
+
+    def observations(self, name: str) -> List[float]:
+        return [
+            effect.value for effect in self._effects
+            if isinstance(effect, metrics_effect.Observe) and effect.name == name
+        ]
+
+
+class HasMetrics(Protocol):
+    @property
+    def metrics(self) -> Metrics:
+        pass  # pragma: nocover
+
+
+def increment(name: str, amount: float = 1) -> ZIO[HasMetrics, NoReturn, None]:
+    return ZIO.access_m(lambda env: env.metrics.counter(name).increment(amount))
+
+
+def set_gauge(name: str, value: float) -> ZIO[HasMetrics, NoReturn, None]:
+    return ZIO.access_m(lambda env: env.metrics.gauge(name).set(value))
+
+
+def observe(name: str, value: float) -> ZIO[HasMetrics, NoReturn, None]:
+    return ZIO.access_m(lambda env: env.metrics.histogram(name).observe(value))
+
+
+def timer(name: str, zio: ZIO[object, E, A]) -> ZIO[HasMetrics, E, A]:
+    return ZIO.access_m(lambda env: env.metrics.timer(name, zio))
+
+
+def render_prometheus() -> ZIO[HasMetrics, NoReturn, str]:
+    return ZIO.access(lambda env: env.metrics.render_prometheus())
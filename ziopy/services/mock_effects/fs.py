@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ReadBytes:
+    path: str
+
+
+@dataclass(frozen=True)
+class WriteBytes:
+    path: str
+    data: bytes
+
+
+@dataclass(frozen=True)
+class Walk:
+    root: str
+
+
+@dataclass(frozen=True)
+class Stat:
+    path: str
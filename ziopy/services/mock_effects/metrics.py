@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Increment:
+    name: str
+    amount: float
+
+
+@dataclass(frozen=True)
+class Set:
+    name: str
+    value: float
+
+
+@dataclass(frozen=True)
+class Observe:
+    name: str
+    value: float
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from typing import Tuple
+
+
+@dataclass(frozen=True)
+class Connect:
+    address: Tuple[str, int]
+
+
+@dataclass(frozen=True)
+class Send:
+    address: Tuple[str, int]
+    data: bytes
+
+
+@dataclass(frozen=True)
+class Receive:
+    address: Tuple[str, int]
+    n: int
+
+
+@dataclass(frozen=True)
+class Close:
+    address: Tuple[str, int]
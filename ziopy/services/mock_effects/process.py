@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Run:
+    args: Tuple[str, ...]
+    input: Optional[bytes]
+
+
+@dataclass(frozen=True)
+class Spawn:
+    args: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Kill:
+    args: Tuple[str, ...]
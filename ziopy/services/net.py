@@ -0,0 +1,576 @@
+"""
+TCP connections, and a pool that reuses them.
+
+Live connections are asyncio streams on the background event loop, so any
+number of them can wait for data without holding a thread each. A
+`ConnectionPool` keeps the connections it hands out open after use, keyed by
+`(host, port)`, so that a request to a known host skips the TCP handshake:
+
+    pool = ConnectionPool(LiveNet(), max_per_host=4, idle_timeout=30.0)
+    reply = pool.with_connection("localhost", 8080, lambda connection: (
+        connection.send_all(b"ping") << connection.recv_exactly(4)
+    ))
+"""
+import asyncio
+import socket
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass
+from typing import (Callable, Dict, List, NoReturn, Optional, Set, Tuple, TypeVar, Union,
+                    cast)
+from typing_extensions import Protocol
+
+import ziopy.services.mock_effects.net as net_effect
+from ziopy import aio
+from ziopy.aio import AsyncZIO, _run_step, from_coroutine, on_background_loop
+from ziopy.either import Either, Left, Right
+from ziopy.zio import ZIO, _run_uninterruptibly
+
+R = TypeVar('R')
+E = TypeVar('E')
+A = TypeVar('A')
+
+Address = Tuple[str, int]
+
+NetEffect = Union[net_effect.Connect, net_effect.Send, net_effect.Receive, net_effect.Close]
+
+
+class ConnectionClosedError(ConnectionError):
+    """The peer closed the connection before sending the expected bytes."""
+    def __init__(self, partial: bytes, expected: int) -> None:
+        super().__init__(f"connection closed after {len(partial)} of {expected} bytes")
+        self.partial = partial
+        self.expected = expected
+
+
+class Connection(metaclass=ABCMeta):
+    @property
+    @abstractmethod
+    def address(self) -> Address:
+        pass  # pragma: nocover
+
+    @property
+    @abstractmethod
+    def closed(self) -> bool:
+        """True once either side has closed the connection."""
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def send_all(self, data: bytes) -> ZIO[object, OSError, None]:
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def recv_exactly(self, n: int) -> ZIO[object, OSError, bytes]:
+        """
+        Receives exactly `n` bytes, or fails with a `ConnectionClosedError` if
+        the peer closes the connection first.
+        """
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def close(self) -> ZIO[object, NoReturn, None]:
+        pass  # pragma: nocover
+
+
+class Net(metaclass=ABCMeta):
+    @abstractmethod
+    def connect(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None
+    ) -> ZIO[object, OSError, Connection]:
+        pass  # pragma: nocover
+
+
+class LiveConnection(Connection):
+    def __init__(
+        self,
+        address: Address,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        self._address = address
+        self._reader = reader
+        self._writer = writer
+        self._closed = False
+
+    @property
+    def address(self) -> Address:
+        return self._address
+
+    @property
+    def closed(self) -> bool:
+        return self._closed or self._reader.at_eof()
+
+    async def _send_all(self, data: bytes) -> None:
+        self._writer.write(data)
+        await self._writer.drain()
+
+    async def _recv_exactly(self, n: int) -> bytes:
+        try:
+            return await self._reader.readexactly(n)
+        except asyncio.IncompleteReadError as e:
+            raise ConnectionClosedError(e.partial, n) from None
+
+    async def _close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:  # pragma: nocover
+                pass
+
+    def send_all(self, data: bytes) -> ZIO[object, OSError, None]:
+        return from_coroutine(lambda: on_background_loop(lambda: self._send_all(data)), OSError)
+
+    def recv_exactly(self, n: int) -> ZIO[object, OSError, bytes]:
+        return from_coroutine(lambda: on_background_loop(lambda: self._recv_exactly(n)), OSError)
+
+    def close(self) -> ZIO[object, NoReturn, None]:
+        return from_coroutine(lambda: on_background_loop(self._close))
+
+    def __repr__(self) -> str:
+        return f"LiveConnection(address={self._address!r}, closed={self.closed})"
+
+
+class LiveNet(Net):
+    """
+    TCP connections through asyncio. With `keep_alive`, the operating system
+    probes idle connections (SO_KEEPALIVE), so that dead peers are noticed.
+    """
+    def __init__(self, keep_alive: bool = True) -> None:
+        self._keep_alive = keep_alive
+
+    async def _connect(self, host: str, port: int, timeout: Optional[float]) -> Connection:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), timeout
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"timed out connecting to {host}:{port}") from None
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self._keep_alive:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return LiveConnection((host, port), reader, writer)
+
+    def connect(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None
+    ) -> ZIO[object, OSError, Connection]:
+        # The connection's streams belong to the loop that opened them.
+        return from_coroutine(
+            lambda: on_background_loop(lambda: self._connect(host, port, timeout)), OSError
+        )
+
+
+class MockConnection(Connection):
+    def __init__(self, owner: "MockNet", address: Address) -> None:
+        self._owner = owner
+        self._address = address
+        self._received = b""
+        self._closed = False
+
+    @property
+    def address(self) -> Address:
+        return self._address
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _check_open(self) -> Optional[OSError]:
+        return ConnectionResetError("connection is closed") if self._closed else None
+
+    def send_all(self, data: bytes) -> ZIO[object, OSError, None]:
+        self._owner._effects.append(net_effect.Send(self._address, data))
+
+        def _send() -> Either[OSError, None]:
+            error = self._check_open()
+            if error is not None:
+                return Left(error)
+            self._received += self._owner._handler(data)
+            return Right(None)
+        return ZIO(lambda _: _send())
+
+    def recv_exactly(self, n: int) -> ZIO[object, OSError, bytes]:
+        self._owner._effects.append(net_effect.Receive(self._address, n))
+
+        def _recv() -> Either[OSError, bytes]:
+            error = self._check_open()
+            if error is not None:
+                return Left(error)
+            if len(self._received) < n:
+                return Left(ConnectionClosedError(self._received, n))
+            data, self._received = self._received[:n], self._received[n:]
+            return Right(data)
+        return ZIO(lambda _: _recv())
+
+    def close(self) -> ZIO[object, NoReturn, None]:
+        self._owner._effects.append(net_effect.Close(self._address))
+
+        def _close() -> None:
+            self._closed = True
+        return ZIO.effect_total(_close)
+
+
+class MockNet(Net):
+    """
+    A network for tests. Every connection replies to the data sent to it with
+    `handler(data)` (by default, an echo), and every call is recorded.
+    """
+    def __init__(self, handler: Optional[Callable[[bytes], bytes]] = None) -> None:
+        self._handler: Callable[[bytes], bytes] = handler or (lambda data: data)
+        self._effects: List[NetEffect] = []
+
+    def connect(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None
+    ) -> ZIO[object, OSError, Connection]:
+        self._effects.append(net_effect.Connect((host, port)))
+        return ZIO.effect_total(lambda: MockConnection(self, (host, port)))
+
+    @property
+    def effects(self) -> List[NetEffect]:
+        return self._effects
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    idle: int
+    in_use: int
+
+
+async def _close_all(connections: List[Connection]) -> None:
+    for connection in connections:
+        await _run_step(connection.close(), None)
+
+
+class ConnectionPool:
+    """
+    Reuses connections per `(host, port)`. At most `max_per_host` connections
+    to a host are open at once; further requests wait for one to be returned.
+    Idle connections are closed once they have been idle for `idle_timeout`
+    seconds, by a timer on the background event loop, or as soon as the peer
+    closes them.
+
+    The pool's bookkeeping runs on the background event loop, so it needs no
+    locks, and programs waiting for a connection do not hold a thread.
+    Connections are closed after the bookkeeping, so that closing one never
+    holds up the pool.
+    """
+    def __init__(
+        self,
+        net: Net,
+        max_per_host: int = 8,
+        idle_timeout: float = 60.0
+    ) -> None:
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be at least 1")
+        self._net = net
+        self._max_per_host = max_per_host
+        self._idle_timeout = idle_timeout
+        self._idle: Dict[Address, List[Tuple[Connection, float]]] = {}
+        self._open: Dict[Address, int] = {}
+        self._closed = False
+        self._changed: Optional[asyncio.Condition] = None
+        self._evictor: "Optional[asyncio.Task[None]]" = None
+        self._closing: "Set[asyncio.Task[None]]" = set()
+
+    def _condition(self) -> asyncio.Condition:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    def _evict(self, address: Address, now: float) -> List[Connection]:
+        """
+        Removes the idle connections to `address` that are closed or have
+        expired, and returns them to be closed.
+        """
+        idle = self._idle.get(address)
+        if not idle:
+            return []
+        keep = []
+        evicted = []
+        for connection, since in idle:
+            if connection.closed or now - since >= self._idle_timeout:
+                evicted.append(connection)
+            else:
+                keep.append((connection, since))
+        if evicted:
+            idle[:] = keep
+            self._open[address] -= len(evicted)
+        return evicted
+
+    async def _evict_periodically(self) -> None:
+        """
+        Evicts the expired connections of every host, sleeping until the
+        oldest idle connection expires. Stops once no connection is idle;
+        `_release` starts it again.
+        """
+        changed = self._condition()
+        while True:
+            async with changed:
+                now = time.monotonic()
+                evicted = [
+                    connection
+                    for address in self._idle
+                    for connection in self._evict(address, now)
+                ]
+                if evicted:
+                    changed.notify_all()
+                oldest = min(
+                    (since for idle in self._idle.values() for _, since in idle),
+                    default=None
+                )
+                if oldest is None:
+                    self._evictor = None
+            await _close_all(evicted)
+            if oldest is None:
+                return
+            await asyncio.sleep(max(0.0, oldest + self._idle_timeout - now))
+
+    def _close_soon(self, connections: List[Connection]) -> None:
+        """Closes `connections` in a task of their own, without waiting for them."""
+        if connections:
+            task = asyncio.get_running_loop().create_task(_close_all(connections))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def _acquire(self, address: Address) -> Either[OSError, Connection]:
+        changed = self._condition()
+        acquired: Optional[Either[OSError, Connection]] = None
+        evicted: List[Connection] = []
+        async with changed:
+            while True:
+                if self._closed:
+                    acquired = Left(ConnectionAbortedError("the connection pool is closed"))
+                    break
+                evicted.extend(self._evict(address, time.monotonic()))
+                idle = self._idle.get(address)
+                if idle:
+                    # The most recently used connection is the least likely to
+                    # have been dropped by the peer.
+                    acquired = Right(idle.pop()[0])
+                    break
+                if self._open.get(address, 0) < self._max_per_host:
+                    self._open[address] = self._open.get(address, 0) + 1
+                    break
+                await changed.wait()
+        self._close_soon(evicted)
+        if acquired is not None:
+            return acquired
+        try:
+            connected = await _run_step(self._net.connect(*address), None)
+        except BaseException:
+            await self._unreserve(address)
+            raise
+        if isinstance(connected, Left):
+            await self._unreserve(address)
+        return connected
+
+    async def _unreserve(self, address: Address) -> None:
+        changed = self._condition()
+        async with changed:
+            self._open[address] -= 1
+            changed.notify_all()
+
+    async def _release(self, connection: Connection, reusable: bool) -> None:
+        changed = self._condition()
+        discarded: List[Connection] = []
+        async with changed:
+            address = connection.address
+            if reusable and not self._closed and not connection.closed:
+                self._idle.setdefault(address, []).append((connection, time.monotonic()))
+                if self._evictor is None:
+                    self._evictor = asyncio.get_running_loop().create_task(
+                        self._evict_periodically()
+                    )
+            else:
+                self._open[address] -= 1
+                discarded.append(connection)
+            changed.notify_all()
+        await _close_all(discarded)
+
+    async def _close(self) -> None:
+        changed = self._condition()
+        discarded: List[Connection] = []
+        async with changed:
+            self._closed = True
+            for address, idle in self._idle.items():
+                self._open[address] -= len(idle)
+                discarded.extend(connection for connection, _ in idle)
+                idle.clear()
+            changed.notify_all()
+        await _close_all(discarded)
+
+    def _acquire_program(self, address: Address) -> ZIO[object, OSError, Connection]:
+        return AsyncZIO(lambda _: on_background_loop(lambda: self._acquire(address)))
+
+    def _release_program(
+        self,
+        connection: Connection,
+        reusable: bool
+    ) -> ZIO[object, NoReturn, None]:
+        return from_coroutine(lambda: on_background_loop(
+            lambda: self._release(connection, reusable)
+        ))
+
+    def with_connection(
+        self,
+        host: str,
+        port: int,
+        use: Callable[[Connection], ZIO[R, E, A]]
+    ) -> ZIO[R, Union[E, OSError], A]:
+        """
+        Runs `use` with a connection to `(host, port)`, then returns the
+        connection to the pool. A connection whose program fails, dies or is
+        interrupted is closed instead, since its protocol state is unknown.
+        """
+        address = (host, port)
+        acquire = self._acquire_program(address)
+
+        def _run(r: R) -> Either[Union[E, OSError], A]:
+            acquired = acquire._run(None)
+            if isinstance(acquired, Left):
+                return acquired
+            connection = cast("Right[Connection]", acquired).value
+            reusable = False
+            try:
+                result = use(connection)._run(r)
+                reusable = isinstance(result, Right)
+                return result
+            finally:
+                _run_uninterruptibly(self._release_program(connection, reusable), None)
+
+        async def _run_async(r: R) -> Either[Union[E, OSError], A]:
+            acquired = await _run_step(acquire, None)
+            if isinstance(acquired, Left):
+                return acquired
+            connection = cast("Right[Connection]", acquired).value
+            reusable = False
+            try:
+                result = await _run_step(use(connection), r)
+                reusable = isinstance(result, Right)
+                return result
+            finally:
+                await asyncio.shield(on_background_loop(
+                    lambda: self._release(connection, reusable)
+                ))
+
+        return AsyncZIO(_run_async, _run)
+
+    def stats(self, host: str, port: int) -> PoolStats:
+        address = (host, port)
+        idle = len(self._idle.get(address, ()))
+        return PoolStats(idle, self._open.get(address, 0) - idle)
+
+    def close(self) -> ZIO[object, NoReturn, None]:
+        """
+        Closes the idle connections, and every connection in use once it is
+        returned. Programs still waiting for a connection fail.
+        """
+        return from_coroutine(lambda: on_background_loop(self._close))
+
+
+class LoopbackEchoServer:
+    """
+    A TCP server on 127.0.0.1 that echoes back everything it receives, for
+    tests. It runs on its own threads, and counts the connections it accepts:
+
+        with LoopbackEchoServer() as server:
+            host, port = server.address
+    """
+    def __init__(self) -> None:
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen()
+        self._lock = threading.Lock()
+        self._clients: List[socket.socket] = []
+        self._accepted = 0
+        self._thread = threading.Thread(
+            target=self._accept, name="ziopy-echo-server", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def address(self) -> Address:
+        host, port = self._listener.getsockname()
+        return host, port
+
+    @property
+    def connections_accepted(self) -> int:
+        with self._lock:
+            return self._accepted
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._accepted += 1
+                self._clients.append(client)
+            threading.Thread(target=self._echo, args=(client,), daemon=True).start()
+
+    @staticmethod
+    def _echo(client: socket.socket) -> None:
+        with client:
+            try:
+                while True:
+                    data = client.recv(65536)
+                    if not data:
+                        return
+                    client.sendall(data)
+            except OSError:
+                return
+
+    def disconnect_clients(self) -> None:
+        """Closes the server's side of every connection accepted so far."""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:  # pragma: nocover
+                pass
+
+    def close(self) -> None:
+        try:
+            # Wakes up the thread blocked in accept().
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:  # pragma: nocover
+            pass
+        self._listener.close()
+        self.disconnect_clients()
+        self._thread.join()
+
+    def __enter__(self) -> "LoopbackEchoServer":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class HasNet(Protocol):
+    @property
+    def net(self) -> Net:
+        pass  # pragma: nocover
+
+
+def connect(
+    host: str,
+    port: int,
+    timeout: Optional[float] = None
+) -> ZIO[HasNet, OSError, Connection]:
+    return aio.access_m(lambda env: env.net.connect(host, port, timeout))
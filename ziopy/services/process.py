@@ -0,0 +1,351 @@
+"""
+Running subprocesses.
+
+The live implementation drives `asyncio` subprocesses on the background event
+loop, so waiting for any number of processes takes no extra threads, and a
+process whose program is interrupted (or whose coroutine is cancelled) is
+killed rather than left running.
+"""
+import asyncio
+import errno
+import itertools
+import os
+from abc import ABCMeta, abstractmethod
+from dataclasses import dataclass
+from typing import (Dict, Iterable, List, Mapping, NoReturn, Optional, Sequence, Tuple,
+                    Union)
+from typing_extensions import Protocol
+
+import ziopy.services.mock_effects.process as process_effect
+from ziopy import aio
+from ziopy.aio import AsyncZIO, from_coroutine, on_background_loop
+from ziopy.either import Either, Right
+from ziopy.stream import ZStream
+from ziopy.zio import ZIO, ZIOMonad, monadic
+
+ProcessEffect = Union[process_effect.Run, process_effect.Spawn, process_effect.Kill]
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ProcessResult:
+    args: Tuple[str, ...]
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+class ProcessHandle(metaclass=ABCMeta):
+    """
+    A running process. Its output is piped: read both `stdout` and `stderr`
+    (or neither) before waiting, or the process may block on a full pipe.
+    """
+    @property
+    @abstractmethod
+    def args(self) -> Tuple[str, ...]:
+        pass  # pragma: nocover
+
+    @property
+    @abstractmethod
+    def pid(self) -> int:
+        pass  # pragma: nocover
+
+    @property
+    @abstractmethod
+    def stdout(self) -> ZStream[object, NoReturn, bytes]:
+        """The process's standard output, as chunks of bytes. It can be run once."""
+        pass  # pragma: nocover
+
+    @property
+    @abstractmethod
+    def stderr(self) -> ZStream[object, NoReturn, bytes]:
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def wait(self) -> ZIO[object, NoReturn, int]:
+        """Waits for the process to exit. Interrupting the wait kills the process."""
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def kill(self) -> ZIO[object, NoReturn, None]:
+        pass  # pragma: nocover
+
+
+@monadic
+def _run_in_sequence(
+    process: "Process",
+    commands: List[Tuple[str, ...]],
+    do: ZIOMonad[object, OSError]
+) -> ZIO[object, OSError, List[ProcessResult]]:
+    return ZIO.succeed([do << process.run(args) for args in commands])
+
+
+class Process(metaclass=ABCMeta):
+    @abstractmethod
+    def run(
+        self,
+        cmd: Sequence[str],
+        input: Optional[bytes] = None
+    ) -> ZIO[object, OSError, ProcessResult]:
+        """
+        Runs `cmd` to completion, collecting its output. A non-zero exit code
+        is not an error; failing to start the process (e.g. because the
+        program does not exist) is.
+        """
+        pass  # pragma: nocover
+
+    @abstractmethod
+    def spawn(self, cmd: Sequence[str]) -> ZIO[object, OSError, ProcessHandle]:
+        pass  # pragma: nocover
+
+    def run_all(
+        self,
+        cmds: Iterable[Sequence[str]],
+        parallelism: Optional[int] = None
+    ) -> ZIO[object, OSError, List[ProcessResult]]:
+        """
+        Runs every command, at most `parallelism` (by default, the number of
+        CPUs) at a time, and returns their results in order. If a command
+        cannot be started, the processes that are still running are killed.
+
+        This default implementation runs the commands one after the other.
+        """
+        _parallelism(parallelism)
+        return _run_in_sequence(self, [tuple(cmd) for cmd in cmds])
+
+
+def _parallelism(parallelism: Optional[int]) -> int:
+    if parallelism is None:
+        return os.cpu_count() or 1
+    if parallelism < 1:
+        raise ValueError("parallelism must be at least 1")
+    return parallelism
+
+
+async def _kill(process: "asyncio.subprocess.Process") -> None:
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:  # pragma: nocover
+            pass
+        await process.wait()
+
+
+async def _run_process(args: Tuple[str, ...], input: Optional[bytes]) -> ProcessResult:
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.DEVNULL if input is None else asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await process.communicate(input)
+    except BaseException:
+        await _kill(process)
+        raise
+    assert process.returncode is not None
+    return ProcessResult(args, process.returncode, stdout, stderr)
+
+
+async def _run_processes(
+    commands: List[Tuple[str, ...]],
+    parallelism: int
+) -> List[ProcessResult]:
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def _bounded(args: Tuple[str, ...]) -> ProcessResult:
+        async with semaphore:
+            return await _run_process(args, None)
+
+    tasks = [asyncio.ensure_future(_bounded(args)) for args in commands]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _read_pull(stream: "asyncio.StreamReader") -> ZIO[object, NoReturn, List[bytes]]:
+    async def _pull(_: object) -> Either[NoReturn, List[bytes]]:
+        chunk = await on_background_loop(lambda: stream.read(READ_CHUNK_SIZE))
+        return Right([chunk] if chunk else [])
+    return AsyncZIO(_pull)
+
+
+class LiveProcessHandle(ProcessHandle):
+    def __init__(self, args: Tuple[str, ...], process: "asyncio.subprocess.Process") -> None:
+        self._args = args
+        self._process = process
+
+    @property
+    def args(self) -> Tuple[str, ...]:
+        return self._args
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    @property
+    def stdout(self) -> ZStream[object, NoReturn, bytes]:
+        assert self._process.stdout is not None
+        return ZStream.from_pull(_read_pull(self._process.stdout))
+
+    @property
+    def stderr(self) -> ZStream[object, NoReturn, bytes]:
+        assert self._process.stderr is not None
+        return ZStream.from_pull(_read_pull(self._process.stderr))
+
+    async def _wait(self) -> int:
+        try:
+            return await self._process.wait()
+        except BaseException:
+            await _kill(self._process)
+            raise
+
+    def wait(self) -> ZIO[object, NoReturn, int]:
+        return from_coroutine(lambda: on_background_loop(self._wait))
+
+    def kill(self) -> ZIO[object, NoReturn, None]:
+        return from_coroutine(lambda: on_background_loop(lambda: _kill(self._process)))
+
+    def __repr__(self) -> str:
+        return f"LiveProcessHandle(args={self._args!r}, pid={self.pid})"
+
+
+class LiveProcess(Process):
+    def run(
+        self,
+        cmd: Sequence[str],
+        input: Optional[bytes] = None
+    ) -> ZIO[object, OSError, ProcessResult]:
+        args = tuple(cmd)
+        return from_coroutine(lambda: _run_process(args, input), OSError)
+
+    def spawn(self, cmd: Sequence[str]) -> ZIO[object, OSError, ProcessHandle]:
+        args = tuple(cmd)
+
+        async def _spawn() -> ProcessHandle:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            return LiveProcessHandle(args, process)
+
+        # The handle's pipes belong to the loop that created the process.
+        return from_coroutine(lambda: on_background_loop(_spawn), OSError)
+
+    def run_all(
+        self,
+        cmds: Iterable[Sequence[str]],
+        parallelism: Optional[int] = None
+    ) -> ZIO[object, OSError, List[ProcessResult]]:
+        commands = [tuple(cmd) for cmd in cmds]
+        limit = _parallelism(parallelism)
+        return from_coroutine(lambda: _run_processes(commands, limit), OSError)
+
+
+class MockProcessHandle(ProcessHandle):
+    def __init__(self, owner: "MockProcess", pid: int, result: ProcessResult) -> None:
+        self._owner = owner
+        self._pid = pid
+        self._result = result
+        self._killed = False
+
+    @property
+    def args(self) -> Tuple[str, ...]:
+        return self._result.args
+
+    @property
+    def pid(self) -> int:
+        return self._pid
+
+    @property
+    def stdout(self) -> ZStream[object, NoReturn, bytes]:
+        return ZStream.from_chunks([[self._result.stdout]] if self._result.stdout else [])
+
+    @property
+    def stderr(self) -> ZStream[object, NoReturn, bytes]:
+        return ZStream.from_chunks([[self._result.stderr]] if self._result.stderr else [])
+
+    def wait(self) -> ZIO[object, NoReturn, int]:
+        return ZIO.effect_total(lambda: -9 if self._killed else self._result.returncode)
+
+    def kill(self) -> ZIO[object, NoReturn, None]:
+        self._owner._effects.append(process_effect.Kill(self.args))
+
+        def _kill() -> None:
+            self._killed = True
+        return ZIO.effect_total(_kill)
+
+
+class MockProcess(Process):
+    """
+    A process service for tests. `results` maps each command (as a tuple) to
+    the result of running it; commands without a result fail to start, as if
+    their program did not exist.
+    """
+    def __init__(self, results: Optional[Mapping[Tuple[str, ...], ProcessResult]] = None) -> None:
+        self._results: Dict[Tuple[str, ...], ProcessResult] = dict(results or {})
+        self._effects: List[ProcessEffect] = []
+        self._pids = itertools.count(1)
+
+    def _result(self, args: Tuple[str, ...]) -> ZIO[object, OSError, ProcessResult]:
+        if args in self._results:
+            return ZIO.succeed(self._results[args])
+        program = args[0] if args else ""
+        return ZIO.fail(FileNotFoundError(
+            errno.ENOENT, os.strerror(errno.ENOENT), program
+        ))
+
+    def run(
+        self,
+        cmd: Sequence[str],
+        input: Optional[bytes] = None
+    ) -> ZIO[object, OSError, ProcessResult]:
+        args = tuple(cmd)
+        self._effects.append(process_effect.Run(args, input))
+        return self._result(args)
+
+    def spawn(self, cmd: Sequence[str]) -> ZIO[object, OSError, ProcessHandle]:
+        args = tuple(cmd)
+        self._effects.append(process_effect.Spawn(args))
+        return self._result(args).map(
+            lambda result: MockProcessHandle(self, next(self._pids), result)
+        )
+
+    @property
+    def effects(self) -> List[ProcessEffect]:
+        return self._effects
+
+
+class HasProcess(Protocol):
+    @property
+    def process(self) -> Process:
+        pass  # pragma: nocover
+
+
+def run(
+    cmd: Sequence[str],
+    input: Optional[bytes] = None
+) -> ZIO[HasProcess, OSError, ProcessResult]:
+    return aio.access_m(lambda env: env.process.run(cmd, input))
+
+
+def spawn(cmd: Sequence[str]) -> ZIO[HasProcess, OSError, ProcessHandle]:
+    return aio.access_m(lambda env: env.process.spawn(cmd))
+
+
+def run_all(
+    cmds: Iterable[Sequence[str]],
+    parallelism: Optional[int] = None
+) -> ZIO[HasProcess, OSError, List[ProcessResult]]:
+    return aio.access_m(lambda env: env.process.run_all(cmds, parallelism))
@@ -4,7 +4,7 @@ from typing import List, NoReturn, Optional
 from typing_extensions import Protocol
 
 import ziopy.services.mock_effects.system as system_effect
-from ziopy.zio import ZIO, Environment
+from ziopy.zio import ZIO
 
 
 class System(metaclass=ABCMeta):
@@ -38,4 +38,4 @@ class HasSystem(Protocol):
 
 
 def exit(exit_code: Optional[int] = None) -> ZIO[HasSystem, NoReturn, NoReturn]:
-    return Environment[HasSystem]().flat_map(lambda env: env.system.exit(exit_code))
+    return ZIO.access_m(lambda env: env.system.exit(exit_code))
@@ -0,0 +1,222 @@
+"""
+Streams of values produced by effects, pulled in chunks.
+
+A `ZStream` is a description, like a `ZIO`: nothing happens until one of its
+`run_*` methods is run. Running a stream opens it, which produces a *pull*: a
+program that returns the next chunk of values each time it is run, and an empty
+chunk once the stream is exhausted.
+
+    stream = ZStream.from_iterable(range(10)).filter(lambda n: n % 2 == 0).take(3)
+    unsafe_run(stream.run_collect())  # [0, 2, 4]
+
+The `run_*` programs are asynchronous (`AsyncZIO`) when they are awaited from
+`monadic_async` code, so streams of asynchronous sources (such as the output
+of a subprocess) never block an event loop.
+"""
+import itertools
+from typing import (Callable, Generic, Iterable, List, NoReturn, Optional, Sequence, Tuple,
+                    TypeVar, cast)
+
+from ziopy.aio import AsyncZIO, _run_step
+from ziopy.either import Either, Left, Right
+from ziopy.zio import ZIO, _checkpoint
+
+R = TypeVar('R', contravariant=True)
+E = TypeVar('E', covariant=True)
+A = TypeVar('A', covariant=True)
+
+RR = TypeVar('RR')
+EE = TypeVar('EE')
+AA = TypeVar('AA')
+B = TypeVar('B')
+S = TypeVar('S')
+
+DEFAULT_CHUNK_SIZE = 1024
+
+_Step = Callable[[List[AA]], Tuple[List[B], bool]]
+"""Transforms one chunk, and tells whether the stream should end after it."""
+
+
+class ZStream(Generic[R, E, A]):
+    """
+    A stream of values of type `A`, produced by effects that need an
+    environment `R` and may fail with an `E`. `open` produces the pull.
+    """
+    def __init__(self, open: "ZIO[R, E, ZIO[R, E, List[A]]]") -> None:
+        self._open = open
+
+    @staticmethod
+    def from_pull(pull: "ZIO[RR, EE, List[AA]]") -> "ZStream[RR, EE, AA]":
+        """
+        A stream that runs `pull` until it returns an empty chunk. Streams built
+        on a stateful pull (e.g. one that reads from a pipe) can be run once.
+        """
+        return ZStream(ZIO.succeed(pull))
+
+    @staticmethod
+    def from_chunks(chunks: Iterable[Sequence[AA]]) -> "ZStream[object, NoReturn, AA]":
+        """A stream of the values in `chunks`, pulled one chunk at a time."""
+        def _open(_: object) -> Either[NoReturn, ZIO[object, NoReturn, List[AA]]]:
+            non_empty = (list(chunk) for chunk in chunks if chunk)
+            return Right(ZIO.effect_total(lambda: next(non_empty, [])))
+        return ZStream(ZIO(_open))
+
+    @staticmethod
+    def from_iterable(
+        values: Iterable[AA],
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> "ZStream[object, NoReturn, AA]":
+        def _open(_: object) -> Either[NoReturn, ZIO[object, NoReturn, List[AA]]]:
+            iterator = iter(values)
+            return Right(ZIO.effect_total(lambda: list(itertools.islice(iterator, chunk_size))))
+        return ZStream(ZIO(_open))
+
+    def _via(
+        self,
+        make_step: "Callable[[], _Step[A, B]]",
+        done: bool = False
+    ) -> "ZStream[R, E, B]":
+        return ZStream(self._open.map(
+            lambda pull: _TransformedPull(pull, make_step(), done).to_zio()
+        ))
+
+    def map(self, f: Callable[[A], B]) -> "ZStream[R, E, B]":
+        return self._via(lambda: lambda chunk: ([f(a) for a in chunk], False))
+
+    def map_chunks(self, f: Callable[[List[A]], List[B]]) -> "ZStream[R, E, B]":
+        return self._via(lambda: lambda chunk: (f(chunk), False))
+
+    def filter(self, predicate: Callable[[A], bool]) -> "ZStream[R, E, A]":
+        return self._via(lambda: lambda chunk: ([a for a in chunk if predicate(a)], False))
+
+    def take(self, n: int) -> "ZStream[R, E, A]":
+        """The first `n` values. The rest of the stream is never pulled."""
+        def _make_step() -> "_Step[A, A]":
+            remaining = n
+
+            def _step(chunk: List[A]) -> Tuple[List[A], bool]:
+                nonlocal remaining
+                taken = chunk[:remaining]
+                remaining -= len(taken)
+                return taken, remaining <= 0
+            return _step
+        return self._via(_make_step, done=n <= 0)
+
+    def _run_with(
+        self: "ZStream[RR, EE, AA]",
+        state: Callable[[], S],
+        consume: "Callable[[S, List[AA]], Iterable[ZIO[RR, EE, object]]]",
+        result: Callable[[S], B]
+    ) -> "ZIO[RR, EE, B]":
+        """
+        Pulls every chunk, and runs the programs that `consume` returns for it
+        (in order) before pulling the next one.
+        """
+        def _run(r: RR) -> Either[EE, B]:
+            opened = self._open._run(r)
+            if isinstance(opened, Left):
+                return opened
+            pull, s = cast("Right[ZIO[RR, EE, List[AA]]]", opened).value, state()
+            while True:
+                _checkpoint()
+                chunk = pull._run(r)
+                if isinstance(chunk, Left):
+                    return chunk
+                values = cast("Right[List[AA]]", chunk).value
+                if not values:
+                    return Right(result(s))
+                for effect in consume(s, values):
+                    outcome = effect._run(r)
+                    if isinstance(outcome, Left):
+                        return outcome
+
+        async def _run_async(r: RR) -> Either[EE, B]:
+            opened = await _run_step(self._open, r)
+            if isinstance(opened, Left):
+                return opened
+            pull, s = cast("Right[ZIO[RR, EE, List[AA]]]", opened).value, state()
+            while True:
+                _checkpoint()
+                chunk = await _run_step(pull, r)
+                if isinstance(chunk, Left):
+                    return chunk
+                values = cast("Right[List[AA]]", chunk).value
+                if not values:
+                    return Right(result(s))
+                for effect in consume(s, values):
+                    outcome = await _run_step(effect, r)
+                    if isinstance(outcome, Left):
+                        return outcome
+
+        return AsyncZIO(_run_async, _run)
+
+    def run_fold(self: "ZStream[RR, EE, AA]", z: S, f: Callable[[S, AA], S]) -> "ZIO[RR, EE, S]":
+        def _consume(cell: List[S], chunk: List[AA]) -> List[ZIO[RR, EE, object]]:
+            for a in chunk:
+                cell[0] = f(cell[0], a)
+            return []
+        return self._run_with(lambda: [z], _consume, lambda cell: cell[0])
+
+    def run_collect(self: "ZStream[RR, EE, AA]") -> "ZIO[RR, EE, List[AA]]":
+        def _consume(values: List[AA], chunk: List[AA]) -> List[ZIO[RR, EE, object]]:
+            values.extend(chunk)
+            return []
+        return self._run_with(list, _consume, lambda values: values)
+
+    def run_foreach(
+        self: "ZStream[RR, EE, AA]",
+        f: "Callable[[AA], ZIO[RR, EE, object]]"
+    ) -> "ZIO[RR, EE, None]":
+        """Runs `f` for each value, in order, stopping at the first failure."""
+        return self._run_with(
+            lambda: None, lambda _, chunk: (f(a) for a in chunk), lambda _: None
+        )
+
+    def run_foreach_chunk(
+        self: "ZStream[RR, EE, AA]",
+        f: "Callable[[List[AA]], ZIO[RR, EE, object]]"
+    ) -> "ZIO[RR, EE, None]":
+        return self._run_with(lambda: None, lambda _, chunk: [f(chunk)], lambda _: None)
+
+    def run_drain(self) -> "ZIO[R, E, None]":
+        return self._run_with(lambda: None, lambda _, chunk: [], lambda _: None)
+
+
+class _TransformedPull(Generic[RR, EE, AA, B]):
+    """
+    A pull that applies a step to the chunks of another pull. Chunks that the
+    step empties are skipped, since an empty chunk would end the stream.
+    """
+    def __init__(self, pull: "ZIO[RR, EE, List[AA]]", step: "_Step[AA, B]", done: bool) -> None:
+        self._pull = pull
+        self._step = step
+        self._done = done
+
+    def _apply(self, chunk: Either[EE, List[AA]]) -> Optional[Either[EE, List[B]]]:
+        if isinstance(chunk, Left):
+            return chunk
+        values = cast("Right[List[AA]]", chunk).value
+        if not values:
+            self._done = True
+            return Right([])
+        transformed, self._done = self._step(values)
+        if transformed or self._done:
+            return Right(transformed)
+        return None
+
+    def _next(self, r: RR) -> Either[EE, List[B]]:
+        while not self._done:
+            result = self._apply(self._pull._run(r))
+            if result is not None:
+                return result
+        return Right([])
+
+    async def _next_async(self, r: RR) -> Either[EE, List[B]]:
+        while not self._done:
+            result = self._apply(await _run_step(self._pull, r))
+            if result is not None:
+                return result
+        return Right([])
+
+    def to_zio(self) -> "ZIO[RR, EE, List[B]]":
+        return AsyncZIO(self._next_async, self._next)
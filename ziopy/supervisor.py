@@ -0,0 +1,156 @@
+"""
+Fiber supervision: tracking of live fibers, fiber dumps and leak warnings.
+
+A `Supervisor` is a set of runtime hooks, so it is installed with `unsafe_run`
+(combine it with other hooks through `CompositeHooks`):
+
+    supervisor = Supervisor()
+    supervisor.install_signal_handler(signal.SIGUSR1)
+    unsafe_run(program, hooks=supervisor)
+
+Sending SIGUSR1 to the process then prints every live fiber to stderr.
+"""
+import signal
+import sys
+import threading
+import time
+import traceback
+import warnings
+from dataclasses import dataclass
+from types import FrameType
+from typing import Any, Dict, List, Optional, TextIO
+
+from ziopy.instrumentation import RuntimeHooks
+from ziopy.zio import Fiber, _current_fiber
+
+_MAIN = 0
+
+
+class FiberLeakWarning(ResourceWarning):
+    """Emitted when a fiber is still running after its parent fiber has completed."""
+
+
+@dataclass(frozen=True)
+class FiberInfo:
+    id: int
+    parent_id: Optional[int]
+    status: str
+    age: float
+    effect: Optional[str]
+    thread_id: Optional[int]
+
+
+class Supervisor(RuntimeHooks):
+    """
+    Tracks every fiber forked while it is installed, together with the label of
+    the effect (or `labeled` region) each fiber is currently running.
+
+    If `warn_on_leaks` is set, a `FiberLeakWarning` is emitted whenever a fiber
+    completes while some of its children are still running. Fibers forked by
+    the top-level program passed to `unsafe_run` have no parent fiber, so they
+    are never reported; to supervise such work, fork it from within a fiber.
+    """
+    def __init__(self, warn_on_leaks: bool = True) -> None:
+        self._warn_on_leaks = warn_on_leaks
+        # Reentrant, because the signal handler of `install_signal_handler`
+        # takes it on the main thread, which may already be holding it.
+        self._lock = threading.RLock()
+        self._fibers: Dict[int, Fiber] = {}
+        self._labels: Dict[int, List[str]] = {}
+
+    def _key(self) -> int:
+        fiber = _current_fiber.get()
+        return _MAIN if fiber is None else fiber.id
+
+    def on_effect_start(self, label: str) -> None:
+        key = self._key()
+        with self._lock:
+            self._labels.setdefault(key, []).append(label)
+
+    def on_effect_end(self, label: str, elapsed_ns: int) -> None:
+        key = self._key()
+        with self._lock:
+            labels = self._labels.get(key)
+            if labels:
+                labels.pop()
+
+    def on_fiber_start(self, fiber: Any) -> None:
+        with self._lock:
+            self._fibers[fiber.id] = fiber
+
+    def on_fiber_end(self, fiber: Any) -> None:
+        with self._lock:
+            self._fibers.pop(fiber.id, None)
+            self._labels.pop(fiber.id, None)
+            leaked = [
+                child for child in self._fibers.values()
+                if child.parent is fiber and not child.done
+            ]
+        if self._warn_on_leaks:
+            for child in leaked:
+                warnings.warn(
+                    FiberLeakWarning(
+                        f"Fiber #{child.id} is still {child.status} after its parent "
+                        f"fiber #{fiber.id} completed"
+                    ),
+                    stacklevel=2
+                )
+
+    def _current_effect(self, fiber_id: int) -> Optional[str]:
+        labels = self._labels.get(fiber_id)
+        return labels[-1] if labels else None
+
+    def fibers(self) -> List[FiberInfo]:
+        """A snapshot of every live fiber, oldest first."""
+        now = time.monotonic()
+        with self._lock:
+            snapshot = [
+                FiberInfo(
+                    id=fiber.id,
+                    parent_id=None if fiber.parent is None else fiber.parent.id,
+                    status=fiber.status,
+                    age=now - fiber.started_at,
+                    effect=self._current_effect(fiber.id),
+                    thread_id=fiber.thread_id
+                )
+                for fiber in self._fibers.values()
+            ]
+        return sorted(snapshot, key=lambda info: info.id)
+
+    def fiber_dump(self, file: Optional[TextIO] = None, include_stacks: bool = False) -> None:
+        """
+        Prints one line per live fiber (id, parent, status, age and current
+        effect) to `file` (stderr by default). With `include_stacks`, the
+        Python stack of the thread each fiber is running on is printed as well.
+        """
+        out = sys.stderr if file is None else file
+        infos = self.fibers()
+        frames: Dict[int, FrameType] = sys._current_frames() if include_stacks else {}
+        out.write(f"Fiber dump: {len(infos)} live fiber(s)\n")
+        for info in infos:
+            parent = "-" if info.parent_id is None else f"#{info.parent_id}"
+            effect = info.effect if info.effect is not None else "-"
+            out.write(
+                f"  #{info.id} parent={parent} status={info.status} "
+                f"age={info.age:.3f}s effect={effect}\n"
+            )
+            frame = frames.get(info.thread_id) if info.thread_id is not None else None
+            if frame is not None:
+                for line in traceback.format_stack(frame):
+                    out.write("    " + line.replace("\n", "\n    ").rstrip(" "))
+        out.flush()
+
+    def install_signal_handler(
+        self,
+        signum: int = getattr(signal, "SIGUSR1", signal.SIGINT),
+        file: Optional[TextIO] = None,
+        include_stacks: bool = True
+    ) -> None:
+        """
+        Makes the given signal (SIGUSR1 by default) print a fiber dump. Must be
+        called from the main thread.
+        """
+        signal.signal(
+            signum,
+            lambda _signum, _frame: self.fiber_dump(file, include_stacks=include_stacks)
+        )
@@ -0,0 +1,178 @@
+"""
+Opt-in execution traces that map failures back to the code that built them.
+
+A ZIO program is built first and run later, so the Python traceback of a
+failure only shows the interpreter's closures. With tracing enabled, `map`,
+`flat_map` and the `effect` constructors remember where they were called from
+(a code object and a line number, never a frame), and a failing step adds that
+call site to the failure as it propagates outwards:
+
+    with tracing():
+        program = build_program()
+    unsafe_run(program)  # The exception's notes now include the ZIO trace.
+
+`with tracing()` applies to the current thread (or asyncio task) only. Tracing
+can be enabled for the whole process with `enable()`, or by setting the
+`ZIOPY_TRACING` environment variable to a non-empty value other than "0".
+"""
+import os
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from types import CodeType
+from typing import Iterator, List, Optional, Tuple
+
+from ziopy.cause import _CAUSE_ATTRIBUTE
+from ziopy.either import Left
+
+TraceElement = Tuple[CodeType, int]
+
+MAX_TRACE_LENGTH = 100
+
+_TRACE_ATTRIBUTE = "__zio_trace__"
+_TRACE_RUN_ATTRIBUTE = "__zio_trace_run__"
+_INTERNAL_FILES = frozenset(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ("zio.py", "tracing.py")
+)
+
+_enabled_by_default = os.environ.get("ZIOPY_TRACING", "") not in ("", "0")
+_enabled: "ContextVar[Optional[bool]]" = ContextVar("ziopy_tracing", default=None)
+_current_run: "ContextVar[Optional[object]]" = ContextVar("ziopy_tracing_run", default=None)
+
+
+def is_enabled() -> bool:
+    """Whether programs built now, in the current context, are traced."""
+    enabled = _enabled.get()
+    return _enabled_by_default if enabled is None else enabled
+
+
+def enable() -> None:
+    """Enables tracing for the whole process (except inside `tracing(False)` blocks)."""
+    global _enabled_by_default
+    _enabled_by_default = True
+
+
+def disable() -> None:
+    global _enabled_by_default
+    _enabled_by_default = False
+
+
+@contextmanager
+def tracing(enable: bool = True) -> Iterator[None]:
+    """
+    Enables (or disables) tracing of the programs built inside this block, in
+    the current context only, so concurrent blocks in other threads do not
+    interfere.
+    """
+    token = _enabled.set(enable)
+    try:
+        yield
+    finally:
+        _enabled.reset(token)
+
+
+def start_run() -> "Optional[Token[Optional[object]]]":
+    """
+    Marks the start of a run of a program (e.g. by `unsafe_run`). An exception
+    that fails several runs, such as one that a program reuses, gets a new
+    trace in each of them instead of accumulating one. Nested runs belong to
+    the outermost one.
+    """
+    if _current_run.get() is not None:
+        return None
+    return _current_run.set(object())
+
+
+def end_run(token: "Optional[Token[Optional[object]]]") -> None:
+    """Marks the end of the run started by the `start_run` that returned `token`."""
+    if token is not None:
+        _current_run.reset(token)
+
+
+def capture_site() -> Optional[TraceElement]:
+    """The first call site outside of the ZIO interpreter on the current stack."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename in _INTERNAL_FILES:
+        frame = frame.f_back  # type: ignore
+    if frame is None:
+        return None  # pragma: nocover
+    return frame.f_code, frame.f_lineno
+
+
+def record_on_left(left: Left, site: TraceElement) -> Left:
+    """
+    Adds `site` to the trace of a failed step. The first site is recorded on a
+    copy, because the same `Left` may be returned by every run of a program.
+    """
+    trace = getattr(left, _TRACE_ATTRIBUTE, None)
+    if trace is None:
+        copy = Left(left.value)
+        cause = getattr(left, _CAUSE_ATTRIBUTE, None)
+        if cause is not None:
+            object.__setattr__(copy, _CAUSE_ATTRIBUTE, cause)
+        object.__setattr__(copy, _TRACE_ATTRIBUTE, [site])
+        return copy
+    if len(trace) < MAX_TRACE_LENGTH:
+        trace.append(site)
+    return left
+
+
+def record_on_exception(exception: BaseException, site: TraceElement) -> None:
+    run = _current_run.get()
+    trace = getattr(exception, _TRACE_ATTRIBUTE, None)
+    if trace is None or getattr(exception, _TRACE_RUN_ATTRIBUTE, None) is not run:
+        try:
+            object.__setattr__(exception, _TRACE_ATTRIBUTE, [site])
+            object.__setattr__(exception, _TRACE_RUN_ATTRIBUTE, run)
+        except (AttributeError, TypeError):  # pragma: nocover
+            pass
+    elif len(trace) < MAX_TRACE_LENGTH:
+        trace.append(site)
+
+
+def trace_of(failure: object) -> List[TraceElement]:
+    """
+    The ZIO trace of a failed result (a `Left`) or of an exception, innermost
+    call site first.
+    """
+    trace: List[TraceElement] = []
+    if isinstance(failure, Left):
+        trace.extend(trace_of(failure.value))
+    else:
+        run = _current_run.get()
+        if run is not None and getattr(failure, _TRACE_RUN_ATTRIBUTE, run) is not run:
+            return trace  # Recorded by an earlier run.
+    trace.extend(getattr(failure, _TRACE_ATTRIBUTE, None) or [])
+    return trace
+
+
+def format_trace(trace: List[TraceElement]) -> str:
+    """Formats a trace like a Python traceback, most recent call last."""
+    lines = ["ZIO trace (most recent call last):"]
+    for code, lineno in reversed(trace):
+        name = getattr(code, "co_qualname", code.co_name)
+        lines.append(f'  File "{code.co_filename}", line {lineno}, in {name}')
+    return "\n".join(lines)
+
+
+def add_trace_note(exception: BaseException, trace: List[TraceElement]) -> None:
+    """
+    Adds the formatted trace to the exception's `__notes__`, which Python
+    (3.11+) prints after the traceback, unless it is already there (e.g. the
+    exception failed an earlier run the same way). Unlike `add_note`, this
+    also works for frozen dataclass exceptions.
+    """
+    if not trace:
+        return
+    formatted = format_trace(trace)
+    notes = getattr(exception, "__notes__", None)
+    try:
+        if notes is None:
+            notes = []
+            object.__setattr__(exception, "__notes__", notes)
+        elif formatted in notes:
+            return
+        notes.append(formatted)
+    except (AttributeError, TypeError):  # pragma: nocover
+        pass
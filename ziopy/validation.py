@@ -0,0 +1,250 @@
+from abc import ABCMeta
+from dataclasses import dataclass
+from typing import (Any, Callable, Generic, Iterable, Iterator, List, NoReturn, Optional,
+                    Tuple, TypeVar, Union, overload)
+
+from ziopy.either import Either, Left, Right
+from ziopy.zio import ZIO
+
+A = TypeVar('A', covariant=True)
+E = TypeVar('E', covariant=True)
+
+AA = TypeVar('AA')
+A1 = TypeVar('A1')
+A2 = TypeVar('A2')
+A3 = TypeVar('A3')
+A4 = TypeVar('A4')
+B = TypeVar('B')
+EE = TypeVar('EE')
+E1 = TypeVar('E1')
+E2 = TypeVar('E2')
+E3 = TypeVar('E3')
+E4 = TypeVar('E4')
+R = TypeVar('R')
+T = TypeVar('T', covariant=True)
+
+
+class Chunk(Generic[T]):
+    """
+    An immutable sequence with O(1) concatenation. Concatenating two chunks
+    creates a node that refers to both (a rope), instead of copying either of
+    them; the elements are only flattened when the chunk is iterated.
+    """
+    __slots__ = ("_items", "_left", "_right", "_size")
+
+    def __init__(
+        self,
+        _items: Tuple[T, ...] = (),
+        _left: "Optional[Chunk[T]]" = None,
+        _right: "Optional[Chunk[T]]" = None
+    ) -> None:
+        self._items = _items
+        self._left = _left
+        self._right = _right
+        self._size: int = (
+            _left._size + _right._size
+            if _left is not None and _right is not None
+            else len(_items)
+        )
+
+    @staticmethod
+    def empty() -> "Chunk[NoReturn]":
+        return _EMPTY_CHUNK
+
+    @staticmethod
+    def single(item: AA) -> "Chunk[AA]":
+        return Chunk((item,))
+
+    @staticmethod
+    def of(items: Iterable[AA]) -> "Chunk[AA]":
+        return Chunk(tuple(items))
+
+    def __add__(self, other: "Chunk[AA]") -> "Chunk[Union[T, AA]]":
+        if not other._size:
+            return self
+        if not self._size:
+            return other
+        return Chunk(_left=self, _right=other)
+
+    def __iter__(self) -> Iterator[T]:
+        # Iterative rather than recursive, so that deep ropes built by many
+        # successive concatenations cannot overflow the stack.
+        stack: List[Chunk[T]] = [self]
+        while stack:
+            chunk = stack.pop()
+            if chunk._left is not None and chunk._right is not None:
+                stack.append(chunk._right)
+                stack.append(chunk._left)
+            else:
+                yield from chunk._items
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return self._size == other._size and list(self) == list(other)
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        return f"Chunk({list(self)!r})"
+
+    def to_list(self) -> List[T]:
+        return list(self)
+
+
+_EMPTY_CHUNK: Chunk[NoReturn] = Chunk()
+
+
+def _pair(a: AA, b: B) -> Tuple[AA, B]:
+    return a, b
+
+
+class Validation(Generic[E, A], metaclass=ABCMeta):
+    """
+    The result of a validation that either succeeds with a value, or fails with
+    one or more errors. Unlike `Either`, independent validations can be
+    combined with `zip_par`/`map_n` so that the errors of all of them are
+    accumulated, rather than only the first one being kept.
+    """
+
+    @staticmethod
+    def valid(value: AA) -> "Validation[NoReturn, AA]":
+        return Valid(value)
+
+    @staticmethod
+    def invalid(error: EE, *errors: EE) -> "Validation[EE, NoReturn]":
+        return Invalid(Chunk((error,) + errors))
+
+    @staticmethod
+    def from_either(either: Either[EE, AA]) -> "Validation[EE, AA]":
+        if isinstance(either, Left):
+            return Invalid(Chunk.single(either.value))
+        return Valid(either.to_right().value)  # type: ignore
+
+    @staticmethod
+    def from_zio(zio: ZIO[R, EE, AA]) -> "ZIO[R, NoReturn, Validation[EE, AA]]":
+        """Runs `zio`, capturing its success or failure as a `Validation`."""
+        return zio.either().map(Validation.from_either)
+
+    @staticmethod
+    def from_predicate(
+        value: AA,
+        predicate: Callable[[AA], bool],
+        to_error: Callable[[AA], EE]
+    ) -> "Validation[EE, AA]":
+        return Valid(value) if predicate(value) else Invalid(Chunk.single(to_error(value)))
+
+    def map(self, f: Callable[[A], B]) -> "Validation[E, B]":
+        if isinstance(self, Valid):
+            return Valid(f(self.value))
+        return self  # type: ignore
+
+    def map_error(self, f: Callable[[E], EE]) -> "Validation[EE, A]":
+        if isinstance(self, Invalid):
+            return Invalid(Chunk.of(f(e) for e in self.errors))
+        return self  # type: ignore
+
+    def flat_map(self, f: "Callable[[A], Validation[EE, B]]") -> "Validation[Union[E, EE], B]":
+        """Sequential (fail-fast) composition, for validations that depend on each other."""
+        if isinstance(self, Valid):
+            return f(self.value)
+        return self  # type: ignore
+
+    def zip_par(self, that: "Validation[EE, B]") -> "Validation[Union[E, EE], Tuple[A, B]]":
+        """Combines two independent validations, accumulating the errors of both."""
+        return self.zip_with_par(that, _pair)
+
+    def zip_with_par(
+        self,
+        that: "Validation[EE, B]",
+        f: Callable[[A, B], AA]
+    ) -> "Validation[Union[E, EE], AA]":
+        if isinstance(self, Valid) and isinstance(that, Valid):
+            return Valid(f(self.value, that.value))
+        errors: Chunk[Any] = Chunk.empty()
+        if isinstance(self, Invalid):
+            errors = errors + self.errors
+        if isinstance(that, Invalid):
+            errors = errors + that.errors
+        return Invalid(errors)
+
+    @overload
+    @staticmethod
+    def map_n(
+        __v1: "Validation[E1, A1]",
+        __v2: "Validation[E2, A2]",
+        __f: Callable[[A1, A2], B]
+    ) -> "Validation[Union[E1, E2], B]":
+        pass  # pragma: nocover
+
+    @overload
+    @staticmethod
+    def map_n(
+        __v1: "Validation[E1, A1]",
+        __v2: "Validation[E2, A2]",
+        __v3: "Validation[E3, A3]",
+        __f: Callable[[A1, A2, A3], B]
+    ) -> "Validation[Union[E1, E2, E3], B]":
+        pass  # pragma: nocover
+
+    @overload
+    @staticmethod
+    def map_n(
+        __v1: "Validation[E1, A1]",
+        __v2: "Validation[E2, A2]",
+        __v3: "Validation[E3, A3]",
+        __v4: "Validation[E4, A4]",
+        __f: Callable[[A1, A2, A3, A4], B]
+    ) -> "Validation[Union[E1, E2, E3, E4], B]":
+        pass  # pragma: nocover
+
+    @staticmethod
+    def map_n(*args: Any) -> "Validation[Any, Any]":
+        """
+        Combines any number of independent validations with a function of their
+        values (passed last), accumulating the errors of all of them.
+        """
+        *validations, f = args
+        return Validation.sequence_par(validations).map(lambda values: f(*values))
+
+    @staticmethod
+    def sequence_par(validations: "Iterable[Validation[EE, AA]]") -> "Validation[EE, List[AA]]":
+        """Collects every value, or every error of every invalid input."""
+        values: List[AA] = []
+        errors: Chunk[EE] = Chunk.empty()
+        for validation in validations:
+            if isinstance(validation, Invalid):
+                errors = errors + validation.errors
+            elif not errors:
+                values.append(validation.value)  # type: ignore
+        if errors:
+            return Invalid(errors)
+        return Valid(values)
+
+    def fold(self, case_invalid: Callable[[Chunk[E]], B], case_valid: Callable[[A], B]) -> B:
+        if isinstance(self, Invalid):
+            return case_invalid(self.errors)
+        return case_valid(self.value)  # type: ignore
+
+    def to_either(self) -> "Either[List[E], A]":
+        return self.fold(lambda errors: Left(errors.to_list()), Right)
+
+    def to_zio(self) -> "ZIO[object, List[E], A]":
+        return ZIO.from_either(self.to_either())
+
+
+@dataclass(frozen=True)
+class Valid(Generic[A], Validation[NoReturn, A]):
+    value: A
+
+
+@dataclass(frozen=True)
+class Invalid(Generic[E], Validation[E, NoReturn]):
+    errors: Chunk[E]
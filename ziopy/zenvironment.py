@@ -0,0 +1,143 @@
+import re
+from abc import ABCMeta
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar, cast
+
+from ziopy.persistent_map import PersistentMap
+
+S = TypeVar('S')
+
+# The type a service is registered under. It is annotated as a callable rather
+# than as `Type[S]`, which mypy rejects for abstract classes such as `Console`.
+ServiceType = Callable[..., S]
+
+_CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def service_type_of(service: object) -> type:
+    """
+    Infers the type that a service is registered under: the most derived
+    abstract base class of the service's class (e.g. `Console` for a
+    `LiveConsole`), or the service's own class if none of its bases is abstract.
+    """
+    for cls in type(service).__mro__:
+        if isinstance(cls, ABCMeta) and getattr(cls, "__abstractmethods__", None):
+            return cls
+    return type(service)
+
+
+def accessor_name(service_type: type) -> str:
+    """The attribute name for a service type, e.g. `file_system` for `FileSystem`."""
+    return _CAMEL_CASE_BOUNDARY.sub("_", service_type.__name__).lower()
+
+
+class ZEnvironment:
+    """
+    An immutable environment of services keyed by their type:
+
+        env = ZEnvironment.empty().add(LiveConsole()).add(LiveSystem())
+        env.get(Console)
+
+    Services are stored in a persistent map, so `add` and `union` share
+    structure with the original environment instead of copying it. Lookups by
+    type are memoized per environment in a plain dict.
+
+    Each service is also exposed as an attribute named after its type
+    (`env.console`, `env.system`), so a `ZEnvironment` satisfies the `Has*`
+    protocols used by the service modules (`HasConsole`, `HasSystem`, ...).
+    """
+    __slots__ = ("_services", "_accessors", "_cache")
+
+    def __init__(
+        self,
+        _services: "PersistentMap[type, object]" = PersistentMap(),
+        _accessors: "PersistentMap[str, type]" = PersistentMap()
+    ) -> None:
+        self._services = _services
+        self._accessors = _accessors
+        self._cache: Dict[type, object] = {}
+
+    @staticmethod
+    def empty() -> "ZEnvironment":
+        return _EMPTY
+
+    @staticmethod
+    def of(*services: object) -> "ZEnvironment":
+        env = _EMPTY
+        for service in services:
+            env = env.add(service)
+        return env
+
+    def add(
+        self,
+        service: S,
+        service_type: Optional[ServiceType[S]] = None,
+        accessor: Optional[str] = None
+    ) -> "ZEnvironment":
+        """
+        Returns a new environment with `service` registered under
+        `service_type` (by default, inferred with `service_type_of`) and
+        exposed as the attribute `accessor` (by default, derived from the
+        service type with `accessor_name`). An existing service of the same
+        type is replaced.
+        """
+        key = service_type_of(service) if service_type is None else cast(type, service_type)
+        if not isinstance(service, key):
+            raise TypeError(f"{service!r} is not an instance of {key.__name__}")
+        name = accessor_name(key) if accessor is None else accessor
+        return ZEnvironment(self._services.set(key, service), self._accessors.set(name, key))
+
+    def get(self, service_type: ServiceType[S]) -> S:
+        key = cast(type, service_type)
+        try:
+            return cast(S, self._cache[key])
+        except KeyError:
+            pass
+        missing = object()
+        service = self._services.get(key, missing)
+        if service is missing:
+            raise LookupError(f"No service of type {key.__name__} in {self!r}")
+        self._cache[key] = service
+        return cast(S, service)
+
+    def update(self, service_type: ServiceType[S], f: Callable[[S], S]) -> "ZEnvironment":
+        """Returns a new environment in which the service of `service_type` is `f(service)`."""
+        return ZEnvironment(
+            self._services.set(cast(type, service_type), f(self.get(service_type))),
+            self._accessors
+        )
+
+    def union(self, other: "ZEnvironment") -> "ZEnvironment":
+        """Combines two environments. Services in `other` take precedence."""
+        return ZEnvironment(
+            self._services.update(other._services),
+            self._accessors.update(other._accessors)
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        service_type = self._accessors.get(name)
+        if service_type is None or service_type not in self._services:
+            raise AttributeError(f"No service is exposed as {name!r}")
+        return self.get(service_type)
+
+    def __contains__(self, service_type: object) -> bool:
+        return service_type in self._services
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+    def __iter__(self) -> Iterator[Tuple[type, object]]:
+        return self._services.items()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ZEnvironment):
+            return NotImplemented
+        return self._services == other._services
+
+    def __repr__(self) -> str:
+        names = ", ".join(sorted(t.__name__ for t in self._services))
+        return f"ZEnvironment({names})"
+
+
+_EMPTY = ZEnvironment()
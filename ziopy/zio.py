@@ -1,8 +1,22 @@
+import contextlib
+import contextvars
 import functools
+import itertools
+import threading
+import time
 from dataclasses import dataclass
-from typing import Callable, Generic, NoReturn, Tuple, Type, TypeVar, Union
+from typing import (TYPE_CHECKING, Any, Callable, ContextManager, Generic, List, NoReturn,
+                    Optional, Sequence, Tuple, Type, TypeVar, Union, cast, overload)
 
+from ziopy.cause import (Cause, Interrupt, attach_cause, cause_of_exception, cause_of_left,
+                         to_either)
+from ziopy import tracing
 from ziopy.either import Either, Left, Right
+from ziopy.instrumentation import RuntimeHooks, _active_hooks, timed
+from ziopy.zenvironment import ServiceType, ZEnvironment
+
+if TYPE_CHECKING:
+    from ziopy.scheduler import Scheduler  # pragma: nocover
 
 """
 Heavily inspired by:
@@ -22,8 +36,17 @@ EE = TypeVar('EE')
 AA = TypeVar('AA')
 BB = TypeVar('BB')
 
+E1 = TypeVar('E1')
 E2 = TypeVar('E2')
+E3 = TypeVar('E3')
+E4 = TypeVar('E4')
+A1 = TypeVar('A1')
 A2 = TypeVar('A2')
+A3 = TypeVar('A3')
+A4 = TypeVar('A4')
+R2 = TypeVar('R2')
+
+S = TypeVar('S')
 
 T = TypeVar('T')
 Thunk = Callable[[], T]
@@ -59,14 +82,16 @@ class ZIO(Generic[R, E, A]):
         return ZIO(lambda _: e)
 
     @staticmethod
-    def effect(side_effect: Thunk[A]) -> "ZIO[object, Exception, A]":
-        a = ZIO[object, NoReturn, A](lambda _: Either.right(side_effect()))
-        return a.catch(Exception)
+    def effect(side_effect: Thunk[A], label: Optional[str] = None) -> "ZIO[object, Exception, A]":
+        return ZIO.effect_total(side_effect, label).catch(Exception)
 
     @staticmethod
-    def effect_catch(side_effect: Thunk[A], exception_type: Type[X]) -> "ZIO[object, X, A]":
-        a = ZIO[object, NoReturn, A](lambda _: Either.right(side_effect()))
-        return a.catch(exception_type)
+    def effect_catch(
+        side_effect: Thunk[A],
+        exception_type: Type[X],
+        label: Optional[str] = None
+    ) -> "ZIO[object, X, A]":
+        return ZIO.effect_total(side_effect, label).catch(exception_type)
 
     @staticmethod
     def access(f: Callable[[R], A]) -> "ZIO[R, NoReturn, A]":
@@ -79,23 +104,77 @@ class ZIO(Generic[R, E, A]):
     def provide(self, r: R) -> "ZIO[object, E, A]":
         return ZIO(lambda _: self._run(r))
 
+    def provide_some(self: "ZIO[RR, EE, AA]", f: Callable[[R2], RR]) -> "ZIO[R2, EE, AA]":
+        """
+        Runs this program in the environment `f(r)`, where `r` is the
+        environment of the resulting program. Typically used to narrow a larger
+        environment down to the part that this program needs.
+        """
+        run = self._run
+        return ZIO(lambda r: run(f(r)))
+
+    def update_service(
+        self: "ZIO[ZEnvironment, EE, AA]",
+        service_type: ServiceType[S],
+        f: Callable[[S], S]
+    ) -> "ZIO[ZEnvironment, EE, AA]":
+        """
+        Runs this program in an environment whose service of type
+        `service_type` has been replaced by `f(service)`. The rest of the
+        environment is shared, not copied.
+        """
+        run = self._run
+        return ZIO(lambda env: run(env.update(service_type, f)))
+
     @staticmethod
-    def effect_total(side_effect: Thunk[A]) -> "ZIO[object, NoReturn, A]":
-        return ZIO(lambda _: Right(side_effect()))
+    def effect_total(
+        side_effect: Thunk[A],
+        label: Optional[str] = None
+    ) -> "ZIO[object, NoReturn, A]":
+        effect_label = _label_of(side_effect) if label is None else label
+
+        # The annotations of nested functions are quoted so that building a
+        # program does not evaluate them (subscripting generics is slow).
+        def _f(_: object) -> "Either[NoReturn, A]":
+            hooks = _active_hooks.get()
+            if hooks is None:
+                return Right(side_effect())
+            return Right(timed(hooks, effect_label, side_effect))
+        return _traced(ZIO(_f)) if tracing.is_enabled() else ZIO(_f)
+
+    def labeled(self, label: str) -> "ZIO[R, E, A]":
+        """
+        Marks this program as a named step for the runtime hooks passed to
+        `unsafe_run`. Its latency is reported under `label`, and so is its
+        failure if it fails with an error or raises.
+        """
+        def _f(r: R) -> "Either[E, A]":
+            hooks = _active_hooks.get()
+            if hooks is None:
+                return self._run(r)
+            result = timed(hooks, label, lambda: self._run(r))
+            if isinstance(result, Left):
+                hooks.on_failure(label, result.value)
+            return result
+        return ZIO(_f)
 
     def catch(
         self: "ZIO[R, E, AA]",
         exc: Type[X]
     ) -> "ZIO[R, Union[E, X], AA]":
-        def _f(r: R) -> Either[Union[E, X], AA]:
+        def _f(r: R) -> "Either[Union[E, X], AA]":
             try:
                 return self._run(r)
             except exc as e:
+                hooks = _active_hooks.get()
+                if hooks is not None:
+                    hooks.on_catch(e)
                 return Either.left(e)
         return ZIO(_f)
 
     def map(self, f: Callable[[A], B]) -> "ZIO[R, E, B]":
-        return ZIO(lambda r: self._run(r).map(f))
+        zio: ZIO[R, E, B] = ZIO(lambda r: self._run(r).map(f))
+        return _traced(zio) if tracing.is_enabled() else zio
 
     def map_error(self: "ZIO[RR, EE, AA]", f: Callable[[EE], E2]) -> "ZIO[RR, E2, AA]":
         return ZIO(lambda r: self._run(r).map_left(f))
@@ -104,7 +183,10 @@ class ZIO(Generic[R, E, A]):
         self: "ZIO[RR, E, AA]",
         f: Callable[[AA], "ZIO[RR, EE, B]"]
     ) -> "ZIO[RR, Union[E, EE], B]":
-        return ZIO(lambda r: self._run(r).flat_map(lambda a: f(a)._run(r)))
+        def _f(r: RR) -> "Either[Union[E, EE], B]":
+            _checkpoint()
+            return self._run(r).flat_map(lambda a: f(a)._run(r))
+        return _traced(ZIO(_f)) if tracing.is_enabled() else ZIO(_f)
 
     def flatten(
         self: "ZIO[R, E, ZIO[R, EE, AA]]"
@@ -150,6 +232,91 @@ class ZIO(Generic[R, E, A]):
     ) -> "ZIO[RR, Union[E, EE], Tuple[AA, B]]":
         return self.flat_map(lambda a: that.map(lambda b: (a, b)))
 
+    def zip_par(
+        self: "ZIO[RR, E, AA]",
+        that: "ZIO[RR, EE, B]"
+    ) -> "ZIO[RR, Union[E, EE], Tuple[AA, B]]":
+        """Like `zip`, but runs both programs concurrently."""
+        return self.zip_with_par(that, lambda a, b: (a, b))
+
+    def zip_with_par(
+        self: "ZIO[RR, E, AA]",
+        that: "ZIO[RR, EE, B]",
+        f: Callable[[AA, B], BB]
+    ) -> "ZIO[RR, Union[E, EE], BB]":
+        """
+        Runs both programs concurrently, each in its own fiber, and combines
+        their results with `f`. As soon as one of them fails, the other one is
+        interrupted.
+        """
+        return ZIO.map_par_n(self, that, f)
+
+    @overload
+    @staticmethod
+    def map_par_n(
+        __z1: "ZIO[RR, E1, A1]",
+        __z2: "ZIO[RR, E2, A2]",
+        __f: Callable[[A1, A2], BB]
+    ) -> "ZIO[RR, Union[E1, E2], BB]":
+        pass  # pragma: nocover
+
+    @overload
+    @staticmethod
+    def map_par_n(
+        __z1: "ZIO[RR, E1, A1]",
+        __z2: "ZIO[RR, E2, A2]",
+        __z3: "ZIO[RR, E3, A3]",
+        __f: Callable[[A1, A2, A3], BB]
+    ) -> "ZIO[RR, Union[E1, E2, E3], BB]":
+        pass  # pragma: nocover
+
+    @overload
+    @staticmethod
+    def map_par_n(
+        __z1: "ZIO[RR, E1, A1]",
+        __z2: "ZIO[RR, E2, A2]",
+        __z3: "ZIO[RR, E3, A3]",
+        __z4: "ZIO[RR, E4, A4]",
+        __f: Callable[[A1, A2, A3, A4], BB]
+    ) -> "ZIO[RR, Union[E1, E2, E3, E4], BB]":
+        pass  # pragma: nocover
+
+    @staticmethod
+    def map_par_n(*args: Any) -> "ZIO[Any, Any, Any]":
+        """
+        Runs the given programs concurrently and combines their results with a
+        function (passed last). The first failure (or defect) interrupts every
+        program that is still running, and waits for their finalizers before
+        failing.
+        """
+        *zios, f = args
+
+        def _f(r: Any) -> "Either[Any, Any]":
+            fibers = [zio.fork()._run(r).to_right().value for zio in zios]
+            return _join_all(fibers).map(lambda values: f(*values))
+        return BlockingZIO(_f)
+
+    def sandbox(self) -> "ZIO[R, Cause[E], A]":
+        """
+        Exposes the full `Cause` of a failure in the error channel: typed
+        failures, defects (raised exceptions) and interruptions of joined
+        fibers, together with any secondary failures from parallel branches
+        and finalizers.
+        """
+        def _f(r: R) -> "Either[Cause[E], A]":
+            try:
+                result = self._run(r)
+            except Exception as e:
+                return Left(cause_of_exception(e))
+            if isinstance(result, Left):
+                return Left(cause_of_left(result))
+            return cast("Right[A]", result)
+        return ZIO(_f)
+
+    def unsandbox(self: "ZIO[RR, Cause[EE], AA]") -> "ZIO[RR, EE, AA]":
+        """The inverse of `sandbox`."""
+        return ZIO(lambda r: self._run(r).fold(to_either, Right))
+
     def either(self) -> "ZIO[R, NoReturn, Either[E, A]]":
         return ZIO(lambda r: Right(self._run(r)))
 
@@ -213,6 +380,181 @@ class ZIO(Generic[R, E, A]):
             .flat_map(lambda e: e.fold(ZIO.succeed, _recover))
         )
 
+    def fork(self) -> "ZIO[R, NoReturn, Fiber[E, A]]":
+        """
+        Starts running this program concurrently, in a new fiber, and
+        immediately succeeds with that fiber. The fiber inherits the
+        environment and the runtime hooks of its parent.
+        """
+        def _f(r: R) -> "Either[NoReturn, Fiber[E, A]]":
+            fiber: Fiber[E, A] = Fiber(parent=_current_fiber.get())
+            context = contextvars.copy_context()
+            scheduler = _active_scheduler.get()
+            (_spawn if scheduler is None else scheduler.submit)(
+                lambda: context.run(fiber._run, self, r)
+            )
+            return Right(fiber)
+        return ZIO(_f)
+
+    def ensuring(self, finalizer: "ZIO[R, NoReturn, object]") -> "ZIO[R, E, A]":
+        """
+        Runs `finalizer` after this program, whether it succeeds, fails, raises
+        or is interrupted. The finalizer itself cannot be interrupted. Nested
+        finalizers run innermost first, i.e. in the reverse order of
+        acquisition.
+        """
+        def _f(r: R) -> "Either[E, A]":
+            try:
+                result = self._run(r)
+            except BaseException as e:
+                _finalize(finalizer, r, cause_of_exception(e))
+                raise
+            if isinstance(result, Left):
+                _finalize(finalizer, r, cause_of_left(result))
+            else:
+                _run_uninterruptibly(finalizer, r)
+            return result
+        return ZIO(_f)
+
+    def on_interrupt(self, cleanup: "ZIO[R, NoReturn, object]") -> "ZIO[R, E, A]":
+        """Runs `cleanup` (uninterruptibly) only if this program is interrupted."""
+        def _f(r: R) -> "Either[E, A]":
+            try:
+                return self._run(r)
+            except FiberInterruption:
+                _run_uninterruptibly(cleanup, r)
+                raise
+        return ZIO(_f)
+
+    def uninterruptible(self) -> "ZIO[R, E, A]":
+        """
+        Runs this program without checking for interruption. If the fiber is
+        interrupted in the meantime, the interruption takes effect as soon as
+        the program completes.
+        """
+        return self._with_interruptibility(False)
+
+    def interruptible(self) -> "ZIO[R, E, A]":
+        """Makes this program interruptible again inside an uninterruptible region."""
+        return self._with_interruptibility(True)
+
+    def blocking(self) -> "ZIO[R, E, A]":
+        """
+        Marks this program as blocking (e.g. synchronous I/O or a lock). On a
+        `Scheduler` worker, the fiber keeps its thread while another worker is
+        started in the meantime, so that the other fibers are not starved.
+        Asynchronous callers (`ziopy.aio`) run it on the event loop's default
+        executor, rather than on the loop itself.
+        """
+        def _f(r: R) -> Either[E, A]:
+            with _blocking_region():
+                return self._run(r)
+        return BlockingZIO(_f)
+
+    def _with_interruptibility(self, interruptible: bool) -> "ZIO[R, E, A]":
+        def _f(r: R) -> "Either[E, A]":
+            fiber = _current_fiber.get()
+            if fiber is None:
+                return self._run(r)
+            previous = fiber._interruptible
+            fiber._interruptible = interruptible
+            try:
+                _checkpoint()
+                result = self._run(r)
+            finally:
+                fiber._interruptible = previous
+            if isinstance(result, Right):
+                # A failure of the region is reported as is, rather than
+                # being replaced by a pending interruption.
+                _checkpoint()
+            return result
+        return ZIO(_f)
+
+    @staticmethod
+    def effect_async(
+        register: Callable[[Callable[[Either[EE, AA]], None]], object]
+    ) -> "ZIO[object, EE, AA]":
+        """
+        Wraps a callback-based API. `register` is called with a callback,
+        which completes the program when it is called (from any thread) with
+        `Right(value)` or `Left(error)`; later calls are ignored. Until then
+        the fiber is suspended, and interrupting it abandons the operation.
+        """
+        def _register(
+            callback: Callable[[Either[EE, AA]], None]
+        ) -> "Optional[ZIO[object, NoReturn, object]]":
+            register(callback)
+            return None
+        return ZIO.effect_async_interrupt(_register)
+
+    @staticmethod
+    def effect_async_interrupt(
+        register: Callable[
+            [Callable[[Either[EE, AA]], None]], "Optional[ZIO[object, NoReturn, object]]"
+        ]
+    ) -> "ZIO[object, EE, AA]":
+        """
+        Like `effect_async`, but `register` returns a canceler: a program
+        that is run (uninterruptibly) to cancel the operation if the fiber is
+        interrupted while waiting for the callback.
+        """
+        def _f(_: object) -> Either[EE, AA]:
+            fiber = _current_fiber.get()
+            wakeup = threading.Event() if fiber is None else fiber._wakeup
+            lock = threading.Lock()
+            results: List[Either[EE, AA]] = []
+
+            def _callback(result: Either[EE, AA]) -> None:
+                with lock:
+                    if results:
+                        return
+                    results.append(result)
+                wakeup.set()
+
+            canceler = register(_callback)
+            if fiber is not None:
+                fiber._suspended = True
+            try:
+                with _blocking_region():
+                    while not results:
+                        try:
+                            _checkpoint()
+                        except FiberInterruption:
+                            if canceler is not None and not results:
+                                _run_uninterruptibly(canceler, None)
+                            raise
+                        wakeup.wait()
+                        wakeup.clear()
+            finally:
+                if fiber is not None:
+                    fiber._suspended = False
+            return results[0]
+        return BlockingZIO(_f)
+
+    @staticmethod
+    def sleep(seconds: float) -> "ZIO[object, NoReturn, None]":
+        """Suspends the current fiber. Unlike `time.sleep`, this can be interrupted."""
+        def _f(_: object) -> "Either[NoReturn, None]":
+            fiber = _current_fiber.get()
+            if fiber is None:
+                with _blocking_region():
+                    time.sleep(seconds)
+                return Right(None)
+            deadline = time.monotonic() + seconds
+            fiber._suspended = True
+            try:
+                with _blocking_region():
+                    while True:
+                        _checkpoint()
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return Right(None)
+                        fiber._wakeup.wait(remaining)
+                        fiber._wakeup.clear()
+            finally:
+                fiber._suspended = False
+        return BlockingZIO(_f)
+
     def to_callable(
         self: "ZIO[FunctionArguments[F], NoReturn, AA]"
     ) -> "Callable[..., AA]":
@@ -239,18 +581,388 @@ class ZIO(Generic[R, E, A]):
         )
 
 
-class Environment(Generic[R], ZIO[R, NoReturn, R]):
+class BlockingZIO(ZIO[R, E, A]):
+    """
+    A program that blocks its thread while it waits: one marked with
+    `blocking()`, or one that sleeps, waits for a callback or joins fibers.
+    """
+
+
+class Environment(Generic[RR], ZIO[RR, NoReturn, RR]):
     def __init__(self) -> None:
         self._run = lambda r: Right(r)
 
 
-def unsafe_run(io: ZIO[object, X, AA]) -> AA:
-    return io._run(None).fold(_raise, lambda a: a)
+class FiberInterruption(BaseException):
+    """
+    Raised inside a fiber, at its next checkpoint, after it has been
+    interrupted. It derives from BaseException so that `catch(Exception)`
+    does not swallow it; finalizers registered with `ensuring` still run.
+    """
+    def __init__(self, fiber_id: int) -> None:
+        super().__init__(fiber_id)
+        self.fiber_id = fiber_id
+
+
+@dataclass(frozen=True)
+class FiberInterruptedError(Exception):
+    """Raised when joining a fiber that was interrupted."""
+    fiber_id: int
+
+
+_current_fiber: "contextvars.ContextVar[Optional[Fiber]]" = contextvars.ContextVar(
+    "ziopy_current_fiber", default=None
+)
+
+_fiber_ids = itertools.count(1)
+_fiber_ids_lock = threading.Lock()
+
+
+def _next_fiber_id() -> int:
+    # next() on a shared iterator is not atomic on the free-threaded interpreter.
+    with _fiber_ids_lock:
+        return next(_fiber_ids)
+
+
+def _spawn_thread(body: Callable[[], None]) -> None:
+    threading.Thread(target=body, daemon=True).start()
+
+
+_spawn: Callable[[Callable[[], None]], None] = _spawn_thread
+
+_active_scheduler: "contextvars.ContextVar[Optional[Scheduler]]" = contextvars.ContextVar(
+    "ziopy_active_scheduler", default=None
+)
+
+_NOT_BLOCKING: ContextManager[None] = contextlib.nullcontext()
+
+
+def _blocking_region() -> ContextManager[None]:
+    """Tells the active scheduler (if any) that the current thread is about to block."""
+    scheduler = _active_scheduler.get()
+    return _NOT_BLOCKING if scheduler is None else scheduler.blocking()
+
+
+def _checkpoint() -> None:
+    fiber = _current_fiber.get()
+    if fiber is not None and fiber._interrupt_requested and fiber._interruptible:
+        raise FiberInterruption(fiber.id)
+
+
+def _run_uninterruptibly(zio: ZIO[R, NoReturn, object], r: R) -> None:
+    fiber = _current_fiber.get()
+    if fiber is None:
+        zio._run(r)
+        return
+    previous = fiber._interruptible
+    fiber._interruptible = False
+    try:
+        zio._run(r)
+    finally:
+        fiber._interruptible = previous
+
+
+def _finalize(finalizer: ZIO[R, NoReturn, object], r: R, cause: Cause) -> None:
+    """Runs a finalizer after a failure; if it raises, it records both causes."""
+    try:
+        _run_uninterruptibly(finalizer, r)
+    except BaseException as e:
+        raise attach_cause(e, cause.then(cause_of_exception(e)))
+
+
+class _Defect:
+    __slots__ = ("exception",)
+
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+class _Interrupted:
+    __slots__ = ()
+
+
+_INTERRUPTED = _Interrupted()
+
+
+class Fiber(Generic[E, A]):
+    """
+    A running (or completed) program started with `ZIO.fork`.
+
+    Fibers are interrupted cooperatively: an interrupted fiber stops at its
+    next checkpoint (a `flat_map`, a `do <<` step, a `ZIO.sleep` or the end of
+    an uninterruptible region). A fiber blocked inside a side effect is only
+    interrupted once that side effect returns.
+    """
+    def __init__(self, parent: "Optional[Fiber]" = None) -> None:
+        self.id = _next_fiber_id()
+        self.parent = parent
+        self.started_at = time.monotonic()
+        self.thread_id: Optional[int] = None
+        self._suspended = False
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._wakeup = threading.Event()
+        self._waiters: List[threading.Event] = []
+        self._outcome: Union[Either[E, A], _Defect, _Interrupted, None] = None
+        self._interrupt_requested = False
+        self._interruptible = True
+
+    def _run(self, zio: ZIO[R, E, A], r: R) -> None:
+        _current_fiber.set(self)
+        self.thread_id = threading.get_ident()
+        hooks = _active_hooks.get()
+        if hooks is not None:
+            hooks.on_fiber_start(self)
+        outcome: Union[Either[E, A], _Defect, _Interrupted]
+        try:
+            _checkpoint()
+            outcome = zio._run(r)
+        except FiberInterruption:
+            outcome = _INTERRUPTED
+        except BaseException as e:
+            outcome = _Defect(e)
+        self._complete(outcome)
+        if hooks is not None:
+            hooks.on_fiber_end(self)
+
+    def _complete(self, outcome: Union[Either[E, A], _Defect, _Interrupted]) -> None:
+        with self._lock:
+            self._outcome = outcome
+            self._done.set()
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter.set()
+
+    def _add_waiter(self, event: threading.Event) -> bool:
+        """Arranges for `event` to be set on completion; False if already done."""
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self._waiters.append(event)
+            return True
+
+    def _await(self) -> None:
+        """Blocks until this fiber completes; the waiting fiber stays interruptible."""
+        current = _current_fiber.get()
+        if current is None:
+            with _blocking_region():
+                self._done.wait()
+            return
+        if not self._add_waiter(current._wakeup):
+            return
+        current._suspended = True
+        try:
+            with _blocking_region():
+                while True:
+                    if self._done.is_set():
+                        return
+                    _checkpoint()
+                    current._wakeup.wait()
+                    current._wakeup.clear()
+        finally:
+            current._suspended = False
+
+    def _request_interrupt(self) -> None:
+        self._interrupt_requested = True
+        self._wakeup.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def status(self) -> str:
+        """One of "done", "interrupting", "suspended" or "running"."""
+        if self._done.is_set():
+            return "done"
+        if self._interrupt_requested:
+            return "interrupting"
+        if self._suspended:
+            return "suspended"
+        return "running"
+
+    @property
+    def interrupted(self) -> bool:
+        return self._outcome is _INTERRUPTED
+
+    def _cause(self) -> Optional[Cause]:
+        """The cause of this fiber's failure, or None if it succeeded (or is running)."""
+        outcome = self._outcome
+        if isinstance(outcome, Left):
+            return cause_of_left(outcome)
+        if isinstance(outcome, _Defect):
+            return cause_of_exception(outcome.exception)
+        if isinstance(outcome, _Interrupted):
+            return Interrupt(self.id)
+        return None
+
+    def join(self) -> ZIO[object, E, A]:
+        """
+        Waits for this fiber and succeeds or fails like it did. A defect in the
+        fiber is re-raised, and joining an interrupted fiber raises
+        `FiberInterruptedError`.
+        """
+        def _f(_: object) -> "Either[E, A]":
+            self._await()
+            outcome = self._outcome
+            if isinstance(outcome, _Defect):
+                raise outcome.exception
+            if isinstance(outcome, _Interrupted):
+                raise FiberInterruptedError(self.id)
+            assert outcome is not None
+            return outcome
+        return BlockingZIO(_f)
+
+    def interrupt(self) -> ZIO[object, NoReturn, None]:
+        """
+        Interrupts this fiber and waits until it has stopped, i.e. until all of
+        its finalizers have run. Interrupting a completed fiber does nothing.
+        """
+        def _f(_: object) -> "Either[NoReturn, None]":
+            self._request_interrupt()
+            self._await()
+            return Right(None)
+        return BlockingZIO(_f)
+
+    def __repr__(self) -> str:
+        return f"Fiber(id={self.id})"
+
+
+def _join_all(fibers: Sequence[Fiber]) -> Either[Any, List[Any]]:
+    """
+    Waits for every fiber to succeed. The first fiber to fail, die or be
+    interrupted causes all the others to be interrupted; so does interrupting
+    the waiting fiber itself.
+    """
+    with _blocking_region():
+        return _join_all_blocking(fibers)
+
+
+def _join_all_blocking(fibers: Sequence[Fiber]) -> Either[Any, List[Any]]:
+    current = _current_fiber.get()
+    wakeup = threading.Event() if current is None else current._wakeup
+    for fiber in fibers:
+        fiber._add_waiter(wakeup)
+    failed: Optional[Fiber] = None
+    try:
+        if current is not None:
+            current._suspended = True
+        while failed is None:
+            _checkpoint()
+            pending = False
+            for fiber in fibers:
+                if not fiber.done:
+                    pending = True
+                elif not isinstance(fiber._outcome, Right):
+                    failed = fiber
+                    break
+            if not pending:
+                break
+            if failed is None:
+                wakeup.wait()
+                wakeup.clear()
+    finally:
+        if current is not None:
+            current._suspended = False
+        if failed is not None or any(not fiber.done for fiber in fibers):
+            for fiber in fibers:
+                fiber._request_interrupt()
+            for fiber in fibers:
+                fiber._done.wait()
+    if failed is not None:
+        return _combined_failure(failed, fibers)
+    return Right([fiber._outcome.value for fiber in fibers])  # type: ignore
+
+
+def _combined_failure(failed: Fiber, fibers: Sequence[Fiber]) -> Either[Any, NoReturn]:
+    """
+    Fails like `failed` did, with the failures of the other fibers (but not
+    their interruption, which `_join_all` caused) attached to the result.
+    """
+    others = [
+        fiber._cause() for fiber in fibers
+        if fiber is not failed and fiber.done and not fiber.interrupted
+    ]
+    causes = [cause for cause in others if cause is not None]
+    if not causes:
+        return failed.join()._run(None)
+    cause = failed._cause()
+    assert cause is not None
+    for other in causes:
+        cause = cause.both(other)
+    outcome = failed._outcome
+    if isinstance(outcome, Left):
+        return attach_cause(Left(outcome.value), cause)
+    if isinstance(outcome, _Defect):
+        raise attach_cause(outcome.exception, cause)
+    raise attach_cause(FiberInterruptedError(failed.id), cause)
+
+
+def _traced(zio: ZIO[R, E, A]) -> ZIO[R, E, A]:
+    """Records the call site that built `zio` on any failure that passes through it."""
+    site = tracing.capture_site()
+    if site is None:
+        return zio  # pragma: nocover
+    run = zio._run
+
+    def _f(r: R) -> Either[E, A]:
+        try:
+            result = run(r)
+        except Exception as e:
+            tracing.record_on_exception(e, site)  # type: ignore
+            raise
+        if isinstance(result, Left):
+            return tracing.record_on_left(result, site)  # type: ignore
+        return result
+    return ZIO(_f)
+
+
+def _label_of(side_effect: Callable) -> str:
+    return getattr(side_effect, "__qualname__", None) or repr(side_effect)
+
+
+def unsafe_run(
+    io: ZIO[object, X, AA],
+    hooks: Optional[RuntimeHooks] = None,
+    scheduler: "Optional[Scheduler]" = None
+) -> AA:
+    """
+    Runs `io` on the calling thread, and returns its result or raises its
+    error. The fibers it forks run on `scheduler`, if one is given, and
+    otherwise on threads of their own.
+    """
+    if scheduler is not None:
+        scheduler_token = _active_scheduler.set(scheduler)
+        try:
+            return unsafe_run(io, hooks)
+        finally:
+            _active_scheduler.reset(scheduler_token)
+    # Failures of programs built with tracing enabled carry a trace, which is
+    # added to the exception's notes, whether or not tracing is enabled now.
+    token = _active_hooks.set(hooks) if hooks is not None else None
+    run_token = tracing.start_run()
+    try:
+        try:
+            result = io._run(None)
+        except Exception as e:
+            tracing.add_trace_note(e, tracing.trace_of(e))
+            raise
+        if isinstance(result, Left):
+            if hooks is not None:
+                hooks.on_failure("unsafe_run", result.value)
+            if isinstance(result.value, BaseException):
+                tracing.add_trace_note(result.value, tracing.trace_of(result))
+        return result.fold(_raise, lambda a: a)
+    finally:
+        tracing.end_run(run_token)
+        if token is not None:
+            _active_hooks.reset(token)
 
 
 @dataclass(frozen=True)
 class _RaiseLeft(Generic[E], Exception):
     value: E
+    left: "Optional[Left[E]]" = None  # The failed step, which may carry a ZIO trace.
 
 
 class ZIOMonad(Generic[R, EE]):
@@ -258,10 +970,15 @@ class ZIOMonad(Generic[R, EE]):
         self._environment = environment
 
     def __lshift__(self, arg: ZIO[R, EE, BB]) -> BB:
-        return arg._run(self._environment).fold(
-            lambda e: _raise(_RaiseLeft(e)),
-            lambda a: a
-        )
+        _checkpoint()
+        result = arg._run(self._environment)
+        if isinstance(result, Left):
+            if tracing.is_enabled():
+                site = tracing.capture_site()
+                if site is not None:
+                    result = tracing.record_on_left(result, site)
+            raise _RaiseLeft(result.value, result)
+        return cast("Right[BB]", result).value
 
 
 def monadic(func: F) -> F:
@@ -271,6 +988,8 @@ def monadic(func: F) -> F:
             try:
                 return func(do=ZIOMonad(environment), *args, **kwargs)
             except _RaiseLeft as raise_left:
+                if raise_left.left is not None:
+                    return ZIO.from_either(raise_left.left)
                 # NOTE: WJH (12/20/20) mypy can't prove that the generic type
                 #       of the _RaiseLeft instance here is `E`, so we have to
                 #       use `type: ignore`.